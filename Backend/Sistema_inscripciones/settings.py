@@ -57,7 +57,8 @@ CORS_ALLOW_CREDENTIALS = True
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWT con el perfil del usuario en caché en lugar de una consulta por petición
+        'inscripciones.autenticacion.JWTPerfilAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -66,16 +67,28 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend',
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 20
+    'PAGE_SIZE': 20,
+    # orjson en lugar del módulo json estándar para codificar y leer el JSON
+    'DEFAULT_RENDERER_CLASSES': (
+        'inscripciones.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'inscripciones.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=120),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
-    'UPDATE_LAST_LOGIN': True,
+    # last_login se guarda por lotes desde inscripciones.accesos
+    'UPDATE_LAST_LOGIN': False,
 }
 MIDDLEWARE = [
+    'inscripciones.renderers.CompresionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -104,6 +117,38 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'Sistema_inscripciones.wsgi.application'
+# El chatbot usa vistas asíncronas; en producción servir con un servidor ASGI
+# (p. ej. uvicorn Sistema_inscripciones.asgi:application)
+ASGI_APPLICATION = 'Sistema_inscripciones.asgi.application'
+
+# Respuestas a partir de este tamaño (bytes) se comprimen con gzip
+COMPRESION_MIN_BYTES = 1024
+
+# Filas que acepta la importación de estudiantes desde la API, que hashea las
+# contraseñas dentro de la petición; el comando importar_estudiantes no tiene
+# límite y usa un proceso por CPU salvo que se indique --procesos
+IMPORTACION_MAX_FILAS = 500
+
+# Las pruebas fallan si una vista hace más consultas que su presupuesto
+# (PresupuestoConsultasMixin); fuera de ellas solo se registra una advertencia
+TEST_RUNNER = 'inscripciones.runner.PresupuestoTestRunner'
+
+# Segundos que last_login puede esperar en memoria antes de guardarse en lote
+# (0 lo guarda en cada login)
+ULTIMO_ACCESO_INTERVALO = 5
+
+# Perfiles de usuario en memoria para autenticar sin consultar la base:
+# cuántos como máximo y cuántos segundos vale cada uno
+PERFIL_CACHE_MAXIMO = 10000
+PERFIL_CACHE_TTL = 60
+
+# Chatbot: límites para que las respuestas lentas del modelo no acaparen recursos
+CHATBOT_TIMEOUT_CONEXION = 10
+CHATBOT_TIMEOUT_TOTAL = 60
+CHATBOT_MAX_CONCURRENCIA = 20
+# Caché de respuestas por pregunta normalizada (segundos / entradas)
+CHATBOT_CACHE_TTL = 600
+CHATBOT_CACHE_MAX = 1000
 
 
 # Database
@@ -0,0 +1,89 @@
+"""Registro por lotes de last_login.
+
+El login solo anota (usuario, fecha) en memoria del proceso. Cuando lo
+pendiente tiene más de ULTIMO_ACCESO_INTERVALO segundos, la siguiente
+petición que termina en el proceso lo guarda todo con un UPDATE por cada
+`_LOTE` usuarios, ya enviada la respuesta: el login sigue costando una
+consulta. Lo que quede al terminar el proceso se guarda al salir. Con
+intervalo 0 se guarda al terminar cada login, como hacía UPDATE_LAST_LOGIN
+de simplejwt.
+
+Si el proceso muere sin salir ordenadamente (SIGKILL, OOM) se pierden los
+accesos pendientes, como mucho los de los últimos ULTIMO_ACCESO_INTERVALO
+segundos más lo que tarde en llegar otra petición: last_login queda con el
+acceso anterior.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db.models import Case, DateTimeField, Value, When
+from django.dispatch import receiver
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Cada usuario aporta tres parámetros al UPDATE; SQLite antiguo admite 999
+_LOTE = 300
+
+_pendientes = {}
+_lock = threading.Lock()
+_desde = None
+
+
+def registrar_acceso(usuario_id, fecha=None):
+    global _desde
+    with _lock:
+        _pendientes[usuario_id] = fecha or timezone.now()
+        if _desde is None:
+            _desde = time.monotonic()
+
+
+@receiver(request_finished)
+def guardar_accesos_vencidos(sender, **kwargs):
+    # Fuera de la vista: el UPDATE no se suma al tiempo ni a las consultas del login
+    with _lock:
+        vencido = _desde is not None and (
+            time.monotonic() - _desde >= getattr(settings, 'ULTIMO_ACCESO_INTERVALO', 5)
+        )
+    if vencido:
+        guardar_accesos()
+
+
+def guardar_accesos():
+    """Guarda los accesos pendientes y devuelve cuántos usuarios se actualizaron"""
+    global _desde
+    with _lock:
+        pendientes = dict(_pendientes)
+        _pendientes.clear()
+        _desde = None
+    if not pendientes:
+        return 0
+
+    from .models import Usuario
+    actualizados = 0
+    items = list(pendientes.items())
+    try:
+        for i in range(0, len(items), _LOTE):
+            lote = items[i:i + _LOTE]
+            actualizados += Usuario.objects.filter(pk__in=[pk for pk, _ in lote]).update(
+                last_login=Case(
+                    *[When(pk=pk, then=Value(fecha)) for pk, fecha in lote],
+                    output_field=DateTimeField(),
+                )
+            )
+    except Exception:
+        # Se reintentan en el próximo guardado sin pisar accesos más recientes
+        logger.exception('No se pudo guardar last_login de %d usuarios', len(pendientes))
+        with _lock:
+            for pk, fecha in pendientes.items():
+                _pendientes.setdefault(pk, fecha)
+            if _desde is None:
+                _desde = time.monotonic()
+    return actualizados
+
+
+atexit.register(guardar_accesos)
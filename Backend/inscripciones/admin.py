@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Usuario, Materia, Inscripcion, Grupo, Carrera, MateriaRequisito,Docente,Estudiante,Calificacion
+from .models import Usuario, Materia, Inscripcion, Grupo, Carrera, MateriaRequisito,Docente,Estudiante,Calificacion,ListaEspera
+from .models import CalificacionHistorica, GestionArchivada, InscripcionHistorica
 from django.contrib.auth.models import Group
 
 admin.site.register(Usuario)
@@ -10,4 +11,8 @@ admin.site.register(Carrera)
 admin.site.register(MateriaRequisito)
 admin.site.register(Docente)
 admin.site.register(Estudiante)
-admin.site.register(Calificacion)
\ No newline at end of file
+admin.site.register(Calificacion)
+admin.site.register(ListaEspera)
+admin.site.register(GestionArchivada)
+admin.site.register(InscripcionHistorica)
+admin.site.register(CalificacionHistorica)
\ No newline at end of file
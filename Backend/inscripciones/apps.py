@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class InscripcionesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inscripciones'
+
+    def ready(self):
+        # Registra las señales de invalidación de cachés
+        from . import autenticacion, dashboard, requisitos, versiones  # noqa: F401
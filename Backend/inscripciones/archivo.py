@@ -0,0 +1,73 @@
+"""Archivo de gestiones cerradas.
+
+Las inscripciones y calificaciones de una gestión archivada pasan a
+InscripcionHistorica y CalificacionHistorica, así que las tablas que usan
+la inscripción y el registro de notas (y sus índices) solo crecen con las
+gestiones abiertas. El historial sigue disponible para consulta: record
+académico, requisitos, seguimiento, dashboard y exportaciones leen también
+las tablas históricas.
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F, Max
+
+from .dashboard import invalidar_dashboard
+from .models import (
+    Calificacion, CalificacionHistorica, GestionArchivada, Grupo, Inscripcion, InscripcionHistorica,
+    ListaEspera
+)
+
+LOTE = 5000
+
+# modelo activo -> (modelo histórico, campos copiados además de id, estudiante y grupo)
+ARCHIVOS = {
+    Inscripcion: (InscripcionHistorica, ['fecha_inscripcion']),
+    Calificacion: (CalificacionHistorica, ['nota', 'resultado']),
+}
+
+
+def archivar_gestion(gestion, lote=LOTE):
+    """Mueve las inscripciones y calificaciones de la gestión a las tablas históricas.
+
+    Cada lote se copia y se borra en su propia transacción, sin señales: el
+    record académico no cambia y Grupo.inscritos conserva el total de la
+    gestión. Se puede repetir para mover filas que llegaron después.
+    Devuelve cuántas filas se movieron de cada tabla.
+    """
+    ultima = Grupo.objects.aggregate(ultima=Max('gestion'))['ultima']
+    if not Grupo.objects.filter(gestion=gestion).exists():
+        raise ValidationError(f'No hay grupos en la gestión {gestion}.')
+    if gestion == ultima:
+        raise ValidationError(f'La gestión {gestion} está en curso y no se puede archivar.')
+
+    # Las colas de los grupos cerrados ya no se atienden
+    ListaEspera.objects.filter(grupo__gestion=gestion).delete()
+    movidas = {}
+    for modelo in (Calificacion, Inscripcion):
+        movidas[modelo._meta.model_name] = _mover(modelo, gestion, lote)
+
+    archivada, _ = GestionArchivada.objects.get_or_create(gestion=gestion)
+    GestionArchivada.objects.filter(pk=archivada.pk).update(
+        inscripciones=F('inscripciones') + movidas['inscripcion'],
+        calificaciones=F('calificaciones') + movidas['calificacion'],
+    )
+    invalidar_dashboard()
+    return movidas
+
+
+def _mover(modelo, gestion, lote):
+    historico, campos = ARCHIVOS[modelo]
+    total = 0
+    while True:
+        with transaction.atomic():
+            filas = list(
+                modelo.objects.filter(grupo__gestion=gestion).order_by('pk')
+                .values('id', 'estudiante_id', 'grupo_id', *campos)[:lote]
+            )
+            if not filas:
+                return total
+            historico.objects.bulk_create([historico(gestion=gestion, **fila) for fila in filas])
+            # Borrado directo: los receptores post_delete liberarían plazas y
+            # restarían las notas del record
+            modelo.objects.filter(pk__in=[fila['id'] for fila in filas])._raw_delete(modelo.objects.db)
+        total += len(filas)
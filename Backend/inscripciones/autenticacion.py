@@ -0,0 +1,207 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import Docente, Estudiante, Usuario
+
+_CAMPOS = ('email', 'first_name', 'last_name', 'rol', 'is_active', 'is_staff', 'is_superuser')
+
+
+class PerfilCache:
+    """LRU con vencimiento: como mucho `maximo` perfiles, cada uno válido `ttl` segundos.
+
+    Vive en la memoria del proceso. Las señales la invalidan en el proceso que
+    guarda el cambio; en los demás el perfil anterior dura como mucho `ttl`.
+    """
+
+    def __init__(self, maximo, ttl):
+        self.maximo = maximo
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return None
+            vence, valor = entrada
+            if vence <= time.monotonic():
+                del self._datos[clave]
+                return None
+            self._datos.move_to_end(clave)
+            return valor
+
+    def set(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = (time.monotonic() + self.ttl, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maximo:
+                self._datos.popitem(last=False)
+
+    def invalidar(self, *claves):
+        with self._lock:
+            if not claves:
+                self._datos.clear()
+            for clave in claves:
+                self._datos.pop(clave, None)
+
+    def __len__(self):
+        return len(self._datos)
+
+
+perfiles = PerfilCache(
+    getattr(settings, 'PERFIL_CACHE_MAXIMO', 10000), getattr(settings, 'PERFIL_CACHE_TTL', 60)
+)
+
+
+def invalidar_perfiles(*usuario_ids):
+    """Descarta los perfiles indicados (todos si no se indica ninguno), ya y al confirmar"""
+    perfiles.invalidar(*usuario_ids)
+    transaction.on_commit(lambda: perfiles.invalidar(*usuario_ids))
+
+
+def perfil_de(usuario_id):
+    """Datos del usuario que usan los permisos, con los ids de su Estudiante/Docente"""
+    perfil = perfiles.get(usuario_id)
+    if perfil is None:
+        perfil = Usuario.objects.filter(pk=usuario_id).values(
+            *_CAMPOS,
+            estudiante_id=F('estudiante'),
+            carrera_id=F('estudiante__carrera'),
+            docente_id=F('docente'),
+        ).first()
+        if perfil is not None:
+            perfiles.set(usuario_id, perfil)
+    return perfil
+
+
+class UsuarioToken(TokenUser):
+    """Usuario de la petición: el id sale del token y el resto del perfil en caché.
+
+    El rol y los ids de perfil se leen del perfil y no de los claims, que
+    quedan fijos desde el login. Cualquier atributo que no esté en el perfil
+    (ci, telefono, relaciones...) carga el Usuario completo una sola vez.
+    """
+
+    def __init__(self, token, perfil):
+        super().__init__(token)
+        self.perfil = perfil
+
+    def __str__(self):
+        return self.perfil['email']
+
+    @property
+    def is_active(self):
+        return self.perfil['is_active']
+
+    @property
+    def is_staff(self):
+        return self.perfil['is_staff']
+
+    @property
+    def is_superuser(self):
+        return self.perfil['is_superuser']
+
+    @property
+    def username(self):
+        return self.perfil['email']
+
+    def get_full_name(self):
+        return f"{self.perfil['first_name']} {self.perfil['last_name']}".strip()
+
+    @cached_property
+    def usuario(self):
+        return Usuario.objects.get(pk=self.pk)
+
+    def has_perm(self, perm, obj=None):
+        return self.usuario.has_perm(perm, obj)
+
+    def has_perms(self, perm_list, obj=None):
+        return self.usuario.has_perms(perm_list, obj)
+
+    def has_module_perms(self, module):
+        return self.usuario.has_module_perms(module)
+
+    def __getattr__(self, attr):
+        if attr.startswith('_') or attr in ('token', 'perfil'):
+            raise AttributeError(attr)
+        if attr in self.perfil:
+            return self.perfil[attr]
+        return getattr(self.usuario, attr)
+
+    def __eq__(self, other):
+        if isinstance(other, (TokenUser, Usuario)):
+            return self.pk == other.pk
+        return NotImplemented
+
+    __hash__ = TokenUser.__hash__
+
+
+class JWTPerfilAuthentication(JWTAuthentication):
+    """JWTAuthentication sin leer la fila de Usuario en cada petición"""
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Comparar el hash de la contraseña necesita el Usuario completo
+            return super().get_user(validated_token)
+        try:
+            usuario_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        perfil = perfil_de(usuario_id)
+        if perfil is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if api_settings.CHECK_USER_IS_ACTIVE and not perfil['is_active']:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return UsuarioToken(validated_token, perfil)
+
+
+def perfil_id(usuario, perfil):
+    """id del Estudiante o Docente ('estudiante'/'docente') del usuario, o None"""
+    if isinstance(usuario, UsuarioToken):
+        return usuario.perfil[f'{perfil}_id']
+    try:
+        return getattr(usuario, perfil).pk
+    except ObjectDoesNotExist:
+        return None
+
+
+def estudiante_de(usuario):
+    """Estudiante del usuario; con UsuarioToken se arma desde el perfil sin consultar.
+
+    Solo trae id, usuario y carrera: el resto de campos queda diferido y se
+    carga si alguien lo lee.
+    """
+    if not isinstance(usuario, UsuarioToken):
+        return Estudiante.objects.get(usuario=usuario)
+    if usuario.perfil['estudiante_id'] is None:
+        raise Estudiante.DoesNotExist('El usuario no tiene perfil de estudiante.')
+    return Estudiante.from_db(
+        Estudiante.objects.db, ['id', 'usuario_id', 'carrera_id'],
+        [usuario.perfil['estudiante_id'], usuario.pk, usuario.perfil['carrera_id']],
+    )
+
+
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+@receiver(post_save, sender=Estudiante)
+@receiver(post_delete, sender=Estudiante)
+@receiver(post_save, sender=Docente)
+@receiver(post_delete, sender=Docente)
+def perfil_modificado(sender, instance, **kwargs):
+    invalidar_perfiles(instance.pk if sender is Usuario else instance.usuario_id)
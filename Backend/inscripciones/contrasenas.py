@@ -0,0 +1,50 @@
+"""Hash de contraseñas en procesos aparte para la importación masiva.
+
+Este módulo no importa modelos: con el método de arranque 'spawn' cada
+proceso hijo lo importa antes de que Django esté configurado.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+
+
+def _inicializar(settings_module):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+
+def _hashear(contrasenas):
+    from django.contrib.auth.hashers import make_password
+    return [make_password(contrasena) for contrasena in contrasenas]
+
+
+class Hasheador:
+    """Reparte el hash de un lote de contraseñas entre `procesos` procesos.
+
+    Con un solo proceso (o lotes pequeños) se hashea aquí mismo y se evita el
+    costo de arrancar el pool.
+    """
+
+    def __init__(self, procesos=None):
+        self.procesos = procesos or os.cpu_count() or 1
+        self._pool = None
+
+    def __call__(self, contrasenas):
+        if self.procesos == 1 or len(contrasenas) < self.procesos * 4:
+            return _hashear(contrasenas)
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                self.procesos, initializer=_inicializar,
+                initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'Sistema_inscripciones.settings'),)
+            )
+        tamano = -(-len(contrasenas) // self.procesos)
+        partes = [contrasenas[i:i + tamano] for i in range(0, len(contrasenas), tamano)]
+        return [h for parte in self._pool.map(_hashear, partes) for h in parte]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self._pool is not None:
+            self._pool.shutdown()
@@ -0,0 +1,137 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Exists, F, Func, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Carrera, Docente, Estudiante, Grupo, Inscripcion, InscripcionHistorica, Materia
+
+DASHBOARD_CACHE_KEY = 'dashboard:datos'
+# Mientras exista, los datos guardados están vigentes; invalidar solo borra esta clave
+_VIGENTE_KEY = 'dashboard:vigente'
+# Quien la obtiene recalcula; los demás sirven los datos anteriores
+_CALCULANDO_KEY = 'dashboard:calculando'
+
+
+def _contar(queryset):
+    total = queryset.order_by().annotate(total=Func(F('pk'), function='COUNT')).values('total')
+    return Coalesce(Subquery(total, output_field=IntegerField()), 0)
+
+
+def _contar_estudiantes(queryset):
+    total = queryset.order_by().values('grupo__materia').annotate(
+        total=Count('estudiante', distinct=True)
+    ).values('total')
+    return Coalesce(Subquery(total, output_field=IntegerField()), 0)
+
+
+def calcular_dashboard():
+    # Como en los desgloses por gestión y carrera cuentan también las
+    # inscripciones archivadas; quien cursó la materia en ambas tablas cuenta una vez
+    estudiantes_por_materia = (
+        Materia.objects.annotate(
+            total=_contar_estudiantes(Inscripcion.objects.filter(grupo__materia=OuterRef('pk')))
+            + _contar_estudiantes(
+                InscripcionHistorica.objects.filter(grupo__materia=OuterRef('pk')).exclude(Exists(
+                    Inscripcion.objects.filter(
+                        estudiante=OuterRef('estudiante'), grupo__materia=OuterRef('grupo__materia')
+                    )
+                ))
+            )
+        )
+        .values('nombre', 'total')
+        .order_by('nombre')
+    )
+    docentes_por_materia = (
+        Materia.objects.annotate(total=Count('grupos__docente', distinct=True))
+        .values('nombre', 'total')
+        .order_by('nombre')
+    )
+    # Gestiones activas y archivadas en una sola consulta
+    por_gestion = {}
+    for fila in (
+        Inscripcion.objects.values(gestion=F('grupo__gestion')).annotate(total=Count('id')).order_by()
+        .union(InscripcionHistorica.objects.values('gestion').annotate(total=Count('id')).order_by(), all=True)
+    ):
+        por_gestion[fila['gestion']] = por_gestion.get(fila['gestion'], 0) + fila['total']
+    inscripciones_por_gestion = [
+        {'gestion': gestion, 'total': total} for gestion, total in sorted(por_gestion.items())
+    ]
+    # Subconsultas separadas: con dos Count sobre joins distintos el producto
+    # estudiantes x inscripciones de cada carrera crece cuadráticamente
+    por_carrera = (
+        Carrera.objects.annotate(
+            total_estudiantes=_contar(Estudiante.objects.filter(carrera=OuterRef('pk'))),
+            total_inscripciones=_contar(
+                Inscripcion.objects.filter(grupo__materia__carrera=OuterRef('pk'))
+            ) + _contar(
+                InscripcionHistorica.objects.filter(grupo__materia__carrera=OuterRef('pk'))
+            ),
+        )
+        .values('nombre', 'total_estudiantes', 'total_inscripciones')
+        .order_by('nombre')
+    )
+    return {
+        "total_estudiantes": Estudiante.objects.count(),
+        "total_docentes": Docente.objects.count(),
+        "estudiantes_por_materia": list(estudiantes_por_materia),
+        "docentes_por_materia": list(docentes_por_materia),
+        "inscripciones_por_gestion": inscripciones_por_gestion,
+        "por_carrera": list(por_carrera),
+    }
+
+
+def datos_dashboard():
+    """Agregados del dashboard servidos desde caché.
+
+    Al vencer DASHBOARD_CACHE_TTL o invalidarse se recalculan en una sola
+    petición a la vez: las demás siguen sirviendo los datos anteriores
+    mientras tanto, en lugar de repetir todas las agregaciones en paralelo.
+    """
+    guardado = cache.get_many([DASHBOARD_CACHE_KEY, _VIGENTE_KEY])
+    datos = guardado.get(DASHBOARD_CACHE_KEY)
+    if datos is not None and _VIGENTE_KEY in guardado:
+        return datos
+    espera = time.monotonic() + 5
+    while not cache.add(_CALCULANDO_KEY, True, 30):
+        if datos is not None:
+            return datos
+        # Primer cálculo en curso en otra petición: se espera a que termine
+        if time.monotonic() > espera:
+            return calcular_dashboard()
+        time.sleep(0.05)
+        datos = cache.get(DASHBOARD_CACHE_KEY)
+    try:
+        datos = calcular_dashboard()
+        ttl = getattr(settings, 'DASHBOARD_CACHE_TTL', 60)
+        # Los datos duran más que su vigencia para poder servirlos mientras se recalculan
+        cache.set(DASHBOARD_CACHE_KEY, datos, ttl * 10)
+        cache.set(_VIGENTE_KEY, True, ttl)
+    finally:
+        cache.delete(_CALCULANDO_KEY)
+    return datos
+
+
+def invalidar_dashboard():
+    """Marca los datos como vencidos al confirmar la transacción en curso.
+
+    Antes de confirmar otra petición podría volver a guardar los datos sin el
+    cambio, o con uno que termina revirtiéndose.
+    """
+    transaction.on_commit(lambda: cache.delete(_VIGENTE_KEY))
+
+
+# Las inscripciones no invalidan: en el periodo de inscripción cada una
+# vaciaría la caché del dashboard público. Aparecen al vencer el TTL.
+@receiver(post_save, sender=Grupo)
+@receiver(post_delete, sender=Grupo)
+@receiver(post_save, sender=Estudiante)
+@receiver(post_delete, sender=Estudiante)
+@receiver(post_save, sender=Docente)
+@receiver(post_delete, sender=Docente)
+def cambio_en_dashboard(sender, **kwargs):
+    invalidar_dashboard()
@@ -0,0 +1,212 @@
+"""Exportación de calificaciones e inscripciones de una gestión a CSV o XLSX.
+
+Las filas salen de un .values_list() con los joins necesarios y se leen con
+.iterator(chunk_size): en PostgreSQL es un cursor del lado del servidor, así
+que ni la consulta ni el archivo generado se cargan completos en memoria.
+"""
+import csv
+import re
+import zipfile
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.db.models import F, Value
+from django.db.models.functions import Concat
+from django.utils import timezone
+
+from .models import Calificacion, CalificacionHistorica, GestionArchivada, Inscripcion, InscripcionHistorica
+
+LOTE = 2000
+# Tamaño aproximado de cada trozo que se entrega al cliente
+_TROZO = 64 * 1024
+
+
+def _nombre(usuario):
+    return Concat(F(f'{usuario}__first_name'), Value(' '), F(f'{usuario}__last_name'))
+
+
+def _fecha_hora(valor):
+    return timezone.localtime(valor).strftime('%Y-%m-%d %H:%M:%S')
+
+
+# (encabezado, campo o expresión, conversión)
+_COMUNES = [
+    ('gestion', 'grupo__gestion', None),
+    ('sigla', 'grupo__materia__sigla', None),
+    ('materia', 'grupo__materia__nombre', None),
+    ('paralelo', 'grupo__paralelo', None),
+    ('docente', _nombre('grupo__docente__usuario'), None),
+    ('matricula', 'estudiante__matricula', None),
+    ('estudiante', _nombre('estudiante__usuario'), None),
+    ('ci', 'estudiante__usuario__ci', None),
+]
+
+EXPORTACIONES = {
+    'calificaciones': (Calificacion, _COMUNES + [
+        ('nota', 'nota', None),
+        ('resultado', 'resultado', None),
+    ]),
+    'inscripciones': (Inscripcion, _COMUNES + [
+        ('carrera', 'estudiante__carrera__nombre', None),
+        ('modalidad', 'grupo__modalidad', None),
+        ('fecha_inscripcion', 'fecha_inscripcion', _fecha_hora),
+    ]),
+}
+
+_HISTORICOS = {Calificacion: CalificacionHistorica, Inscripcion: InscripcionHistorica}
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def filas_exportacion(tipo, gestion, lote=LOTE):
+    """(encabezados, iterador de filas) de la exportación `tipo` para la gestión.
+
+    Las gestiones archivadas se leen de las tablas históricas. Las consultas
+    se ejecutan recién al recorrer las filas.
+    """
+    modelo, columnas = EXPORTACIONES[tipo]
+    conversiones = [(i, conversion) for i, (_, _, conversion) in enumerate(columnas) if conversion]
+
+    def filas():
+        consulta, filtro = modelo, {'grupo__gestion': gestion}
+        if GestionArchivada.objects.filter(gestion=gestion).exists():
+            # Mismas columnas: las tablas históricas tienen los mismos campos y relaciones
+            consulta, filtro = _HISTORICOS[modelo], {'gestion': gestion}
+        consulta = (
+            consulta.objects.filter(**filtro)
+            .order_by('grupo__materia__sigla', 'grupo__paralelo', 'estudiante__matricula')
+            .values_list(*[campo for _, campo, _ in columnas])
+        )
+        for fila in consulta.iterator(chunk_size=lote):
+            if conversiones:
+                fila = list(fila)
+                for i, conversion in conversiones:
+                    if fila[i] is not None:
+                        fila[i] = conversion(fila[i])
+            yield fila
+
+    return [encabezado for encabezado, _, _ in columnas], filas()
+
+
+def exportar(tipo, gestion, formato='csv', lote=LOTE):
+    """Iterador de trozos de bytes con el archivo completo"""
+    encabezados, filas = filas_exportacion(tipo, gestion, lote)
+    if formato == 'xlsx':
+        return _xlsx(tipo, encabezados, filas)
+    return _csv(encabezados, filas)
+
+
+class _Eco:
+    def write(self, valor):
+        return valor
+
+
+def _csv(encabezados, filas):
+    escritor = csv.writer(_Eco())
+    # Con BOM para que Excel reconozca el UTF-8
+    trozo = ['\ufeff' + escritor.writerow(encabezados)]
+    tamano = 0
+    for fila in filas:
+        linea = escritor.writerow(fila)
+        trozo.append(linea)
+        tamano += len(linea)
+        if tamano >= _TROZO:
+            yield ''.join(trozo).encode()
+            trozo, tamano = [], 0
+    yield ''.join(trozo).encode()
+
+
+class _Buffer:
+    """Destino de escritura sin seek: zipfile escribe cada entrada con data descriptor"""
+
+    def __init__(self):
+        self.partes = []
+        self.tamano = 0
+
+    def write(self, datos):
+        self.partes.append(bytes(datos))
+        self.tamano += len(datos)
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        datos = b''.join(self.partes)
+        self.partes, self.tamano = [], 0
+        return datos
+
+
+# Libro mínimo de una hoja con celdas de texto en línea: no necesita tabla de cadenas compartidas
+_XLSX_FIJOS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+        '</Relationships>'
+    ),
+}
+
+_XLSX_LIBRO = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{nombre}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+)
+
+# Caracteres de control que XML 1.0 no admite
+_NO_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _celda(valor):
+    if valor is None:
+        return '<c/>'
+    if isinstance(valor, (int, float, Decimal)) and not isinstance(valor, bool):
+        return f'<c t="n"><v>{valor}</v></c>'
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(_NO_XML.sub("", str(valor)))}</t></is></c>'
+
+
+def _fila_xml(fila):
+    return ('<row>' + ''.join(_celda(valor) for valor in fila) + '</row>').encode()
+
+
+def _xlsx(nombre, encabezados, filas):
+    salida = _Buffer()
+    with zipfile.ZipFile(salida, 'w', zipfile.ZIP_DEFLATED) as libro:
+        for ruta, contenido in _XLSX_FIJOS.items():
+            libro.writestr(ruta, contenido)
+        libro.writestr('xl/workbook.xml', _XLSX_LIBRO.format(nombre=escape(nombre[:31])))
+        with libro.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as hoja:
+            hoja.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            hoja.write(_fila_xml(encabezados))
+            for fila in filas:
+                hoja.write(_fila_xml(fila))
+                if salida.tamano >= _TROZO:
+                    yield salida.vaciar()
+            hoja.write(b'</sheetData></worksheet>')
+    yield salida.vaciar()
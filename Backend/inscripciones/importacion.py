@@ -0,0 +1,145 @@
+import csv
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from .autenticacion import invalidar_perfiles
+from .contrasenas import Hasheador
+from .dashboard import invalidar_dashboard
+from .models import Carrera, Estudiante, RecordAcademico, Usuario
+
+COLUMNAS_USUARIO = ('email', 'password', 'first_name', 'last_name', 'ci', 'telefono', 'direccion')
+COLUMNAS_ESTUDIANTE = ('matricula', 'fecha_ingreso')
+COLUMNAS = COLUMNAS_USUARIO + COLUMNAS_ESTUDIANTE + ('carrera',)
+
+
+def importar_estudiantes(lineas, lote=1000, procesos=None):
+    """Crea estudiantes desde un CSV leído fila a fila.
+
+    `lineas` es cualquier iterable de texto (archivo abierto, subida
+    decodificada). Las filas se validan y se insertan por lotes: la unicidad
+    de email, CI y matrícula se comprueba con tres consultas por lote además
+    de contra las filas anteriores del mismo archivo. Las contraseñas se
+    hashean en paralelo y cada lote se guarda con bulk_create en su propia
+    transacción. Devuelve los creados y los errores por número de línea.
+    """
+    lector = csv.DictReader(lineas)
+    faltantes = set(COLUMNAS) - set(lector.fieldnames or ())
+    if faltantes:
+        raise ValidationError(f"Faltan columnas en el CSV: {', '.join(sorted(faltantes))}")
+
+    importacion = _Importacion(procesos)
+    with importacion.hasheador:
+        filas = []
+        for fila in lector:
+            filas.append((lector.line_num, fila))
+            if len(filas) >= lote:
+                importacion.procesar(filas)
+                filas = []
+        importacion.procesar(filas)
+
+    if importacion.creados:
+        invalidar_dashboard()
+    return {'creados': importacion.creados, 'errores': importacion.errores}
+
+
+class _Importacion:
+    def __init__(self, procesos):
+        self.hasheador = Hasheador(procesos)
+        self.carreras = {}
+        for carrera_id, nombre in Carrera.objects.values_list('id', 'nombre'):
+            self.carreras[str(carrera_id)] = carrera_id
+            self.carreras[nombre.casefold()] = carrera_id
+        self.vistos = {'email': set(), 'ci': set(), 'matricula': set()}
+        self.creados = 0
+        self.errores = []
+
+    def procesar(self, filas):
+        validas = []
+        for linea, fila in filas:
+            datos, errores = self.limpiar(fila)
+            if errores:
+                self.errores.append({'linea': linea, 'errores': errores})
+            else:
+                validas.append((linea, datos))
+        validas = self.descartar_existentes(validas)
+        if validas:
+            self.insertar(validas)
+
+    def limpiar(self, fila):
+        datos, errores = {}, {}
+        for modelo, columnas in ((Usuario, COLUMNAS_USUARIO), (Estudiante, COLUMNAS_ESTUDIANTE)):
+            for columna in columnas:
+                valor = (fila.get(columna) or '').strip()
+                try:
+                    datos[columna] = modelo._meta.get_field(columna).clean(valor, None)
+                except ValidationError as e:
+                    errores[columna] = e.messages
+        if 'email' in datos:
+            datos['email'] = Usuario.objects.normalize_email(datos['email'])
+
+        datos['carrera'] = self.carreras.get((fila.get('carrera') or '').strip().casefold())
+        if datos['carrera'] is None:
+            errores['carrera'] = ['La carrera no existe.']
+
+        for campo, vistos in self.vistos.items():
+            if campo not in errores and datos[campo] in vistos:
+                errores[campo] = ['Valor repetido en una fila anterior del archivo.']
+        if not errores:
+            for campo, vistos in self.vistos.items():
+                vistos.add(datos[campo])
+        return datos, errores
+
+    def descartar_existentes(self, validas):
+        """Unicidad contra la base de datos: una consulta por campo para todo el lote"""
+        existentes = {
+            'email': set(Usuario.objects.filter(
+                email__in=[d['email'] for _, d in validas]).values_list('email', flat=True)),
+            'ci': set(Usuario.objects.filter(
+                ci__in=[d['ci'] for _, d in validas]).values_list('ci', flat=True)),
+            'matricula': set(Estudiante.objects.filter(
+                matricula__in=[d['matricula'] for _, d in validas]).values_list('matricula', flat=True)),
+        }
+        restantes = []
+        for linea, datos in validas:
+            errores = {
+                campo: ['Ya existe un registro con este valor.']
+                for campo, valores in existentes.items() if datos[campo] in valores
+            }
+            if errores:
+                self.errores.append({'linea': linea, 'errores': errores})
+            else:
+                restantes.append((linea, datos))
+        return restantes
+
+    def insertar(self, validas):
+        contrasenas = self.hasheador([datos['password'] for _, datos in validas])
+        usuarios = [
+            Usuario(**{**{c: datos[c] for c in COLUMNAS_USUARIO}, 'password': contrasena},
+                    rol=Usuario.Rol.ESTUDIANTE)
+            for (_, datos), contrasena in zip(validas, contrasenas)
+        ]
+        try:
+            with transaction.atomic():
+                # bulk_create no dispara crear_record_academico: el record se crea aquí
+                usuarios = Usuario.objects.bulk_create(usuarios)
+                estudiantes = Estudiante.objects.bulk_create([
+                    Estudiante(
+                        usuario=usuario, carrera_id=datos['carrera'],
+                        **{c: datos[c] for c in COLUMNAS_ESTUDIANTE}
+                    )
+                    for usuario, (_, datos) in zip(usuarios, validas)
+                ])
+                RecordAcademico.objects.bulk_create(
+                    [RecordAcademico(estudiante=estudiante) for estudiante in estudiantes]
+                )
+        except IntegrityError:
+            # Otro proceso creó alguno de estos registros después de la validación
+            for linea, _ in validas:
+                self.errores.append({
+                    'linea': linea,
+                    'errores': {'non_field_errors': ['Conflicto de unicidad al guardar el lote; vuelva a importar la fila.']},
+                })
+            return
+        invalidar_perfiles(*[usuario.pk for usuario in usuarios])
+        self.creados += len(estudiantes)
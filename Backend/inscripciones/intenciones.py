@@ -0,0 +1,53 @@
+import unicodedata
+
+# Respuestas fijas que el prompt del sistema pide al modelo para estas intenciones
+RESPUESTAS = {
+    'inscripciones': 'Por favor inicia sesión y luego accede al siguiente enlace: [Inscripciones aquí](http://localhost:3000/estudiante/inscripciones)',
+    'seguimiento': 'Por favor inicia sesión y luego accede al siguiente enlace: [Seguimiento aquí](http://localhost:3000/estudiante/seguimiento)',
+}
+
+# Raíces de palabra con su peso por intención; se comparan contra el inicio de
+# cada palabra de la pregunta normalizada (sin tildes ni mayúsculas)
+RAICES = {
+    'inscripciones': {
+        'inscrib': 1.0, 'inscrip': 1.0, 'matricul': 0.8, 'anot': 0.6, 'registr': 0.6,
+    },
+    'seguimiento': {
+        'seguimiento': 1.0, 'nota': 0.8, 'calificacion': 0.8, 'record': 0.8,
+        'promedio': 0.8, 'historial': 0.7, 'avance': 0.6, 'aprobad': 0.6,
+    },
+}
+UMBRAL = 0.8
+# Preguntas largas suelen pedir algo más específico: se dejan al modelo
+MAX_PALABRAS = 15
+
+
+def normalizar(pregunta):
+    """Forma canónica de la pregunta: sin mayúsculas, tildes, signos ni espacios de más"""
+    texto = unicodedata.normalize('NFKD', pregunta.lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    texto = ''.join(c if c.isalnum() else ' ' for c in texto)
+    return ' '.join(texto.split())
+
+
+def clasificar(pregunta):
+    """Devuelve (intención, puntaje) o (None, 0) si la pregunta no es de una intención conocida"""
+    palabras = normalizar(pregunta).split()
+    if not palabras or len(palabras) > MAX_PALABRAS:
+        return None, 0
+    puntajes = {
+        intencion: sum(
+            max((peso for raiz, peso in raices.items() if palabra.startswith(raiz)), default=0)
+            for palabra in palabras
+        )
+        for intencion, raices in RAICES.items()
+    }
+    mejor, segundo = sorted(puntajes.items(), key=lambda item: item[1], reverse=True)[:2]
+    if mejor[1] < UMBRAL or mejor[1] == segundo[1]:
+        return None, 0
+    return mejor
+
+
+def responder_local(pregunta):
+    intencion, _ = clasificar(pregunta)
+    return RESPUESTAS.get(intencion)
@@ -0,0 +1,25 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from inscripciones.archivo import LOTE, archivar_gestion
+
+
+class Command(BaseCommand):
+    help = (
+        'Mueve las inscripciones y calificaciones de una gestión cerrada a las tablas históricas; '
+        'el historial queda disponible en modo lectura'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('gestion', help='Gestión a archivar, por ejemplo 2023-2024')
+        parser.add_argument('--lote', type=int, default=LOTE, help='Filas movidas por transacción')
+
+    def handle(self, *args, **options):
+        try:
+            movidas = archivar_gestion(options['gestion'], lote=options['lote'])
+        except ValidationError as e:
+            raise CommandError(e.messages[0])
+        self.stdout.write(self.style.SUCCESS(
+            f"Gestión {options['gestion']} archivada: {movidas['inscripcion']} inscripciones y "
+            f"{movidas['calificacion']} calificaciones movidas"
+        ))
@@ -0,0 +1,191 @@
+import json
+import re
+import statistics
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from inscripciones.dashboard import calcular_dashboard
+from inscripciones.exportacion import exportar
+from inscripciones.models import Grupo, Inscripcion, Usuario
+from inscripciones.urls import router
+
+# Patrones de los planes que indican recorridos completos u ordenamientos
+_RECORRIDOS = {
+    'sqlite': re.compile(r'^SCAN (\w+)(?! USING (?:COVERING )?INDEX| USING INTEGER PRIMARY KEY)'),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+}
+_ORDENAMIENTOS = {
+    'sqlite': re.compile(r'USE TEMP B-TREE FOR (.+)'),
+    'postgresql': re.compile(r'(?:^|->  )Sort\b|Sort Method: (external.*)'),
+}
+
+
+class _Captura:
+    """execute_wrapper que guarda cada SELECT distinto con sus parámetros y el escenario que lo generó"""
+
+    def __init__(self):
+        self.escenario = None
+        self.consultas = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith('SELECT') and sql not in self.consultas:
+            self.consultas[sql] = (self.escenario, params)
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta los listados, filtros y detalles de cada viewset, los endpoints del estudiante, '
+        'el dashboard y las exportaciones; luego muestra el plan (EXPLAIN) de cada consulta y '
+        'marca los recorridos completos de tablas grandes y los ordenamientos'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyze', action='store_true', help='EXPLAIN ANALYZE (solo PostgreSQL)')
+        parser.add_argument('--repeticiones', type=int, default=5, help='Ejecuciones para medir cada consulta')
+        parser.add_argument(
+            '--min-filas', type=int, default=1000,
+            help='Los recorridos completos solo se marcan en tablas con al menos estas filas'
+        )
+        parser.add_argument('--todas', action='store_true', help='Mostrar también las consultas sin hallazgos')
+        parser.add_argument('--salida', help='JSON con el plan y el tiempo de cada consulta')
+        parser.add_argument('--comparar', help='JSON de una auditoría anterior para comparar los tiempos')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in _RECORRIDOS:
+            raise CommandError(f'Auditoría no disponible para {connection.vendor}')
+        if options['analyze'] and connection.vendor != 'postgresql':
+            raise CommandError('--analyze solo está disponible en PostgreSQL')
+        if not Grupo.objects.exists():
+            raise CommandError('No hay grupos; ejecuta primero generar_datos')
+
+        captura = _Captura()
+        with override_settings(DEBUG=False), transaction.atomic():
+            escenarios = self.escenarios()
+            with connection.execute_wrapper(captura):
+                for nombre, ejecutar in escenarios:
+                    captura.escenario = nombre
+                    ejecutar()
+            filas = self.filas_por_tabla()
+            resultados = [
+                self.auditar(sql, params, escenario, filas, options)
+                for sql, (escenario, params) in captura.consultas.items()
+            ]
+            transaction.set_rollback(True)
+
+        marcadas = [r for r in resultados if r['hallazgos']]
+        for resultado in resultados if options['todas'] else marcadas:
+            self.stdout.write(f"\n[{resultado['escenario']}] {resultado['tiempo_ms']:.2f} ms")
+            self.stdout.write(f"  {resultado['sql'][:300]}")
+            for linea in resultado['plan']:
+                self.stdout.write(f'    {linea}')
+            for hallazgo in resultado['hallazgos']:
+                self.stdout.write(self.style.WARNING(f'  ! {hallazgo}'))
+
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(resultados, archivo, indent=2, ensure_ascii=False)
+        if options['comparar']:
+            self.comparar(resultados, options['comparar'])
+        self.stdout.write(self.style.SUCCESS(
+            f'\n{len(resultados)} consultas auditadas, {len(marcadas)} con recorridos completos u ordenamientos'
+        ))
+
+    def escenarios(self):
+        """(nombre, función) de cada petición o cálculo a auditar; los datos de muestra se leen aquí"""
+        admin = Usuario.objects.create_superuser(
+            email='auditoria@sintetico.edu', password=None, ci='auditoria', rol=Usuario.Rol.ADMIN
+        )
+        gestion = Grupo.objects.aggregate(ultima=Max('gestion'))['ultima']
+        inscripcion = (
+            Inscripcion.objects.filter(grupo__gestion=gestion).select_related('estudiante__usuario').first()
+        )
+        administrador = Client(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}')
+
+        def get(cliente, url):
+            return lambda: cliente.get(url)
+
+        escenarios = []
+        for prefijo, vista, _ in router.registry:
+            modelo = vista.queryset.model
+            ultimo = modelo.objects.order_by('-pk').first()
+            urls = [f'/api/{prefijo}/', f'/api/{prefijo}/?paginacion=cursor']
+            if ultimo is not None:
+                urls.append(f'/api/{prefijo}/{ultimo.pk}/')
+                # Cada filtro de la API con un valor real de la tabla
+                for campo in getattr(vista, 'filterset_fields', ()):
+                    valor = getattr(ultimo, modelo._meta.get_field(campo).attname)
+                    urls.append(f'/api/{prefijo}/?{campo}={valor}')
+            escenarios += [(f'GET {url}', get(administrador, url)) for url in urls]
+
+        if inscripcion is not None:
+            estudiante = Client(
+                HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(inscripcion.estudiante.usuario)}'
+            )
+            escenarios += [
+                (f'GET {url} (estudiante)', get(estudiante, url))
+                for url in ('/api/grupos/disponibles/', '/api/estudiantes/mi-seguimiento/', '/api/inscripciones/')
+            ]
+
+        escenarios.append(('dashboard', calcular_dashboard))
+        for tipo in ('calificaciones', 'inscripciones'):
+            escenarios.append((f'exportar {tipo} {gestion}', lambda tipo=tipo: list(exportar(tipo, gestion))))
+        return escenarios
+
+    def filas_por_tabla(self):
+        return {
+            modelo._meta.db_table: modelo.objects.count()
+            for modelo in apps.get_app_config('inscripciones').get_models()
+        }
+
+    def auditar(self, sql, params, escenario, filas, options):
+        prefijo = connection.ops.explain_query_prefix(**({'analyze': True} if options['analyze'] else {}))
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefijo} {sql}', params)
+            plan = [fila[-1] if connection.vendor == 'sqlite' else fila[0] for fila in cursor.fetchall()]
+
+            tiempos = []
+            for _ in range(options['repeticiones']):
+                inicio = time.perf_counter()
+                cursor.execute(sql, params)
+                cursor.fetchall()
+                tiempos.append(time.perf_counter() - inicio)
+
+        hallazgos = []
+        ordenamientos = [linea for linea in plan if _ORDENAMIENTOS[connection.vendor].search(linea.strip())]
+        # SQLite informa SCAN también al recorrer por rowid hasta el LIMIT, sin leer la tabla entera
+        limitada = connection.vendor == 'sqlite' and re.search(r'\bLIMIT \d+\s*$', sql) and not ordenamientos
+        for linea in plan:
+            recorrido = _RECORRIDOS[connection.vendor].search(linea.strip())
+            if recorrido and not limitada and filas.get(recorrido.group(1), 0) >= options['min_filas']:
+                hallazgos.append(f'recorrido completo de {recorrido.group(1)} ({filas[recorrido.group(1)]} filas)')
+            if linea in ordenamientos:
+                hallazgos.append(f'ordenamiento: {linea.strip()}')
+        return {
+            'escenario': escenario,
+            'sql': sql,
+            'tiempo_ms': round(statistics.median(tiempos) * 1000, 3) if tiempos else None,
+            'plan': plan,
+            'hallazgos': hallazgos,
+        }
+
+    def comparar(self, resultados, archivo):
+        with open(archivo, encoding='utf-8') as f:
+            anteriores = {r['sql']: r for r in json.load(f)}
+        self.stdout.write('')
+        for resultado in sorted(resultados, key=lambda r: -(r['tiempo_ms'] or 0)):
+            anterior = anteriores.get(resultado['sql'])
+            if anterior is None or not anterior['tiempo_ms']:
+                continue
+            self.stdout.write(
+                f"{anterior['tiempo_ms']:>9.2f} -> {resultado['tiempo_ms']:>9.2f} ms "
+                f"({resultado['tiempo_ms'] / anterior['tiempo_ms']:.2f}x) "
+                f"{len(anterior['hallazgos'])} -> {len(resultado['hallazgos'])} hallazgos  [{resultado['escenario']}]"
+            )
@@ -0,0 +1,329 @@
+import gzip
+import json
+import statistics
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.tokens import AccessToken
+
+from inscripciones.accesos import guardar_accesos
+from inscripciones.dashboard import DASHBOARD_CACHE_KEY, calcular_dashboard
+from inscripciones.models import (
+    Calificacion, Docente, Estudiante, Grupo, Inscripcion, Materia, Usuario
+)
+from inscripciones.views import EstudianteViewSet, GrupoViewSet, InscripcionViewSet, MateriaViewSet
+from inscripciones.renderers import ORJSONRenderer
+from inscripciones.serializers import CalificacionSerializer, DocenteSerializer, EstudianteSerializer
+from inscripciones.services import grupos_disponibles
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, round(p / 100 * (len(ordenados) - 1)))
+    return ordenados[indice]
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide los endpoints principales (listado de grupos, inscripción, planilla de notas, '
+        'dashboard y login) sobre la base de datos actual y guarda el resultado en JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=50)
+        parser.add_argument('--calentamiento', type=int, default=5)
+        parser.add_argument('--password', default='clave12345', help='Contraseña de los usuarios de generar_datos')
+        parser.add_argument('--filas', type=int, default=500, help='Filas por listado al comparar la serialización')
+        parser.add_argument('--logins', type=int, default=200, help='Logins de estudiantes distintos por medición de throughput')
+        parser.add_argument('--hilos', type=int, default=4, help='Clientes concurrentes en el throughput de login')
+        parser.add_argument('--salida', default='benchmark.json')
+        parser.add_argument('--comparar', help='JSON de una ejecución anterior para mostrar la diferencia')
+
+    def handle(self, *args, **options):
+        self.repeticiones = options['repeticiones']
+        self.calentamiento = options['calentamiento']
+        gestion = Grupo.objects.aggregate(ultima=Max('gestion'))['ultima']
+        if gestion is None:
+            raise CommandError('No hay grupos; ejecuta primero generar_datos')
+
+        # Con DEBUG se guardan todas las consultas en memoria y se distorsiona la medición
+        with override_settings(DEBUG=False), transaction.atomic():
+            resultados = self.medir_todo(gestion, options['password'])
+            serializacion = self.medir_serializacion(options['filas'])
+            renderizado = self.medir_renderizado(options['filas'])
+            login = self.medir_login(options['password'], options['logins'], options['hilos'])
+            # Nada de lo que hace el benchmark queda en la base de datos
+            transaction.set_rollback(True)
+
+        reporte = {
+            'fecha': timezone.now().isoformat(),
+            'base_de_datos': connection.vendor,
+            'repeticiones': self.repeticiones,
+            'gestion': gestion,
+            'dataset': {
+                'materias': Materia.objects.count(),
+                'grupos': Grupo.objects.count(),
+                'estudiantes': Estudiante.objects.count(),
+                'inscripciones': Inscripcion.objects.count(),
+                'calificaciones': Calificacion.objects.count(),
+            },
+            'escenarios': resultados,
+            'serializacion': serializacion,
+            'renderizado': renderizado,
+            'login': login,
+        }
+        with open(options['salida'], 'w', encoding='utf-8') as archivo:
+            json.dump(reporte, archivo, indent=2, ensure_ascii=False)
+
+        for nombre, datos in resultados.items():
+            self.stdout.write(
+                f"{nombre:<22} p50={datos['p50_ms']:>8.2f} ms  p95={datos['p95_ms']:>8.2f} ms  "
+                f"consultas={datos['consultas']}"
+            )
+        for nombre, datos in serializacion.items():
+            self.stdout.write(
+                f"{nombre:<22} por fila: serializer {datos['serializer_us_fila']:.1f} us / "
+                f"{datos['serializer_bytes_fila']} B, proyección {datos['proyeccion_us_fila']:.1f} us / "
+                f"{datos['proyeccion_bytes_fila']} B"
+            )
+        for nombre, datos in renderizado.items():
+            self.stdout.write(
+                f"{nombre:<22} json {datos['json_ms']:.2f} ms, orjson {datos['orjson_ms']:.2f} ms, "
+                f"{datos['bytes']} B -> gzip {datos['gzip_bytes']} B ({datos['gzip_ms']:.2f} ms)"
+            )
+        for datos in login:
+            self.stdout.write(
+                f"login x{datos['hilos']:<18} {datos['logins_por_segundo']:>8.1f} logins/s  "
+                f"p50={datos['p50_ms']:.2f} ms  p95={datos['p95_ms']:.2f} ms"
+            )
+        if options['comparar']:
+            self.comparar(resultados, options['comparar'])
+        self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['salida']}"))
+
+    def medir_todo(self, gestion, password):
+        estudiante = self.estudiante_con_grupo(gestion)
+        grupo = (
+            Grupo.objects.filter(gestion=gestion, inscritos__gt=0)
+            .select_related('docente__usuario').order_by('-inscritos').first()
+        )
+        planilla = [
+            {'estudiante': estudiante_id, 'nota': '75.50'}
+            for estudiante_id in grupo.inscripciones.values_list('estudiante_id', flat=True)
+        ]
+        admin = Usuario.objects.create_superuser(
+            email='benchmark@sintetico.edu', password=password, ci='benchmark', rol=Usuario.Rol.ADMIN
+        )
+
+        administrador = self.cliente(admin)
+        alumno = self.cliente(estudiante.usuario)
+        docente = self.cliente(grupo.docente.usuario)
+        anonimo = Client()
+        disponible = grupos_disponibles(estudiante, gestion).first()
+
+        def dashboard():
+            cache.delete(DASHBOARD_CACHE_KEY)
+            return anonimo.get('/api/dashboard/')
+
+        escenarios = {
+            'grupos_lista': (lambda: administrador.get('/api/grupos/', {'gestion': gestion}), 200),
+            'grupos_disponibles': (lambda: alumno.get('/api/grupos/disponibles/'), 200),
+            'inscripcion': (
+                lambda: alumno.post('/api/inscripciones/', {'grupo': disponible.pk}, content_type='application/json'),
+                201
+            ),
+            'calificacion': (
+                lambda: docente.post(
+                    f'/api/grupos/{grupo.pk}/calificaciones/', planilla[:1], content_type='application/json'
+                ),
+                200
+            ),
+            'planilla_completa': (
+                lambda: docente.post(
+                    f'/api/grupos/{grupo.pk}/calificaciones/', planilla, content_type='application/json'
+                ),
+                200
+            ),
+            'dashboard_frio': (dashboard, 200),
+            'dashboard': (lambda: anonimo.get('/api/dashboard/'), 200),
+            'login': (
+                lambda: anonimo.post(
+                    '/api/auth/login/', {'email': estudiante.usuario.email, 'password': password},
+                    content_type='application/json'
+                ),
+                200
+            ),
+        }
+        return {
+            nombre: self.medir(nombre, peticion, esperado)
+            for nombre, (peticion, esperado) in escenarios.items()
+        }
+
+    def estudiante_con_grupo(self, gestion):
+        """Primer estudiante (en orden de id) con al menos un grupo disponible"""
+        for estudiante in Estudiante.objects.order_by('id').iterator(chunk_size=100):
+            if grupos_disponibles(estudiante, gestion).exists():
+                return estudiante
+        raise CommandError(f'Ningún estudiante tiene grupos disponibles en {gestion}')
+
+    def cliente(self, usuario):
+        return Client(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(usuario)}')
+
+    def medir(self, nombre, peticion, esperado):
+        tiempos = []
+        consultas = None
+        for i in range(self.calentamiento + self.repeticiones):
+            # Cada repetición se deshace para que todas partan del mismo estado
+            with transaction.atomic():
+                inicio = time.perf_counter()
+                response = peticion()
+                transcurrido = time.perf_counter() - inicio
+                transaction.set_rollback(True)
+            if response.status_code != esperado:
+                raise CommandError(
+                    f'{nombre}: se esperaba {esperado} y se obtuvo {response.status_code}: {response.content[:200]!r}'
+                )
+            if i >= self.calentamiento:
+                tiempos.append(transcurrido * 1000)
+                consultas = response.get('X-Consultas-DB', consultas)
+        return {
+            'n': len(tiempos),
+            'min_ms': round(min(tiempos), 3),
+            'media_ms': round(statistics.fmean(tiempos), 3),
+            'p50_ms': round(_percentil(tiempos, 50), 3),
+            'p95_ms': round(_percentil(tiempos, 95), 3),
+            'max_ms': round(max(tiempos), 3),
+            'consultas': int(consultas) if consultas is not None else None,
+        }
+
+    def medir_serializacion(self, filas):
+        """Costo por fila de cada listado: ModelSerializer sobre instancias frente a la proyección"""
+        resultados = {}
+        for nombre, vista in (
+            ('materias', MateriaViewSet), ('grupos', GrupoViewSet),
+            ('inscripciones', InscripcionViewSet), ('estudiantes', EstudianteViewSet),
+        ):
+            queryset = vista.queryset.order_by('id')[:filas]
+            total = queryset.count()
+            if not total:
+                continue
+            serializer = self.costo(lambda: vista.serializer_class(queryset.all(), many=True).data)
+            proyeccion = self.costo(lambda: vista.proyeccion.armar(vista.proyeccion.consulta(queryset)))
+            resultados[nombre] = {
+                'filas': total,
+                'serializer_us_fila': round(serializer[0] * 1e6 / total, 2),
+                'proyeccion_us_fila': round(proyeccion[0] * 1e6 / total, 2),
+                'serializer_bytes_fila': serializer[1] // total,
+                'proyeccion_bytes_fila': proyeccion[1] // total,
+            }
+        return resultados
+
+    def medir_renderizado(self, filas):
+        """Tiempo de codificación con el JSONRenderer de DRF y con orjson, y tamaño con gzip"""
+        cargas = {
+            'estudiantes': lambda: EstudianteSerializer(
+                Estudiante.objects.select_related('usuario', 'carrera').order_by('id')[:filas], many=True
+            ).data,
+            'docentes': lambda: DocenteSerializer(
+                Docente.objects.select_related('usuario').order_by('id')[:filas], many=True
+            ).data,
+            'calificaciones': lambda: CalificacionSerializer(
+                Calificacion.objects.select_related('estudiante__usuario', 'grupo__materia')
+                .order_by('id')[:filas], many=True
+            ).data,
+            'dashboard': calcular_dashboard,
+        }
+        resultados = {}
+        for nombre, cargar in cargas.items():
+            datos = cargar()
+            contenido = ORJSONRenderer().render(datos)
+            resultados[nombre] = {
+                'json_ms': round(self.costo(lambda: JSONRenderer().render(datos))[0] * 1000, 3),
+                'orjson_ms': round(self.costo(lambda: ORJSONRenderer().render(datos))[0] * 1000, 3),
+                'bytes': len(contenido),
+                'gzip_bytes': len(gzip.compress(contenido, 6)),
+                'gzip_ms': round(self.costo(lambda: gzip.compress(contenido, 6))[0] * 1000, 3),
+            }
+        return resultados
+
+    def medir_login(self, password, total, hilos):
+        """Logins por segundo de estudiantes distintos, con uno y con `hilos` clientes a la vez"""
+        correos = list(
+            Usuario.objects.filter(rol=Usuario.Rol.ESTUDIANTE).order_by('id').values_list('email', flat=True)[:total]
+        )
+        if not correos:
+            return []
+
+        def entrar(correo):
+            inicio = time.perf_counter()
+            response = Client().post(
+                '/api/auth/login/', {'email': correo, 'password': password}, content_type='application/json'
+            )
+            transcurrido = time.perf_counter() - inicio
+            if response.status_code != 200:
+                raise CommandError(f'login de {correo}: {response.status_code}: {response.content[:200]!r}')
+            return transcurrido * 1000
+
+        def en_hilo(correo):
+            try:
+                return entrar(correo)
+            finally:
+                # Cada hilo abre su propia conexión
+                connection.close()
+
+        resultados = []
+        for concurrencia in sorted({1, hilos}):
+            inicio = time.perf_counter()
+            if concurrencia == 1:
+                tiempos = [entrar(correo) for correo in correos]
+            else:
+                with ThreadPoolExecutor(concurrencia) as pool:
+                    tiempos = list(pool.map(en_hilo, correos))
+            segundos = time.perf_counter() - inicio
+            resultados.append({
+                'hilos': concurrencia,
+                'logins': len(tiempos),
+                'segundos': round(segundos, 3),
+                'logins_por_segundo': round(len(tiempos) / segundos, 1),
+                'p50_ms': round(_percentil(tiempos, 50), 3),
+                'p95_ms': round(_percentil(tiempos, 95), 3),
+            })
+        # last_login pendiente se escribe dentro de la transacción que se deshace
+        guardar_accesos()
+        return resultados
+
+    def costo(self, funcion):
+        """Mediana del tiempo (consulta incluida) y pico de memoria asignada"""
+        for _ in range(self.calentamiento):
+            funcion()
+        tiempos = []
+        for _ in range(max(self.repeticiones // 5, 3)):
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append(time.perf_counter() - inicio)
+        # La memoria se mide aparte: tracemalloc encarece mucho cada asignación
+        tracemalloc.start()
+        funcion()
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return statistics.median(tiempos), pico
+
+    def comparar(self, resultados, archivo):
+        with open(archivo, encoding='utf-8') as f:
+            anteriores = json.load(f)['escenarios']
+        for nombre, datos in resultados.items():
+            anterior = anteriores.get(nombre)
+            if anterior is None:
+                continue
+            razon = datos['p50_ms'] / anterior['p50_ms'] if anterior['p50_ms'] else 0
+            self.stdout.write(
+                f"{nombre:<22} p50 {anterior['p50_ms']:.2f} -> {datos['p50_ms']:.2f} ms ({razon:.2f}x)"
+            )
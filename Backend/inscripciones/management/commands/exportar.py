@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from inscripciones.exportacion import EXPORTACIONES, FORMATOS, LOTE, exportar
+
+
+class Command(BaseCommand):
+    help = 'Exporta las calificaciones o inscripciones de una gestión a CSV o XLSX sin cargarlas en memoria'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tipo', choices=list(EXPORTACIONES))
+        parser.add_argument('gestion')
+        parser.add_argument('--formato', choices=list(FORMATOS), default='csv')
+        parser.add_argument('--salida', help='Archivo de destino (por defecto <tipo>_<gestion>.<formato>)')
+        parser.add_argument('--lote', type=int, default=LOTE, help='Filas que se leen de la base por vez')
+
+    def handle(self, *args, **options):
+        salida = options['salida'] or f"{options['tipo']}_{options['gestion']}.{options['formato']}"
+        total = 0
+        with open(salida, 'wb') as archivo:
+            for trozo in exportar(options['tipo'], options['gestion'], options['formato'], options['lote']):
+                archivo.write(trozo)
+                total += len(trozo)
+        self.stdout.write(self.style.SUCCESS(f'{salida}: {total} bytes'))
@@ -0,0 +1,239 @@
+import random
+import string
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from inscripciones import requisitos
+from inscripciones.autenticacion import invalidar_perfiles
+from inscripciones.dashboard import invalidar_dashboard
+from inscripciones.models import (
+    Calificacion, Carrera, Docente, Estudiante, Grupo, Inscripcion, Materia,
+    MateriaRequisito, RecordAcademico, Usuario
+)
+from inscripciones.versiones import incrementar
+
+
+def _letras(numero, cantidad):
+    """Codifica un número en `cantidad` letras mayúsculas (AAA, AAB, ...)"""
+    letras = []
+    for _ in range(cantidad):
+        numero, resto = divmod(numero, 26)
+        letras.append(string.ascii_uppercase[resto])
+    return ''.join(reversed(letras))
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera un conjunto de datos sintético y determinista (carreras, materias con '
+        'requisitos, docentes, grupos por gestión, estudiantes con historial de notas) '
+        'usando inserciones masivas'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--carreras', type=int, default=5)
+        parser.add_argument('--niveles', type=int, default=10)
+        parser.add_argument('--materias-por-nivel', type=int, default=6)
+        parser.add_argument('--docentes', type=int, default=200)
+        parser.add_argument('--grupos-por-materia', type=int, default=2)
+        parser.add_argument('--gestiones', type=int, default=5, help='Gestiones anuales; la última es la actual')
+        parser.add_argument('--desde', type=int, default=2021, help='Año inicial de la primera gestión')
+        parser.add_argument('--estudiantes', type=int, default=20000)
+        parser.add_argument('--cupo', type=int, default=40)
+        parser.add_argument('--password', default='clave12345', help='Contraseña de todos los usuarios generados')
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--lote', type=int, default=5000, help='Tamaño de lote para bulk_create')
+
+    def handle(self, *args, **options):
+        if Carrera.objects.filter(nombre__startswith='Carrera sintética').exists():
+            raise CommandError('Ya existen datos sintéticos en la base de datos')
+
+        if options['niveles'] * options['materias_por_nivel'] > 1000:
+            raise CommandError('Las siglas admiten como máximo 1000 materias por carrera')
+        if not 2000 <= options['desde'] <= 2099 - options['gestiones']:
+            raise CommandError('Las gestiones deben quedar entre 2000 y 2099')
+        if options['estudiantes'] > 26 * 26 * 10000:
+            raise CommandError('Las matrículas admiten como máximo 6760000 estudiantes')
+
+        self.rnd = random.Random(options['semilla'])
+        self.lote = options['lote']
+        self.password = make_password(options['password'])
+        gestiones = [
+            f"{anio}-{anio + 1}" for anio in range(options['desde'], options['desde'] + options['gestiones'])
+        ]
+
+        with transaction.atomic():
+            carreras = self.crear_carreras(options)
+            materias = self.crear_materias(carreras, options)
+            self.crear_requisitos(materias, options)
+            docentes = self.crear_docentes(options)
+            grupos = self.crear_grupos(materias, docentes, gestiones, options)
+            estudiantes = self.crear_estudiantes(carreras, gestiones, options)
+            self.crear_historial(estudiantes, grupos, gestiones, options)
+
+            # Los contadores y los records se calculan una vez al final
+            conteo = (
+                Inscripcion.objects.filter(grupo=OuterRef('pk'))
+                .values('grupo')
+                .annotate(total=Count('id'))
+                .values('total')
+            )
+            Grupo.objects.update(inscritos=Coalesce(Subquery(conteo), 0))
+            Grupo.objects.filter(inscritos__gt=F('cupo')).update(cupo=F('inscritos'))
+            RecordAcademico.objects.all().recalcular()
+
+        # bulk_create no dispara las señales que invalidan las cachés
+        requisitos.invalidar()
+        invalidar_dashboard()
+        incrementar(Carrera, Materia, MateriaRequisito, Grupo, Docente, Usuario)
+        invalidar_perfiles()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(carreras)} carreras, {sum(len(m) for m in materias.values())} materias, "
+            f"{len(docentes)} docentes, {sum(len(g) for g in grupos.values())} grupos, {len(estudiantes)} estudiantes, "
+            f"{Inscripcion.objects.count()} inscripciones, {Calificacion.objects.count()} calificaciones"
+        ))
+
+    def crear_carreras(self, options):
+        return Carrera.objects.bulk_create([
+            Carrera(nombre=f'Carrera sintética {i + 1}', duracion=options['niveles'])
+            for i in range(options['carreras'])
+        ])
+
+    def crear_materias(self, carreras, options):
+        """Materias por carrera y nivel: {(carrera_id, nivel): [materias]}"""
+        nuevas = []
+        for c, carrera in enumerate(carreras):
+            prefijo = _letras(c, 3)
+            numero = 0
+            for nivel in range(1, options['niveles'] + 1):
+                for k in range(options['materias_por_nivel']):
+                    nuevas.append(Materia(
+                        nombre=f'Materia {prefijo}{nivel}-{k + 1}',
+                        sigla=f'{prefijo}{numero:03d}',
+                        creditos=self.rnd.choice([3, 4, 5, 6]),
+                        horas_academicas=self.rnd.choice([60, 80, 100]),
+                        nivel=nivel,
+                        carrera=carrera,
+                    ))
+                    numero += 1
+        materias = {}
+        for materia in Materia.objects.bulk_create(nuevas, batch_size=self.lote):
+            materias.setdefault((materia.carrera_id, materia.nivel), []).append(materia)
+        return materias
+
+    def crear_requisitos(self, materias, options):
+        requisitos = []
+        for (carrera_id, nivel), del_nivel in materias.items():
+            if nivel == 1:
+                continue
+            anteriores = materias[(carrera_id, nivel - 1)]
+            for materia in del_nivel:
+                for requisito in self.rnd.sample(anteriores, min(len(anteriores), self.rnd.randint(1, 2))):
+                    requisitos.append(MateriaRequisito(materia=materia, requisito=requisito))
+        MateriaRequisito.objects.bulk_create(requisitos, batch_size=self.lote)
+
+    def crear_usuarios(self, prefijo, rol, cantidad, inicio_ci):
+        return Usuario.objects.bulk_create([
+            Usuario(
+                email=f'{prefijo}{i}@sintetico.edu',
+                password=self.password,
+                rol=rol,
+                ci=str(inicio_ci + i),
+                first_name=f'Nombre{i}',
+                last_name=f'Apellido{self.rnd.randint(1, 999)}',
+            )
+            for i in range(cantidad)
+        ], batch_size=self.lote)
+
+    def crear_docentes(self, options):
+        usuarios = self.crear_usuarios('docente', Usuario.Rol.DOCENTE, options['docentes'], 90_000_000)
+        return Docente.objects.bulk_create([
+            Docente(
+                usuario=usuario,
+                titulo=self.rnd.choice(['Lic.', 'Ing.', 'M.Sc.', 'Ph.D.']),
+                especialidad='Sintética',
+                fecha_contratacion=date(2010 + self.rnd.randint(0, 10), 1, 1),
+            )
+            for usuario in usuarios
+        ], batch_size=self.lote)
+
+    def crear_grupos(self, materias, docentes, gestiones, options):
+        """Grupos por gestión: {(gestion, materia_id): [grupos]}"""
+        nuevos = []
+        for gestion in gestiones:
+            for del_nivel in materias.values():
+                for materia in del_nivel:
+                    for p in range(options['grupos_por_materia']):
+                        nuevos.append(Grupo(
+                            materia=materia,
+                            docente=self.rnd.choice(docentes),
+                            paralelo=string.ascii_uppercase[p],
+                            gestion=gestion,
+                            modalidad=self.rnd.choice(['presencial', 'virtual', 'hibrido']),
+                            cupo=options['cupo'],
+                        ))
+        grupos = {}
+        for grupo in Grupo.objects.bulk_create(nuevos, batch_size=self.lote):
+            grupos.setdefault((grupo.gestion, grupo.materia_id), []).append(grupo)
+        return grupos
+
+    def crear_estudiantes(self, carreras, gestiones, options):
+        usuarios = self.crear_usuarios('estudiante', Usuario.Rol.ESTUDIANTE, options['estudiantes'], 10_000_000)
+        estudiantes = Estudiante.objects.bulk_create([
+            Estudiante(
+                usuario=usuario,
+                matricula=f'{_letras(i // 10000, 2)}{i % 10000:04d}',
+                carrera=self.rnd.choice(carreras),
+                fecha_ingreso=date(int(self.rnd.choice(gestiones)[:4]), 2, 1),
+            )
+            for i, usuario in enumerate(usuarios)
+        ], batch_size=self.lote)
+        # bulk_create no dispara la señal que crea el record
+        RecordAcademico.objects.bulk_create(
+            [RecordAcademico(estudiante=estudiante) for estudiante in estudiantes],
+            batch_size=self.lote
+        )
+        return estudiantes
+
+    def crear_historial(self, estudiantes, grupos, gestiones, options):
+        """Cada gestión desde el ingreso el estudiante cursa el nivel siguiente.
+
+        Las gestiones cerradas dejan inscripción y calificación; la actual (la
+        última) está a mitad de inscripciones: solo la mitad de los estudiantes
+        ya se inscribió, así que quedan plazas libres.
+        """
+        materias_por_nivel = {}
+        for (gestion, materia_id), del_grupo in grupos.items():
+            materia = del_grupo[0].materia
+            materias_por_nivel.setdefault((materia.carrera_id, materia.nivel), set()).add(materia_id)
+
+        inscripciones, calificaciones = [], []
+        actual = gestiones[-1]
+        for estudiante in estudiantes:
+            inicio = gestiones.index(f'{estudiante.fecha_ingreso.year}-{estudiante.fecha_ingreso.year + 1}')
+            for nivel, gestion in enumerate(gestiones[inicio:], start=1):
+                if gestion == actual and self.rnd.random() < 0.5:
+                    break
+                for materia_id in sorted(materias_por_nivel.get((estudiante.carrera_id, nivel), ())):
+                    grupo = self.rnd.choice(grupos[(gestion, materia_id)])
+                    inscripciones.append(Inscripcion(estudiante=estudiante, grupo=grupo))
+                    if gestion != actual:
+                        nota = Decimal(self.rnd.randint(3000, 9999)) / 100
+                        calificaciones.append(Calificacion(
+                            estudiante=estudiante, grupo=grupo, nota=nota,
+                            resultado=Calificacion.resultado_para(nota),
+                        ))
+            if len(inscripciones) >= self.lote:
+                self.guardar_historial(inscripciones, calificaciones)
+                inscripciones, calificaciones = [], []
+        self.guardar_historial(inscripciones, calificaciones)
+
+    def guardar_historial(self, inscripciones, calificaciones):
+        Inscripcion.objects.bulk_create(inscripciones, batch_size=self.lote)
+        Calificacion.objects.bulk_create(calificaciones, batch_size=self.lote)
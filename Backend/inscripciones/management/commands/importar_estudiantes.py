@@ -0,0 +1,42 @@
+import csv
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from inscripciones.importacion import COLUMNAS, importar_estudiantes
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa estudiantes desde un CSV con las columnas: ' + ', '.join(COLUMNAS) +
+        ' (carrera por id o nombre, fecha_ingreso en formato AAAA-MM-DD)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo')
+        parser.add_argument('--lote', type=int, default=1000, help='Filas por lote de validación e inserción')
+        parser.add_argument('--procesos', type=int, help='Procesos para hashear contraseñas (por defecto, uno por CPU)')
+        parser.add_argument('--errores', help='CSV donde guardar las filas rechazadas con su motivo')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['archivo'], encoding='utf-8-sig', newline='') as archivo:
+                resultado = importar_estudiantes(archivo, options['lote'], options['procesos'])
+        except ValidationError as e:
+            raise CommandError(' '.join(e.messages))
+
+        for error in resultado['errores'][:20]:
+            self.stdout.write(f"Línea {error['linea']}: {error['errores']}")
+        if len(resultado['errores']) > 20:
+            self.stdout.write(f"... y {len(resultado['errores']) - 20} filas más con errores")
+        if options['errores']:
+            with open(options['errores'], 'w', encoding='utf-8', newline='') as salida:
+                escritor = csv.writer(salida)
+                escritor.writerow(['linea', 'campo', 'error'])
+                for error in resultado['errores']:
+                    for campo, mensajes in error['errores'].items():
+                        escritor.writerow([error['linea'], campo, ' '.join(mensajes)])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado['creados']} estudiantes creados, {len(resultado['errores'])} filas con errores"
+        ))
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from inscripciones.services import promover_pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        'Worker de las listas de espera: inscribe por orden de llegada a los que esperan '
+        'en grupos con plazas libres (inscripciones eliminadas o cupo aumentado)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--intervalo', type=float, default=2.0, help='Segundos entre revisiones')
+        parser.add_argument('--una-vez', action='store_true', help='Revisar una sola vez y terminar (cron)')
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                inscripciones = promover_pendientes()
+                for inscripcion in inscripciones:
+                    self.stdout.write(
+                        f'Estudiante {inscripcion.estudiante_id} inscrito en el grupo {inscripcion.grupo_id}'
+                    )
+                if options['una_vez']:
+                    self.stdout.write(self.style.SUCCESS(f'{len(inscripciones)} estudiantes promovidos'))
+                    return
+                # Un worker de larga vida no debe quedarse con conexiones caídas o vencidas
+                close_old_connections()
+                time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            self.stdout.write('Worker detenido')
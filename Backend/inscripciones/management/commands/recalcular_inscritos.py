@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from inscripciones.models import Grupo, Inscripcion, InscripcionHistorica
+
+
+def _conteo(modelo):
+    conteo = (
+        modelo.objects.filter(grupo=OuterRef('pk'))
+        .values('grupo')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    return Coalesce(Subquery(conteo), 0)
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye y verifica el contador Grupo.inscritos a partir de las inscripciones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verificar',
+            action='store_true',
+            help='Solo informa los grupos con el contador desfasado, sin corregirlos',
+        )
+
+    def handle(self, *args, **options):
+        # Los grupos de gestiones archivadas cuentan sus inscripciones históricas
+        real = _conteo(Inscripcion) + _conteo(InscripcionHistorica)
+        desfasados = list(
+            Grupo.objects.annotate(real=real)
+            .exclude(inscritos=F('real'))
+            .values('id', 'inscritos', 'real')
+        )
+        for grupo in desfasados:
+            self.stdout.write(
+                f"Grupo {grupo['id']}: inscritos={grupo['inscritos']} real={grupo['real']}"
+            )
+
+        if options['verificar']:
+            if desfasados:
+                raise CommandError(f'{len(desfasados)} grupos con el contador desfasado')
+            self.stdout.write(self.style.SUCCESS('Todos los contadores están al día'))
+            return
+
+        actualizados = Grupo.objects.update(inscritos=real)
+        self.stdout.write(self.style.SUCCESS(
+            f'{actualizados} grupos recalculados, {len(desfasados)} estaban desfasados'
+        ))
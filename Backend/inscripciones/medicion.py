@@ -0,0 +1,95 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class Medicion:
+    """execute_wrapper que cuenta las consultas y acumula el tiempo en la base de datos"""
+
+    def __init__(self):
+        self.consultas = 0
+        self.tiempo = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.consultas += 1
+            self.tiempo += time.perf_counter() - inicio
+
+
+class PresupuestoExcedido(AssertionError):
+    pass
+
+
+class PresupuestoConsultasMixin:
+    """Mide cada petición de la vista y la compara con su presupuesto de consultas.
+
+    `presupuesto_consultas` asocia la acción del viewset (o el método HTTP en
+    un APIView) con el máximo de consultas permitido en el peor caso: perfil
+    del usuario fuera de caché y, en los listados, todos los filtros (cada
+    filtro por FK valida el id con una consulta).
+    Las acciones de escritura se miden igual; al borrar, cada fila que cae en
+    cascada y tiene receptor post_delete suma consultas, así que destroy se
+    presupuesta para un registro sin dependientes y una advertencia señala
+    los borrados en cascada grandes.
+    La respuesta lleva X-Consultas-DB y X-Tiempo-DB-ms; si se pasa del
+    presupuesto se registra una advertencia y se agrega X-Presupuesto-Consultas.
+    En las respuestas en streaming se cuentan también las consultas hechas
+    mientras se envía el contenido, y se comparan al terminar.
+    Con PRESUPUESTO_CONSULTAS_ESTRICTO (activo en las pruebas) se lanza
+    PresupuestoExcedido: cualquier prueba que pase por la vista lo detecta.
+    """
+
+    presupuesto_consultas = {}
+
+    def dispatch(self, request, *args, **kwargs):
+        medicion = Medicion()
+        with connection.execute_wrapper(medicion):
+            response = super().dispatch(request, *args, **kwargs)
+        accion = getattr(self, 'action', None) or request.method.lower()
+        if response.streaming:
+            # Las consultas del contenido se hacen mientras se envía: se miden
+            # hasta el final y ya no pueden ir en las cabeceras
+            response.streaming_content = self._medir_contenido(
+                response.streaming_content, medicion, request, accion
+            )
+            return response
+
+        response['X-Consultas-DB'] = str(medicion.consultas)
+        response['X-Tiempo-DB-ms'] = f'{medicion.tiempo * 1000:.2f}'
+        presupuesto = self._comparar_presupuesto(medicion, request, accion)
+        if presupuesto is not None:
+            response['X-Presupuesto-Consultas'] = str(presupuesto)
+        return response
+
+    def _medir_contenido(self, contenido, medicion, request, accion):
+        contenido = iter(contenido)
+        while True:
+            with connection.execute_wrapper(medicion):
+                parte = next(contenido, None)
+            if parte is None:
+                break
+            yield parte
+        self._comparar_presupuesto(medicion, request, accion)
+
+    def _comparar_presupuesto(self, medicion, request, accion):
+        """Devuelve el presupuesto si se excedió; en modo estricto lanza PresupuestoExcedido"""
+        presupuesto = self.presupuesto_consultas.get(accion)
+        if presupuesto is None or medicion.consultas <= presupuesto:
+            return None
+        if getattr(settings, 'PRESUPUESTO_CONSULTAS_ESTRICTO', False):
+            raise PresupuestoExcedido(
+                f'{type(self).__name__}.{accion} hizo {medicion.consultas} consultas '
+                f'(presupuesto {presupuesto}): {request.path}'
+            )
+        logger.warning(
+            '%s.%s hizo %d consultas (presupuesto %d): %s',
+            type(self).__name__, accion, medicion.consultas, presupuesto, request.path
+        )
+        return presupuesto
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-18 06:51
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def contar_inscritos(apps, schema_editor):
+    Grupo = apps.get_model('inscripciones', 'Grupo')
+    Inscripcion = apps.get_model('inscripciones', 'Inscripcion')
+    conteo = (
+        Inscripcion.objects.filter(grupo=OuterRef('pk'))
+        .values('grupo')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    Grupo.objects.update(inscritos=Coalesce(Subquery(conteo), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inscripciones', '0002_alter_usuario_managers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='grupo',
+            name='inscritos',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(contar_inscritos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.1 on 2026-10-18 06:52
+
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import migrations, models
+
+LOTE = 1000
+
+
+def recalcular_records(apps, schema_editor):
+    """Reconstruye los records con una agregación agrupada por estudiante y
+    UPDATEs por lotes, redondeando como RecordAcademico.calcular_promedio"""
+    RecordAcademico = apps.get_model('inscripciones', 'RecordAcademico')
+    Calificacion = apps.get_model('inscripciones', 'Calificacion')
+    aprobado = models.Q(resultado='Aprobado')
+    stats = {
+        fila['estudiante_id']: fila
+        for fila in Calificacion.objects.order_by().values('estudiante_id').annotate(
+            aprobadas=models.Count('id', filter=aprobado),
+            reprobadas=models.Count('id', filter=~aprobado),
+            creditos=models.Sum('grupo__materia__creditos', filter=aprobado),
+            suma=models.Sum(
+                models.F('nota') * models.F('grupo__materia__creditos'),
+                filter=aprobado,
+                output_field=models.DecimalField(max_digits=10, decimal_places=2)
+            ),
+        )
+    }
+    vacio = {'aprobadas': 0, 'reprobadas': 0, 'creditos': None, 'suma': None}
+    records = []
+    for record in RecordAcademico.objects.only('id', 'estudiante_id').iterator():
+        fila = stats.get(record.estudiante_id, vacio)
+        record.materias_aprobadas = fila['aprobadas']
+        record.materias_reprobadas = fila['reprobadas']
+        record.total_creditos = fila['creditos'] or 0
+        record.suma_ponderada = Decimal(fila['suma'] or 0)
+        record.promedio_general = (
+            (record.suma_ponderada / record.total_creditos).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+            if record.total_creditos else Decimal('0.00')
+        )
+        records.append(record)
+    RecordAcademico.objects.bulk_update(
+        records,
+        ['materias_aprobadas', 'materias_reprobadas', 'total_creditos', 'suma_ponderada', 'promedio_general'],
+        batch_size=LOTE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inscripciones', '0003_grupo_inscritos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recordacademico',
+            name='suma_ponderada',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.RunPython(recalcular_records, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inscripciones', '0004_recordacademico_suma_ponderada'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='inscripcion',
+            name='fecha_inscripcion',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inscripciones', '0005_inscripcion_fecha_inscripcion_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='calificacion',
+            name='estudiante',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='calificaciones', to='inscripciones.estudiante'),
+        ),
+        migrations.AlterField(
+            model_name='inscripcion',
+            name='estudiante',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='inscripciones', to='inscripciones.estudiante'),
+        ),
+        migrations.AlterField(
+            model_name='inscripcion',
+            name='grupo',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='inscripciones', to='inscripciones.grupo'),
+        ),
+        migrations.AddIndex(
+            model_name='calificacion',
+            index=models.Index(condition=models.Q(('resultado', 'Aprobado')), fields=['estudiante', 'grupo'], name='calificacion_aprobada_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grupo',
+            index=models.Index(fields=['gestion', 'materia'], name='grupo_gestion_materia_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inscripcion',
+            index=models.Index(fields=['grupo', 'estudiante'], name='inscripcion_grupo_est_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inscripciones', '0006_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListaEspera',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('turno', models.PositiveIntegerField()),
+                ('fecha_solicitud', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Listas de espera',
+            },
+        ),
+        migrations.AddField(
+            model_name='grupo',
+            name='espera_atendidos',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='grupo',
+            name='espera_emitidos',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='grupo',
+            index=models.Index(condition=models.Q(('espera_emitidos__gt', models.F('espera_atendidos'))), fields=['id'], name='grupo_con_espera_idx'),
+        ),
+        migrations.AddField(
+            model_name='listaespera',
+            name='estudiante',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='esperas', to='inscripciones.estudiante'),
+        ),
+        migrations.AddField(
+            model_name='listaespera',
+            name='grupo',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='lista_espera', to='inscripciones.grupo'),
+        ),
+        migrations.AddIndex(
+            model_name='listaespera',
+            index=models.Index(fields=['grupo', 'turno'], name='espera_grupo_turno_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='listaespera',
+            unique_together={('estudiante', 'grupo')},
+        ),
+    ]
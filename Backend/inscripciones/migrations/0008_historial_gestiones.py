@@ -0,0 +1,57 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inscripciones', '0007_lista_espera'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GestionArchivada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gestion', models.CharField(max_length=10, unique=True)),
+                ('fecha_archivo', models.DateTimeField(auto_now=True)),
+                ('inscripciones', models.PositiveIntegerField(default=0)),
+                ('calificaciones', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Gestiones archivadas',
+            },
+        ),
+        migrations.CreateModel(
+            name='CalificacionHistorica',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('gestion', models.CharField(db_index=True, max_length=10)),
+                ('nota', models.DecimalField(decimal_places=2, max_digits=4)),
+                ('resultado', models.CharField(choices=[('Aprobado', 'Aprobado'), ('Reprobado', 'Reprobado')], max_length=20)),
+                ('estudiante', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='calificaciones_historicas', to='inscripciones.estudiante')),
+                ('grupo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='calificaciones_historicas', to='inscripciones.grupo')),
+            ],
+            options={
+                'verbose_name_plural': 'Calificaciones históricas',
+                'indexes': [models.Index(condition=models.Q(('resultado', 'Aprobado')), fields=['estudiante', 'grupo'], name='calif_historica_aprobada_idx')],
+                'unique_together': {('estudiante', 'grupo')},
+            },
+        ),
+        migrations.CreateModel(
+            name='InscripcionHistorica',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('gestion', models.CharField(db_index=True, max_length=10)),
+                ('fecha_inscripcion', models.DateTimeField()),
+                ('estudiante', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='inscripciones_historicas', to='inscripciones.estudiante')),
+                ('grupo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inscripciones_historicas', to='inscripciones.grupo')),
+            ],
+            options={
+                'verbose_name_plural': 'Inscripciones históricas',
+                'unique_together': {('estudiante', 'grupo')},
+            },
+        ),
+    ]
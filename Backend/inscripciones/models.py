@@ -1,5 +1,8 @@
+from decimal import ROUND_HALF_UP, Decimal
+
 from django.contrib.auth.models import AbstractUser, BaseUserManager
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce, NullIf
 from django.core.validators import RegexValidator, MinValueValidator, MaxValueValidator
 
 class UsuarioManager(BaseUserManager):
@@ -18,6 +21,10 @@ class UsuarioManager(BaseUserManager):
         extra_fields.setdefault('is_active', True)
         return self.create_user(email, password, **extra_fields)
 
+    def get_by_natural_key(self, email):
+        # El login lee el perfil para los claims del token en la misma consulta
+        return self.select_related('estudiante', 'docente').get(email=email)
+
 class Usuario(AbstractUser):
     class Rol(models.TextChoices):
         ESTUDIANTE = 'estudiante', 'Estudiante'
@@ -99,6 +106,21 @@ class MateriaRequisito(models.Model):
     def __str__(self):
         return f"{self.requisito} es requisito de {self.materia}"
 
+    def clean(self):
+        from django.core.exceptions import ValidationError
+        from .requisitos import CicloRequisitos, indice_para
+
+        if not (self.materia_id and self.requisito_id):
+            return
+        try:
+            indice = indice_para(self.materia.carrera_id)
+        except CicloRequisitos as e:
+            raise ValidationError(f"Los requisitos guardados ya tienen un ciclo; corríjalo primero. {e}")
+        if indice.crea_ciclo(self.materia_id, self.requisito_id):
+            raise ValidationError(
+                f"{self.requisito.nombre} no puede ser requisito de {self.materia.nombre}: se formaría un ciclo."
+            )
+
 # 3. Modelos de personas mejorados
 class Estudiante(models.Model):
     usuario = models.OneToOneField(
@@ -124,31 +146,17 @@ class Estudiante(models.Model):
     fecha_ingreso = models.DateField()
     
     def actualizar_record(self):
-        """Actualiza automáticamente el record académico del estudiante"""
-        from django.db.models import Count, Sum, Avg
-        from django.db.models.functions import Coalesce
-        
-        # Obtener todas las calificaciones del estudiante
-        calificaciones = self.calificaciones.all()
-        
-        # Calcular estadísticas
-        stats = calificaciones.aggregate(
-            total_aprobadas=Count('id', filter=models.Q(resultado='Aprobado')),
-            total_reprobadas=Count('id', filter=models.Q(resultado='Reprobado')),
-            total_creditos=Sum('grupo__materia__creditos', filter=models.Q(resultado='Aprobado')),
-            promedio=Coalesce(Avg('nota', filter=models.Q(resultado='Aprobado')), 0.0)
-        )
-        
-        # Actualizar o crear el record
-        record, created = RecordAcademico.objects.update_or_create(
-            estudiante=self,
-            defaults={
-                'materias_aprobadas': stats['total_aprobadas'],
-                'materias_reprobadas': stats['total_reprobadas'],
-                'total_creditos': stats['total_creditos'] or 0,
-                'promedio_general': stats['promedio']
-            }
+        """Recalcula desde cero el record académico del estudiante"""
+        self.record.actualizar()
+
+    def materias_aprobadas(self):
+        """ids de las materias aprobadas, también en gestiones archivadas, en una sola consulta"""
+        aprobada = models.Q(resultado=Calificacion.Resultado.APROBADO)
+        return self.calificaciones.filter(aprobada).values_list('grupo__materia_id', flat=True).union(
+            self.calificaciones_historicas.filter(aprobada).values_list('grupo__materia_id', flat=True),
+            all=True
         )
+
     def __str__(self):
         return f"{self.matricula} - {self.usuario.get_full_name()}"
 
@@ -196,39 +204,139 @@ class Grupo(models.Model):
         ]
     )
     cupo = models.PositiveSmallIntegerField(default=30)
+    inscritos = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False  # Se mantiene al inscribir y al eliminar inscripciones
+    )
+    # Lista de espera: último turno entregado y turnos que ya salieron por el
+    # frente de la cola. La posición de cada entrada es turno - espera_atendidos
+    espera_emitidos = models.PositiveIntegerField(default=0, editable=False)
+    espera_atendidos = models.PositiveIntegerField(default=0, editable=False)
+
+    # Solo se modifican con UPDATE atómicos
+    CONTADORES = ('inscritos', 'espera_emitidos', 'espera_atendidos')
     
     class Meta:
         unique_together = ('materia', 'paralelo', 'gestion')
+        indexes = [
+            # Listados, exportaciones y dashboard filtran o agrupan por gestión
+            models.Index(fields=['gestion', 'materia'], name='grupo_gestion_materia_idx'),
+            # El worker de la lista de espera solo recorre los grupos con cola
+            models.Index(
+                fields=['id'], name='grupo_con_espera_idx',
+                condition=models.Q(espera_emitidos__gt=models.F('espera_atendidos'))
+            ),
+        ]
     
     def __str__(self):
         return f"{self.materia} - {self.paralelo} ({self.gestion})"
 
+    def save(self, *args, **kwargs):
+        # Al editar un grupo no se pisan los contadores que otra transacción
+        # pudo cambiar desde que se leyó
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                campo.name for campo in self._meta.concrete_fields
+                if not campo.primary_key and campo.name not in self.CONTADORES
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def cupo_disponible(self):
+        return self.cupo - self.inscritos
+
+    def reservar_plaza(self, respetar_cola=False):
+        """Ocupa una plaza con un UPDATE condicional; devuelve False si el grupo está lleno.
+
+        Con respetar_cola tampoco se ocupa si hay estudiantes en la lista de espera.
+        """
+        condicion = models.Q(pk=self.pk, inscritos__lt=models.F('cupo'))
+        if respetar_cola:
+            condicion &= models.Q(espera_emitidos__lte=models.F('espera_atendidos'))
+        return bool(Grupo.objects.filter(condicion).update(inscritos=models.F('inscritos') + 1))
+
+    def liberar_plaza(self):
+        Grupo.objects.filter(pk=self.pk, inscritos__gt=0).update(
+            inscritos=models.F('inscritos') - 1
+        )
+
 class Inscripcion(models.Model):
+    # Sin índices propios en las FK: la restricción única ya indexa por
+    # estudiante y el índice compuesto por grupo
     estudiante = models.ForeignKey(
         Estudiante,
         on_delete=models.CASCADE,
-        related_name='inscripciones'
+        related_name='inscripciones',
+        db_index=False
     )
     grupo = models.ForeignKey(
         Grupo,
         on_delete=models.CASCADE,
-        related_name='inscripciones'
+        related_name='inscripciones',
+        db_index=False
     )
-    fecha_inscripcion = models.DateTimeField(auto_now_add=True)
+    fecha_inscripcion = models.DateTimeField(auto_now_add=True, db_index=True)
     
     class Meta:
         unique_together = ('estudiante', 'grupo')
         verbose_name_plural = 'Inscripciones'
+        indexes = [
+            # Inscritos de un grupo (planillas, dashboard) sin leer la tabla
+            models.Index(fields=['grupo', 'estudiante'], name='inscripcion_grupo_est_idx'),
+        ]
     
     def __str__(self):
         return f"{self.estudiante} en {self.grupo}"
 
+class ListaEsperaQuerySet(models.QuerySet):
+    def con_posicion(self):
+        """Anota la posición en la cola (1 = la siguiente plaza) sin contar las entradas previas"""
+        return self.annotate(posicion=models.F('turno') - models.F('grupo__espera_atendidos'))
+
+
+class ListaEspera(models.Model):
+    """Estudiante que espera una plaza en un grupo lleno.
+
+    Los turnos de un grupo son correlativos: al salir alguien del medio de la
+    cola se corren los de atrás, y al salir el primero solo avanza
+    Grupo.espera_atendidos.
+    """
+    # La restricción única indexa por estudiante y el índice (grupo, turno) por grupo
+    estudiante = models.ForeignKey(
+        Estudiante,
+        on_delete=models.CASCADE,
+        related_name='esperas',
+        db_index=False
+    )
+    grupo = models.ForeignKey(
+        Grupo,
+        on_delete=models.CASCADE,
+        related_name='lista_espera',
+        db_index=False
+    )
+    turno = models.PositiveIntegerField()
+    fecha_solicitud = models.DateTimeField(auto_now_add=True)
+
+    objects = ListaEsperaQuerySet.as_manager()
+
+    class Meta:
+        unique_together = ('estudiante', 'grupo')
+        verbose_name_plural = 'Listas de espera'
+        indexes = [
+            models.Index(fields=['grupo', 'turno'], name='espera_grupo_turno_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.estudiante} espera {self.grupo} (turno {self.turno})"
+
 # 5. Modelos de notas con señales para actualización automática
 class Calificacion(models.Model):
+    # La restricción única (estudiante, grupo) ya sirve de índice por estudiante
     estudiante = models.ForeignKey(
         Estudiante,
         on_delete=models.CASCADE,
-        related_name='calificaciones'
+        related_name='calificaciones',
+        db_index=False
     )
     grupo = models.ForeignKey(
         Grupo,
@@ -254,18 +362,91 @@ class Calificacion(models.Model):
     class Meta:
         unique_together = ('estudiante', 'grupo')
         verbose_name_plural = 'Calificaciones'
+        indexes = [
+            # Materias aprobadas del estudiante (requisitos, grupos disponibles)
+            models.Index(
+                fields=['estudiante', 'grupo'], name='calificacion_aprobada_idx',
+                condition=models.Q(resultado='Aprobado')
+            ),
+        ]
     
+    @classmethod
+    def resultado_para(cls, nota):
+        return cls.Resultado.APROBADO if nota >= 60 else cls.Resultado.REPROBADO
+
     def save(self, *args, **kwargs):
         # Calcula automáticamente el resultado
-        self.resultado = self.Resultado.APROBADO if self.nota >= 60 else self.Resultado.REPROBADO
-        super().save(*args, **kwargs)
-        
-        # Actualiza el record académico del estudiante
-        self.estudiante.actualizar_record()
+        self.resultado = self.resultado_para(self.nota)
+
+        with transaction.atomic():
+            # La fila anterior queda bloqueada hasta confirmar: dos guardados
+            # simultáneos no restan del record la misma nota dos veces
+            # (sin joins, para no bloquear también el grupo y la materia)
+            anterior = None
+            if self.pk:
+                anterior = Calificacion.objects.select_for_update().filter(pk=self.pk).values(
+                    'estudiante_id', 'resultado', 'nota', 'grupo_id'
+                ).first()
+            creditos = Grupo.objects.filter(pk=self.grupo_id).values_list(
+                'materia__creditos', flat=True
+            ).get()
+            super().save(*args, **kwargs)
+            # Aplica al record solo la diferencia entre la nota anterior y la nueva
+            if anterior:
+                creditos_anteriores = creditos if anterior['grupo_id'] == self.grupo_id else (
+                    Grupo.objects.filter(pk=anterior['grupo_id']).values_list('materia__creditos', flat=True).get()
+                )
+                RecordAcademico.aplicar_cambio(
+                    anterior['estudiante_id'],
+                    anterior['resultado'], anterior['nota'], creditos_anteriores,
+                    signo=-1
+                )
+            RecordAcademico.aplicar_cambio(self.estudiante_id, self.resultado, self.nota, creditos)
     
     def __str__(self):
         return f"{self.estudiante} - {self.nota} ({self.resultado})"
 
+class RecordAcademicoQuerySet(models.QuerySet):
+    def recalcular(self):
+        """Recalcula todos los records del queryset con un único UPDATE basado en subconsultas"""
+        aprobado = models.Q(resultado=Calificacion.Resultado.APROBADO)
+
+        def total(expresion, filtro, output_field):
+            # Las calificaciones de gestiones archivadas siguen contando
+            activas, archivadas = [
+                Coalesce(models.Subquery(
+                    modelo.objects.filter(filtro, estudiante=models.OuterRef('estudiante'))
+                    .order_by()
+                    .values('estudiante')
+                    .annotate(total=expresion)
+                    .values('total'),
+                    output_field=output_field
+                ), 0)
+                for modelo in (Calificacion, CalificacionHistorica)
+            ]
+            return models.ExpressionWrapper(activas + archivadas, output_field=output_field)
+
+        decimal = models.DecimalField(max_digits=10, decimal_places=2)
+        creditos = total(models.Sum('grupo__materia__creditos'), aprobado, models.IntegerField())
+        suma = total(
+            models.Sum(models.F('nota') * models.F('grupo__materia__creditos'), output_field=decimal),
+            aprobado, decimal
+        )
+        return self.update(
+            materias_aprobadas=total(models.Count('id'), aprobado, models.IntegerField()),
+            materias_reprobadas=total(models.Count('id'), ~aprobado, models.IntegerField()),
+            total_creditos=creditos,
+            suma_ponderada=suma,
+            promedio_general=Coalesce(
+                models.ExpressionWrapper(
+                    suma * models.Value(Decimal('1.0')) / NullIf(creditos, 0),
+                    output_field=decimal
+                ),
+                models.Value(Decimal('0.00')),
+                output_field=decimal
+            ),
+        )
+
 class RecordAcademico(models.Model):
     estudiante = models.OneToOneField(
         Estudiante,
@@ -280,34 +461,153 @@ class RecordAcademico(models.Model):
         decimal_places=2,
         default=0.00
     )
+    # Suma de nota × créditos de las materias aprobadas; el promedio general
+    # es siempre esta suma ponderada dividida entre total_creditos
+    suma_ponderada = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        editable=False
+    )
+
+    objects = RecordAcademicoQuerySet.as_manager()
     
     def __str__(self):
         return f"Record de {self.estudiante} - Promedio: {self.promedio_general}"
+
+    def calcular_promedio(self):
+        if not self.total_creditos:
+            self.promedio_general = Decimal('0.00')
+        else:
+            self.promedio_general = (
+                Decimal(self.suma_ponderada) / self.total_creditos
+            ).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+    @classmethod
+    def aplicar_cambio(cls, estudiante_id, resultado, nota, creditos, signo=1):
+        """Suma (o resta con signo=-1) el aporte de una calificación al record del estudiante"""
+        with transaction.atomic(savepoint=False):
+            record = cls.objects.select_for_update().filter(estudiante_id=estudiante_id).first()
+            if record is None:
+                return
+            if resultado == Calificacion.Resultado.APROBADO:
+                record.materias_aprobadas += signo
+                record.total_creditos += signo * creditos
+                record.suma_ponderada = Decimal(record.suma_ponderada) + signo * Decimal(nota) * creditos
+            else:
+                record.materias_reprobadas += signo
+            record.calcular_promedio()
+            record.save(update_fields=[
+                'materias_aprobadas', 'materias_reprobadas', 'total_creditos',
+                'suma_ponderada', 'promedio_general'
+            ])
     
     def actualizar(self):
-        calificaciones = self.estudiante.calificaciones.all()
-        aprobadas = calificaciones.filter(resultado=Calificacion.Resultado.APROBADO)
-        
-        self.materias_aprobadas = aprobadas.count()
-        self.materias_reprobadas = calificaciones.count() - self.materias_aprobadas
-        
-        if aprobadas.exists():
-            self.total_creditos = sum(
-                cal.grupo.materia.creditos 
-                for cal in aprobadas
+        aprobado = models.Q(resultado=Calificacion.Resultado.APROBADO)
+        totales = {'aprobadas': 0, 'reprobadas': 0, 'creditos': 0, 'suma': Decimal('0.00')}
+        # Calificaciones activas y de gestiones archivadas
+        for calificaciones in (self.estudiante.calificaciones, self.estudiante.calificaciones_historicas):
+            stats = calificaciones.aggregate(
+                aprobadas=models.Count('id', filter=aprobado),
+                reprobadas=models.Count('id', filter=~aprobado),
+                creditos=models.Sum('grupo__materia__creditos', filter=aprobado),
+                suma=models.Sum(
+                    models.F('nota') * models.F('grupo__materia__creditos'),
+                    filter=aprobado,
+                    output_field=models.DecimalField(max_digits=10, decimal_places=2)
+                ),
             )
-            self.promedio_general = sum(
-                cal.nota * cal.grupo.materia.creditos
-                for cal in aprobadas
-            ) / self.total_creditos
-        else:
-            self.total_creditos = 0
-            self.promedio_general = 0.00
-        
+            for clave, valor in stats.items():
+                totales[clave] += valor or 0
+
+        self.materias_aprobadas = totales['aprobadas']
+        self.materias_reprobadas = totales['reprobadas']
+        self.total_creditos = totales['creditos']
+        self.suma_ponderada = totales['suma']
+        self.calcular_promedio()
         self.save()
 
+# 6. Historial de gestiones archivadas (archivo.py). Son copias de solo
+# lectura: mantienen el id original y no disparan cambios en el record
+class GestionArchivada(models.Model):
+    gestion = models.CharField(max_length=10, unique=True)
+    fecha_archivo = models.DateTimeField(auto_now=True)
+    inscripciones = models.PositiveIntegerField(default=0)
+    calificaciones = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'Gestiones archivadas'
+
+    def __str__(self):
+        return self.gestion
+
+class InscripcionHistorica(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    # La restricción única ya indexa por estudiante
+    estudiante = models.ForeignKey(
+        Estudiante,
+        on_delete=models.CASCADE,
+        related_name='inscripciones_historicas',
+        db_index=False
+    )
+    grupo = models.ForeignKey(
+        Grupo,
+        on_delete=models.CASCADE,
+        related_name='inscripciones_historicas'
+    )
+    # Copia de grupo.gestion: el historial se consulta y exporta por gestión sin join
+    gestion = models.CharField(max_length=10, db_index=True)
+    fecha_inscripcion = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('estudiante', 'grupo')
+        verbose_name_plural = 'Inscripciones históricas'
+
+    def __str__(self):
+        return f"{self.estudiante} en {self.grupo}"
+
+class CalificacionHistorica(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    estudiante = models.ForeignKey(
+        Estudiante,
+        on_delete=models.CASCADE,
+        related_name='calificaciones_historicas',
+        db_index=False
+    )
+    grupo = models.ForeignKey(
+        Grupo,
+        on_delete=models.CASCADE,
+        related_name='calificaciones_historicas'
+    )
+    gestion = models.CharField(max_length=10, db_index=True)
+    nota = models.DecimalField(max_digits=4, decimal_places=2)
+    resultado = models.CharField(max_length=20, choices=Calificacion.Resultado.choices)
+
+    class Meta:
+        unique_together = ('estudiante', 'grupo')
+        verbose_name_plural = 'Calificaciones históricas'
+        indexes = [
+            models.Index(
+                fields=['estudiante', 'grupo'], name='calif_historica_aprobada_idx',
+                condition=models.Q(resultado='Aprobado')
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.estudiante} - {self.nota} ({self.resultado})"
+
+# 7. Versiones del catálogo (versiones.py): una fila por modelo en la base de
+# datos, así todos los procesos ven la misma versión
+class VersionCatalogo(models.Model):
+    modelo = models.CharField(max_length=50, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    fecha = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.modelo} v{self.version}"
+
 # Señales para mantener la integridad de los datos
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
 @receiver(post_save, sender=Estudiante)
@@ -315,12 +615,31 @@ def crear_record_academico(sender, instance, created, **kwargs):
     if created:
         RecordAcademico.objects.create(estudiante=instance)
 
-@receiver(post_save, sender=Calificacion)
-def actualizar_record_despues_calificacion(sender, instance, **kwargs):
-    instance.estudiante.record.actualizar()
+@receiver(post_delete, sender=Inscripcion)
+def liberar_plaza_despues_inscripcion(sender, instance, **kwargs):
+    Grupo(pk=instance.grupo_id).liberar_plaza()
 
-# Método adicional para Estudiante
-def actualizar_record(self):
-    self.record.actualizar()
+@receiver(post_delete, sender=ListaEspera)
+def cerrar_turno_lista_espera(sender, instance, **kwargs):
+    # Quien borra la entrada debe tener bloqueado el grupo (services.salir_de_espera)
+    atendido = Grupo.objects.filter(
+        pk=instance.grupo_id, espera_atendidos=instance.turno - 1
+    ).update(espera_atendidos=models.F('espera_atendidos') + 1)
+    if not atendido:
+        # Salió del medio de la cola: los de atrás avanzan un turno
+        Grupo.objects.filter(pk=instance.grupo_id, espera_emitidos__gt=0).update(
+            espera_emitidos=models.F('espera_emitidos') - 1
+        )
+        ListaEspera.objects.filter(grupo_id=instance.grupo_id, turno__gt=instance.turno).update(
+            turno=models.F('turno') - 1
+        )
 
-Estudiante.actualizar_record = actualizar_record
\ No newline at end of file
+@receiver(post_delete, sender=Calificacion)
+def actualizar_record_despues_eliminar_calificacion(sender, instance, **kwargs):
+    creditos = Materia.objects.filter(grupos=instance.grupo_id).values_list(
+        'creditos', flat=True
+    ).first()
+    if creditos is not None:
+        RecordAcademico.aplicar_cambio(
+            instance.estudiante_id, instance.resultado, instance.nota, creditos, signo=-1
+        )
@@ -0,0 +1,62 @@
+import json
+
+from django.db import connections
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+def total_aproximado(queryset):
+    """Total estimado por el planificador de Postgres; en otros motores se cuenta"""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class PaginacionPorCursor(CursorPagination):
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def __init__(self, ordering):
+        self.ordering = ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.total = None
+        if request.query_params.get('total') == 'aproximado':
+            self.total = total_aproximado(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.total is not None:
+            response.data['total_aproximado'] = self.total
+        return response
+
+
+class PaginacionCursorOpcional(PageNumberPagination):
+    """Paginación por número de página, o por cursor (keyset) si el cliente lo pide.
+
+    Con ?paginacion=cursor (o al seguir un enlace con ?cursor=) cada página es
+    un WHERE sobre el campo de orden indexado en lugar de COUNT(*) + OFFSET,
+    así que la página N cuesta lo mismo que la primera. ?total=aproximado
+    agrega la estimación del planificador en vez de un conteo exacto.
+    La vista define el orden estable con `cursor_ordering` (por defecto '-id').
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor = None
+        params = request.query_params
+        if 'cursor' in params or params.get('paginacion') == 'cursor':
+            self.cursor = PaginacionPorCursor(getattr(view, 'cursor_ordering', '-id'))
+            return self.cursor.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor is not None:
+            return self.cursor.get_paginated_response(data)
+        return super().get_paginated_response(data)
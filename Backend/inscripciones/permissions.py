@@ -1,25 +1,37 @@
 from rest_framework import permissions
 
+from .autenticacion import perfil_id
+
 class IsAdminOrReadOnly(permissions.BasePermission):
     def has_permission(self, request, view):
         if request.method in permissions.SAFE_METHODS:
             return True
         return request.user.is_staff
 
+class IsEstudiante(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and request.user.rol == 'estudiante'
+
 class IsAdminOrSelf(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.user.is_staff:
             return True
-        return obj.usuario == request.user
+        return obj.usuario_id == request.user.pk
+
+class IsAdminOrDocenteDelGrupo(permissions.BasePermission):
+    def has_object_permission(self, request, view, obj):
+        if request.user.is_staff:
+            return True
+        return obj.docente.usuario_id == request.user.id
 
 class IsAdminOrDocenteOrSelf(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.user.is_staff:
             return True
-        if hasattr(request.user, 'docente'):
+        if perfil_id(request.user, 'docente') is not None:
             return True
         if hasattr(obj, 'estudiante'):
-            return obj.estudiante.usuario == request.user
+            return obj.estudiante.usuario_id == request.user.pk
         if hasattr(obj, 'usuario'):
-            return obj.usuario == request.user
+            return obj.usuario_id == request.user.pk
         return False
\ No newline at end of file
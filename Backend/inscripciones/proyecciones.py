@@ -0,0 +1,124 @@
+from django.db.models import F, Value
+from django.db.models.expressions import Combinable
+from django.db.models.functions import Concat
+from rest_framework.response import Response
+
+
+class Proyeccion:
+    """Lectura rápida de un listado con .values() en lugar de instancias y ModelSerializer.
+
+    Cada campo de salida se asocia con un campo del modelo (mismo nombre), una
+    ruta o expresión, otra Proyeccion para los objetos anidados, o una tupla
+    (origen, conversión) cuando el serializer formatea el valor (fechas).
+    El orden de los campos es el del serializer para que el JSON sea idéntico.
+    """
+
+    def __init__(self, **campos):
+        self.campos = campos
+        self.columnas = {}
+        self._plan = self._compilar('', self.columnas)
+
+    def _compilar(self, prefijo, columnas):
+        plan = []
+        for nombre, origen in self.campos.items():
+            conversion = None
+            if isinstance(origen, tuple):
+                origen, conversion = origen
+            if isinstance(origen, Proyeccion):
+                plan.append((nombre, origen._compilar(f'{prefijo}{nombre}_', columnas), None))
+                continue
+            if not prefijo and origen == nombre:
+                # Campo propio del modelo: .values() lo devuelve con su nombre
+                clave = nombre
+            else:
+                clave = f'_{prefijo}{nombre}'
+                origen = origen if isinstance(origen, Combinable) else F(origen)
+            columnas[clave] = origen
+            plan.append((nombre, clave, conversion))
+        return plan
+
+    def consulta(self, queryset, *extra):
+        """Queryset de diccionarios; `extra` agrega campos que necesita la paginación"""
+        simples = [clave for clave, origen in self.columnas.items() if origen == clave]
+        expresiones = {clave: origen for clave, origen in self.columnas.items() if origen != clave}
+        return queryset.values(*simples, *[c for c in extra if c not in simples], **expresiones)
+
+    def armar(self, filas):
+        plan = self._plan
+        return [_armar(plan, fila) for fila in filas]
+
+
+def _armar(plan, fila):
+    resultado = {}
+    for nombre, clave, conversion in plan:
+        if isinstance(clave, list):
+            resultado[nombre] = _armar(clave, fila)
+            continue
+        valor = fila[clave]
+        if conversion is not None and valor is not None:
+            valor = conversion(valor)
+        resultado[nombre] = valor
+    return resultado
+
+
+def _nombre_completo(usuario):
+    return Concat(F(f'{usuario}__first_name'), Value(' '), F(f'{usuario}__last_name'))
+
+
+def _isoformat(valor):
+    return valor.isoformat()
+
+
+class ListaProyectadaMixin:
+    """Sirve `list` desde `proyeccion` con los mismos filtros y paginación de la vista"""
+
+    proyeccion = None
+
+    def list(self, request, *args, **kwargs):
+        if self.proyeccion is None:
+            return super().list(request, *args, **kwargs)
+        return self.listar_proyeccion(self.filter_queryset(self.get_queryset()))
+
+    def listar_proyeccion(self, queryset, proyeccion=None):
+        proyeccion = proyeccion or self.proyeccion
+        orden = getattr(self, 'cursor_ordering', '-id').lstrip('-')
+        filas = proyeccion.consulta(queryset, orden)
+        page = self.paginate_queryset(filas)
+        if page is not None:
+            return self.get_paginated_response(proyeccion.armar(page))
+        return Response(proyeccion.armar(filas))
+
+
+# Mismos campos y en el mismo orden que los serializers correspondientes
+
+MATERIAS = Proyeccion(
+    id='id', nombre='nombre', sigla='sigla', creditos='creditos',
+    horas_academicas='horas_academicas', nivel='nivel', carrera='carrera',
+    carrera_nombre='carrera__nombre',
+)
+
+GRUPOS = Proyeccion(
+    id='id', materia='materia', materia_nombre='materia__nombre',
+    docente='docente', docente_nombre=_nombre_completo('docente__usuario'),
+    paralelo='paralelo', gestion='gestion', modalidad='modalidad', cupo='cupo',
+)
+
+# GrupoCupoSerializer: grupos/disponibles no usa ETag y muestra los cupos del momento
+GRUPOS_CON_CUPO = Proyeccion(**GRUPOS.campos, cupo_disponible=F('cupo') - F('inscritos'))
+
+INSCRIPCIONES = Proyeccion(
+    id='id', estudiante='estudiante', grupo='grupo',
+    materia_nombre='grupo__materia__nombre', grupo_paralelo='grupo__paralelo',
+    grupo_gestion='grupo__gestion', docente_nombre=_nombre_completo('grupo__docente__usuario'),
+)
+
+ESTUDIANTES = Proyeccion(
+    id='id',
+    usuario=Proyeccion(
+        id='usuario_id', email='usuario__email', first_name='usuario__first_name',
+        last_name='usuario__last_name', ci='usuario__ci', telefono='usuario__telefono',
+        direccion='usuario__direccion', rol='usuario__rol', is_active='usuario__is_active',
+    ),
+    matricula='matricula', carrera='carrera', carrera_nombre='carrera__nombre',
+    fecha_ingreso=('fecha_ingreso', _isoformat),
+)
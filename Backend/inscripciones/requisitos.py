@@ -0,0 +1,101 @@
+import threading
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Materia, MateriaRequisito
+from .versiones import versiones
+
+# El índice compilado vive en memoria del proceso. Antes de usarlo se compara
+# con la versión de materias y requisitos en la base de datos (una consulta
+# por clave primaria): un cambio hecho en otro proceso se ve en la siguiente
+# petición, sin depender de que la caché de Django sea compartida.
+_MODELOS = (MateriaRequisito, Materia)
+_indices = {}
+_lock = threading.Lock()
+
+
+class CicloRequisitos(Exception):
+    def __init__(self, ciclo):
+        self.ciclo = ciclo
+        super().__init__(
+            'Los requisitos forman un ciclo: ' + ' -> '.join(str(m) for m in ciclo)
+        )
+
+
+class IndiceRequisitos:
+    """Grafo de requisitos de una carrera con su cierre transitivo precalculado"""
+
+    def __init__(self, aristas):
+        directos = defaultdict(set)
+        for materia_id, requisito_id in aristas:
+            directos[materia_id].add(requisito_id)
+        self.directos = {materia: frozenset(reqs) for materia, reqs in directos.items()}
+        self.transitivos = self._cerrar()
+
+    def _cerrar(self):
+        transitivos = {}
+        en_curso = []
+
+        def visitar(materia):
+            if materia in transitivos:
+                return transitivos[materia]
+            if materia in en_curso:
+                raise CicloRequisitos(en_curso[en_curso.index(materia):] + [materia])
+            en_curso.append(materia)
+            todos = set()
+            for requisito in self.directos.get(materia, ()):
+                todos.add(requisito)
+                todos |= visitar(requisito)
+            en_curso.pop()
+            transitivos[materia] = frozenset(todos)
+            return transitivos[materia]
+
+        for materia in self.directos:
+            visitar(materia)
+        return transitivos
+
+    def requisitos(self, materia_id):
+        return self.directos.get(materia_id, frozenset())
+
+    def todos_los_requisitos(self, materia_id):
+        return self.transitivos.get(materia_id, frozenset())
+
+    def faltantes(self, materia_id, aprobadas):
+        return self.requisitos(materia_id) - set(aprobadas)
+
+    def crea_ciclo(self, materia_id, requisito_id):
+        return materia_id == requisito_id or materia_id in self.todos_los_requisitos(requisito_id)
+
+
+def indice_para(carrera_id):
+    """Devuelve el índice de la carrera, compilándolo solo si cambió algún requisito"""
+    numeros, fecha = versiones(_MODELOS)
+    version = (*numeros, fecha)
+    guardado = _indices.get(carrera_id)
+    if guardado and guardado[0] == version:
+        return guardado[1]
+    with _lock:
+        aristas = MateriaRequisito.objects.filter(
+            materia__carrera_id=carrera_id
+        ).values_list('materia_id', 'requisito_id')
+        indice = IndiceRequisitos(aristas)
+        _indices[carrera_id] = (version, indice)
+    return indice
+
+
+def invalidar():
+    """Descarta los índices de este proceso; los demás lo notan por la versión en la base"""
+    _indices.clear()
+
+
+@receiver(post_save, sender=MateriaRequisito)
+@receiver(post_delete, sender=MateriaRequisito)
+@receiver(post_save, sender=Materia)
+def invalidar_requisitos(sender, **kwargs):
+    # Se invalida ya para esta transacción y de nuevo al confirmar, por si otro
+    # hilo recompiló el índice con los datos anteriores entre tanto
+    invalidar()
+    transaction.on_commit(invalidar)
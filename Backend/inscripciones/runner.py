@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class PresupuestoTestRunner(DiscoverRunner):
+    """Runner de `manage.py test`: una vista que se pasa de su presupuesto de
+    consultas (PresupuestoConsultasMixin) hace fallar la prueba"""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.PRESUPUESTO_CONSULTAS_ESTRICTO = True
+
+    def teardown_test_environment(self, **kwargs):
+        del settings.PRESUPUESTO_CONSULTAS_ESTRICTO
+        super().teardown_test_environment(**kwargs)
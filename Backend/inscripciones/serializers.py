@@ -1,14 +1,28 @@
 from rest_framework import serializers
 from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError as DjangoValidationError
 from .models import *
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from .accesos import registrar_acceso
+from .autenticacion import perfil_id
+from rest_framework_simplejwt.serializers import TokenObtainSerializer
+from rest_framework_simplejwt.tokens import RefreshToken
+
+class CustomTokenObtainPairSerializer(TokenObtainSerializer):
+    """Login: firma un solo par de tokens y deja last_login para el registro por lotes"""
+    token_class = RefreshToken
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        # Claims para identificar al usuario sin consultar su perfil en cada petición
+        token['rol'] = user.rol
+        token['estudiante_id'] = perfil_id(user, 'estudiante')
+        token['docente_id'] = perfil_id(user, 'docente')
+        return token
 
-class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     def validate(self, attrs):
         data = super().validate(attrs)
         refresh = self.get_token(self.user)
-        
-        # Add custom claims
         data['refresh'] = str(refresh)
         data['access'] = str(refresh.access_token)
         data['user'] = {
@@ -18,6 +32,7 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             'first_name': self.user.first_name,
             'last_name': self.user.last_name
         }
+        registrar_acceso(self.user.pk)
         return data
 
 class UsuarioSerializer(serializers.ModelSerializer):
@@ -60,6 +75,17 @@ class MateriaRequisitoSerializer(serializers.ModelSerializer):
         model = MateriaRequisito
         fields = ['id', 'materia', 'materia_nombre', 'requisito', 'requisito_nombre']
 
+    def validate(self, data):
+        requisito = MateriaRequisito(
+            materia=data.get('materia', getattr(self.instance, 'materia', None)),
+            requisito=data.get('requisito', getattr(self.instance, 'requisito', None))
+        )
+        try:
+            requisito.clean()
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
+        return data
+
 class DocenteSerializer(serializers.ModelSerializer):
     usuario = UsuarioSerializer(read_only=True)
     usuario_id = serializers.PrimaryKeyRelatedField(
@@ -91,22 +117,30 @@ class EstudianteSerializer(serializers.ModelSerializer):
 class GrupoSerializer(serializers.ModelSerializer):
     materia_nombre = serializers.CharField(source='materia.nombre', read_only=True)
     docente_nombre = serializers.SerializerMethodField()
-    cupo_disponible = serializers.SerializerMethodField()
 
+    # Sin cupo_disponible: cambia con cada inscripción y el catálogo se valida
+    # con ETag; los cupos se consultan en /api/grupos/disponibles/
     class Meta:
         model = Grupo
         fields = [
             'id', 'materia', 'materia_nombre', 'docente', 'docente_nombre',
-            'paralelo', 'gestion', 'modalidad', 'cupo', 'cupo_disponible'
+            'paralelo', 'gestion', 'modalidad', 'cupo'
         ]
 
     def get_docente_nombre(self, obj):
         return f"{obj.docente.usuario.first_name} {obj.docente.usuario.last_name}"
 
-    def get_cupo_disponible(self, obj):
-        return obj.cupo - obj.inscripciones.count()
+class GrupoCupoSerializer(GrupoSerializer):
+    cupo_disponible = serializers.IntegerField(read_only=True)
+
+    class Meta(GrupoSerializer.Meta):
+        fields = GrupoSerializer.Meta.fields + ['cupo_disponible']
 
 class InscripcionSerializer(serializers.ModelSerializer):
+    # La respuesta incluye materia y docente del grupo elegido
+    grupo = serializers.PrimaryKeyRelatedField(
+        queryset=Grupo.objects.select_related('materia', 'docente__usuario')
+    )
     materia_nombre = serializers.CharField(source='grupo.materia.nombre', read_only=True)
     grupo_paralelo = serializers.CharField(source='grupo.paralelo', read_only=True)
     grupo_gestion = serializers.CharField(source='grupo.gestion', read_only=True)
@@ -120,6 +154,28 @@ class InscripcionSerializer(serializers.ModelSerializer):
     def get_docente_nombre(self, obj):
         return f"{obj.grupo.docente.usuario.first_name} {obj.grupo.docente.usuario.last_name}"
 
+class InscripcionCarritoSerializer(serializers.Serializer):
+    grupos = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=12
+    )
+
+class ListaEsperaSerializer(serializers.ModelSerializer):
+    materia_nombre = serializers.CharField(source='grupo.materia.nombre', read_only=True)
+    grupo_paralelo = serializers.CharField(source='grupo.paralelo', read_only=True)
+    grupo_gestion = serializers.CharField(source='grupo.gestion', read_only=True)
+    posicion = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = ListaEspera
+        fields = ['id', 'estudiante', 'grupo', 'materia_nombre', 'grupo_paralelo', 'grupo_gestion', 'posicion', 'fecha_solicitud']
+        read_only_fields = fields
+
+class SeguimientoInscripcionSerializer(InscripcionSerializer):
+    nota = serializers.DecimalField(max_digits=4, decimal_places=2, read_only=True, allow_null=True)
+
+    class Meta(InscripcionSerializer.Meta):
+        fields = InscripcionSerializer.Meta.fields + ['nota']
+
 class CalificacionSerializer(serializers.ModelSerializer):
     estudiante_nombre = serializers.CharField(source='estudiante.usuario.get_full_name', read_only=True)
     materia_nombre = serializers.CharField(source='grupo.materia.nombre', read_only=True)
@@ -131,6 +187,29 @@ class CalificacionSerializer(serializers.ModelSerializer):
             'nota', 'resultado'
         ]
 
+class InscripcionHistoricaSerializer(serializers.ModelSerializer):
+    materia_nombre = serializers.CharField(source='grupo.materia.nombre', read_only=True)
+    grupo_paralelo = serializers.CharField(source='grupo.paralelo', read_only=True)
+
+    class Meta:
+        model = InscripcionHistorica
+        fields = ['id', 'estudiante', 'grupo', 'gestion', 'materia_nombre', 'grupo_paralelo', 'fecha_inscripcion']
+
+class CalificacionHistoricaSerializer(serializers.ModelSerializer):
+    estudiante_nombre = serializers.CharField(source='estudiante.usuario.get_full_name', read_only=True)
+    materia_nombre = serializers.CharField(source='grupo.materia.nombre', read_only=True)
+
+    class Meta:
+        model = CalificacionHistorica
+        fields = [
+            'id', 'estudiante', 'estudiante_nombre', 'grupo', 'gestion', 'materia_nombre',
+            'nota', 'resultado'
+        ]
+
+class CalificacionMasivaSerializer(serializers.Serializer):
+    estudiante = serializers.IntegerField()
+    nota = serializers.DecimalField(max_digits=4, decimal_places=2, min_value=0, max_value=100)
+
 class RecordAcademicoSerializer(serializers.ModelSerializer):
     estudiante_nombre = serializers.CharField(source='estudiante.usuario.get_full_name', read_only=True)
     carrera_nombre = serializers.CharField(source='estudiante.carrera.nombre', read_only=True)
@@ -142,24 +221,3 @@ class RecordAcademicoSerializer(serializers.ModelSerializer):
             'materias_aprobadas', 'materias_reprobadas', 'total_creditos', 'promedio_general'
         ]
 
-    def validate(self, data):
-        estudiante = data['estudiante']
-        materia = data['materia']
-
-        # 1. Verificar si el estudiante ya está inscrito en la materia
-        if Inscripcion.objects.filter(estudiante=estudiante, materia=materia).exists():
-            raise serializers.ValidationError("Ya estás inscrito en esta materia.")
-
-        # 2. Validar prerrequisitos
-        requisitos = MateriaRequisito.objects.filter(materia=materia)
-        for req in requisitos:
-            if not Calificacion.objects.filter(
-                estudiante=estudiante,
-                grupo__materia=req.requisito,
-                resultado='Aprobado'
-            ).exists():
-                raise serializers.ValidationError(
-                    f"No cumple el requisito: {req.requisito.nombre}"
-                )
-
-        return data
\ No newline at end of file
@@ -0,0 +1,326 @@
+import logging
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max
+from rest_framework.exceptions import APIException, ValidationError
+
+from .models import Calificacion, Grupo, Inscripcion, ListaEspera, RecordAcademico
+from .requisitos import CicloRequisitos, indice_para
+
+logger = logging.getLogger(__name__)
+
+
+class CupoLleno(APIException):
+    status_code = 409
+    default_detail = 'Cupo lleno: el grupo no tiene plazas disponibles.'
+    default_code = 'cupo_lleno'
+
+
+class RequisitosInconsistentes(APIException):
+    status_code = 503
+    default_detail = (
+        'Los requisitos de la carrera forman un ciclo: la inscripción no está disponible hasta que se corrijan.'
+    )
+    default_code = 'requisitos_inconsistentes'
+
+
+def _indice(carrera_id):
+    # Un ciclo guardado antes de validar en clean() (admin, cargas masivas)
+    # no debe terminar en un 500 en cada inscripción de la carrera
+    try:
+        return indice_para(carrera_id)
+    except CicloRequisitos as e:
+        logger.error('Requisitos de la carrera %s: %s', carrera_id, e)
+        raise RequisitosInconsistentes()
+
+
+def verificar_requisitos(estudiante, grupo):
+    # Requisitos desde el índice en memoria; solo se consultan las aprobadas
+    indice = _indice(grupo.materia.carrera_id)
+    materias_aprobadas = estudiante.materias_aprobadas()
+
+    # Verificar si faltan requisitos
+    if indice.faltantes(grupo.materia_id, materias_aprobadas):
+        raise ValidationError("No cumple con los requisitos para inscribirse en esta materia.")
+
+
+def inscribir(estudiante, grupo, respetar_cola=True):
+    """Inscribe al estudiante en el grupo reservando una plaza de forma atómica.
+
+    Si el grupo tiene lista de espera las plazas libres son de la cola y se
+    responde CupoLleno; solo promover_lista_espera pasa respetar_cola=False.
+    """
+    verificar_requisitos(estudiante, grupo)
+
+    with transaction.atomic():
+        # Un único UPDATE condicional sobre el contador del grupo: la fila
+        # queda bloqueada solo durante esta transacción y nunca se supera el
+        # cupo. La cola se mira en el mismo UPDATE, no en la instancia, que
+        # puede venir desactualizada.
+        if not grupo.reservar_plaza(respetar_cola=respetar_cola):
+            raise CupoLleno()
+        try:
+            with transaction.atomic():
+                return Inscripcion.objects.create(estudiante=estudiante, grupo=grupo)
+        except IntegrityError:
+            raise ValidationError("Ya estás inscrito en este grupo.")
+
+
+def inscribir_carrito(estudiante, grupo_ids):
+    """Inscribe al estudiante en todos los grupos del carrito o en ninguno.
+
+    Las validaciones usan las mismas consultas sea cual sea el tamaño del
+    carrito: grupos (bloqueados hasta confirmar), materias aprobadas e
+    inscripciones de las gestiones del carrito; los requisitos salen del
+    índice en memoria de cada carrera. Si algún grupo no pasa se devuelve el error en la
+    misma posición del carrito y no se inscribe ninguno.
+    """
+    with transaction.atomic():
+        # Bloqueo en orden de id para que dos carritos no se esperen en círculo
+        grupos = {
+            grupo.pk: grupo
+            for grupo in Grupo.objects.select_for_update(of=('self',))
+            .select_related('materia', 'docente__usuario')
+            .filter(pk__in=grupo_ids).order_by('pk')
+        }
+        aprobadas = set(estudiante.materias_aprobadas())
+        inscritas = set(
+            estudiante.inscripciones.filter(grupo__gestion__in={g.gestion for g in grupos.values()})
+            .values_list('grupo__gestion', 'grupo__materia_id')
+        )
+
+        # Un índice por carrera: cada indice_para consulta la versión en la base
+        indices = {
+            carrera_id: _indice(carrera_id)
+            for carrera_id in {grupo.materia.carrera_id for grupo in grupos.values()}
+        }
+
+        errores = []
+        en_carrito = set()
+        vistos = set()
+        for grupo_id in grupo_ids:
+            grupo = grupos.get(grupo_id)
+            error = None
+            if grupo is None:
+                error = 'El grupo no existe.'
+            elif grupo_id in vistos:
+                error = 'El grupo está repetido en el carrito.'
+            elif (grupo.gestion, grupo.materia_id) in en_carrito:
+                error = 'Otro grupo del carrito es de la misma materia.'
+            elif (grupo.gestion, grupo.materia_id) in inscritas:
+                error = 'Ya estás inscrito en esta materia en la gestión.'
+            elif grupo.materia_id in aprobadas:
+                error = 'Ya aprobaste esta materia.'
+            elif indices[grupo.materia.carrera_id].faltantes(grupo.materia_id, aprobadas):
+                error = 'No cumple con los requisitos para inscribirse en esta materia.'
+            elif grupo.inscritos >= grupo.cupo or grupo.espera_emitidos > grupo.espera_atendidos:
+                error = CupoLleno.default_detail
+            vistos.add(grupo_id)
+            if grupo is not None:
+                en_carrito.add((grupo.gestion, grupo.materia_id))
+            errores.append([error] if error else [])
+        if any(errores):
+            raise ValidationError({'grupos': errores})
+
+        # Con los grupos bloqueados el UPDATE no puede encontrar uno lleno
+        Grupo.objects.filter(pk__in=grupo_ids).update(inscritos=F('inscritos') + 1)
+        inscripciones = Inscripcion.objects.bulk_create([
+            Inscripcion(estudiante=estudiante, grupo=grupos[grupo_id]) for grupo_id in grupo_ids
+        ])
+    return inscripciones
+
+
+def inscribir_o_esperar(estudiante, grupo):
+    """Inscribe al estudiante o, si el grupo está lleno o ya tiene cola, lo pone en la lista de espera.
+
+    Devuelve la Inscripcion o la entrada de ListaEspera con su posición.
+    """
+    try:
+        return inscribir(estudiante, grupo)
+    except CupoLleno:
+        # Lleno o con gente esperando: los requisitos ya se verificaron
+        return encolar(estudiante, grupo)
+
+
+def encolar(estudiante, grupo):
+    """Agrega al estudiante al final de la lista de espera del grupo"""
+    if Inscripcion.objects.filter(estudiante=estudiante, grupo=grupo).exists():
+        raise ValidationError("Ya estás inscrito en este grupo.")
+    try:
+        with transaction.atomic():
+            # El UPDATE bloquea el grupo hasta confirmar: los turnos no se repiten
+            Grupo.objects.filter(pk=grupo.pk).update(espera_emitidos=F('espera_emitidos') + 1)
+            emitidos, atendidos = Grupo.objects.filter(pk=grupo.pk).values_list(
+                'espera_emitidos', 'espera_atendidos'
+            ).get()
+            entrada = ListaEspera.objects.create(estudiante=estudiante, grupo=grupo, turno=emitidos)
+    except IntegrityError:
+        raise ValidationError("Ya estás en la lista de espera de este grupo.")
+    entrada.posicion = emitidos - atendidos
+    return entrada
+
+
+def salir_de_espera(entrada):
+    """Quita la entrada de la cola; los que estaban detrás avanzan un turno"""
+    with transaction.atomic():
+        Grupo.objects.select_for_update().only('pk').get(pk=entrada.grupo_id)
+        # Se borra con el turno vigente: pudo correrse antes de bloquear el grupo
+        ListaEspera.objects.filter(pk=entrada.pk).delete()
+
+
+def promover_lista_espera(grupo_id):
+    """Inscribe por orden de llegada a los que esperan mientras el grupo tenga plazas.
+
+    Quien ya no cumple los requisitos o ya está inscrito pierde el turno y
+    se pasa al siguiente. Devuelve las inscripciones creadas.
+    """
+    inscripciones = []
+    while True:
+        with transaction.atomic():
+            grupo = Grupo.objects.select_for_update().select_related('materia').get(pk=grupo_id)
+            if grupo.inscritos >= grupo.cupo:
+                break
+            entrada = grupo.lista_espera.select_related('estudiante').order_by('turno').first()
+            if entrada is None:
+                break
+            pk = entrada.pk
+            try:
+                with transaction.atomic():
+                    entrada.delete()
+                    inscripciones.append(inscribir(entrada.estudiante, grupo, respetar_cola=False))
+            except CupoLleno:
+                break
+            except ValidationError as e:
+                logger.info('Lista de espera del grupo %s: se descarta la entrada %s (%s)', grupo_id, pk, e.detail)
+                ListaEspera.objects.filter(pk=pk).delete()
+    return inscripciones
+
+
+def promover_pendientes():
+    """Atiende las colas de todos los grupos con plazas libres; devuelve las inscripciones creadas"""
+    grupos = Grupo.objects.filter(
+        espera_emitidos__gt=F('espera_atendidos'), inscritos__lt=F('cupo')
+    ).values_list('pk', flat=True)
+    inscripciones = []
+    for grupo_id in list(grupos):
+        try:
+            inscripciones += promover_lista_espera(grupo_id)
+        except RequisitosInconsistentes:
+            # Ya quedó registrado; la cola espera a que se corrijan los requisitos
+            continue
+    return inscripciones
+
+
+def grupos_disponibles(estudiante, gestion=None, incluir_llenos=False):
+    """Grupos de la gestión en los que el estudiante puede inscribirse.
+
+    Se resuelve con consultas de conjunto: materias aprobadas, materias ya
+    inscritas en la gestión y un único filtro sobre Grupo; los requisitos
+    salen del índice en memoria. Sin gestión se usa la más reciente. Con
+    incluir_llenos también van los grupos sin plazas, donde inscribirse
+    significa entrar a la lista de espera.
+    """
+    if gestion is None:
+        gestion = Grupo.objects.aggregate(ultima=Max('gestion'))['ultima']
+
+    aprobadas = set(estudiante.materias_aprobadas())
+    inscritas = set(
+        estudiante.inscripciones.filter(grupo__gestion=gestion)
+        .values_list('grupo__materia_id', flat=True)
+    )
+    indice = _indice(estudiante.carrera_id)
+    bloqueadas = {
+        materia for materia, requisitos in indice.directos.items()
+        if requisitos - aprobadas
+    }
+
+    grupos = Grupo.objects.select_related('materia', 'docente__usuario').filter(
+        gestion=gestion, materia__carrera_id=estudiante.carrera_id
+    )
+    if not incluir_llenos:
+        grupos = grupos.filter(inscritos__lt=F('cupo'))
+    return (
+        grupos
+        .exclude(materia_id__in=aprobadas | inscritas | bloqueadas)
+        .order_by('materia__nivel', 'materia__nombre', 'paralelo')
+    )
+
+
+def cambiar_grupo(inscripcion, grupo):
+    """Mueve la inscripción a otro grupo trasladando también la plaza ocupada.
+
+    Pasa por los mismos controles que una inscripción nueva: requisitos y,
+    si el grupo destino tiene lista de espera, sus plazas son de la cola.
+    """
+    if grupo.pk == inscripcion.grupo_id:
+        return inscripcion
+    verificar_requisitos(inscripcion.estudiante, grupo)
+    if grupo.espera_emitidos > grupo.espera_atendidos:
+        raise CupoLleno('El grupo tiene lista de espera: las plazas que se liberen son de quienes esperan.')
+    with transaction.atomic():
+        # La condición se repite en el UPDATE por si alguien entró a la cola entre tanto
+        if not grupo.reservar_plaza(respetar_cola=True):
+            raise CupoLleno()
+        anterior = inscripcion.grupo
+        inscripcion.grupo = grupo
+        try:
+            with transaction.atomic():
+                inscripcion.save(update_fields=['grupo'])
+        except IntegrityError:
+            raise ValidationError("Ya estás inscrito en este grupo.")
+        anterior.liberar_plaza()
+    return inscripcion
+
+
+def registrar_calificaciones(grupo, filas):
+    """Registra la planilla de notas de un grupo en una sola transacción.
+
+    Las filas ya vienen validadas por CalificacionMasivaSerializer; si alguna
+    no corresponde a un estudiante inscrito en el grupo no se guarda ninguna
+    y se devuelve el error en la misma posición de la fila.
+    """
+    ids = [fila['estudiante'] for fila in filas]
+    inscritos = set(
+        Inscripcion.objects.filter(grupo=grupo, estudiante_id__in=ids)
+        .values_list('estudiante_id', flat=True)
+    )
+
+    errores = []
+    vistos = set()
+    for fila in filas:
+        error = {}
+        if fila['estudiante'] in vistos:
+            error['estudiante'] = ['El estudiante está repetido en la planilla.']
+        elif fila['estudiante'] not in inscritos:
+            error['estudiante'] = ['El estudiante no está inscrito en este grupo.']
+        vistos.add(fila['estudiante'])
+        errores.append(error)
+    if any(errores):
+        raise ValidationError(errores)
+
+    with transaction.atomic():
+        existentes = {
+            calificacion.estudiante_id: calificacion
+            for calificacion in Calificacion.objects.select_for_update().filter(
+                grupo=grupo, estudiante_id__in=ids
+            )
+        }
+        nuevas, modificadas = [], []
+        for fila in filas:
+            resultado = Calificacion.resultado_para(fila['nota'])
+            calificacion = existentes.get(fila['estudiante'])
+            if calificacion is None:
+                nuevas.append(Calificacion(
+                    estudiante_id=fila['estudiante'], grupo=grupo,
+                    nota=fila['nota'], resultado=resultado
+                ))
+            else:
+                calificacion.nota = fila['nota']
+                calificacion.resultado = resultado
+                modificadas.append(calificacion)
+
+        Calificacion.objects.bulk_create(nuevas)
+        Calificacion.objects.bulk_update(modificadas, ['nota', 'resultado'])
+        RecordAcademico.objects.filter(estudiante_id__in=ids).recalcular()
+
+    return {'creadas': len(nuevas), 'actualizadas': len(modificadas)}
@@ -1,3 +1,1710 @@
-from django.test import TestCase
+import csv
+import importlib
+import gzip
+import json
+import os
+import tempfile
+import zipfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO, StringIO
+from unittest import mock
+from xml.etree import ElementTree
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import F, QuerySet
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from .accesos import guardar_accesos
+from .autenticacion import PerfilCache, UsuarioToken, perfil_de, perfiles
+from .chatbot import ChatbotOcupado, _Limite, normalizar, respuestas
+from .intenciones import RESPUESTAS, clasificar
+from .medicion import PresupuestoConsultasMixin, PresupuestoExcedido
+from .dashboard import DASHBOARD_CACHE_KEY, datos_dashboard
+from .exportacion import filas_exportacion
+from .models import *
+from .permissions import IsAdminOrDocenteOrSelf
+from .renderers import CompresionMiddleware, ORJSONParser, ORJSONRenderer
+from .requisitos import CicloRequisitos, IndiceRequisitos, indice_para, invalidar
+from .serializers import GrupoCupoSerializer
+from .services import CupoLleno, cambiar_grupo, encolar, grupos_disponibles, inscribir, promover_pendientes
+from .urls import router
+from .versiones import incrementar
+from .views import (
+    CalificacionViewSet, CarreraViewSet, ChatbotEstadisticasAPIView, DashboardAPIView, DocenteViewSet,
+    EstudianteViewSet, ExportacionAPIView, GrupoViewSet, InscripcionViewSet, ListaEsperaViewSet,
+    MateriaRequisitoViewSet, MateriaViewSet, UsuarioViewSet
+)
+from .views_auth import CustomTokenObtainPairView
+
+
+def tearDownModule():
+    # Los logins de las pruebas dejan last_login pendiente; se guarda antes de borrar la base
+    guardar_accesos()
+
+
+def crear_usuario(email, rol, ci):
+    return Usuario.objects.create_user(
+        email=email, rol=rol, ci=ci, first_name='Nombre', last_name='Apellido'
+    )
+
+
+def crear_grupo(cupo=30, sigla='INF110', paralelo='A', gestion='2025-2026', carrera=None):
+    carrera = carrera or Carrera.objects.create(nombre=f'Carrera {sigla}', duracion=10)
+    materia = Materia.objects.create(
+        nombre=f'Materia {sigla}', sigla=sigla, creditos=5,
+        horas_academicas=80, nivel=1, carrera=carrera
+    )
+    docente = Docente.objects.create(
+        usuario=crear_usuario(f'docente.{sigla.lower()}@test.com', Usuario.Rol.DOCENTE, f'D-{sigla}'),
+        titulo='Ing.', especialidad='Sistemas', fecha_contratacion=date(2020, 1, 1)
+    )
+    return Grupo.objects.create(
+        materia=materia, docente=docente, paralelo=paralelo,
+        gestion=gestion, modalidad='presencial', cupo=cupo
+    )
+
+
+def crear_estudiantes(carrera, cantidad, inicio=0):
+    estudiantes = []
+    for i in range(inicio, inicio + cantidad):
+        usuario = crear_usuario(f'est{i}@test.com', Usuario.Rol.ESTUDIANTE, f'E-{i}')
+        estudiantes.append(Estudiante.objects.create(
+            usuario=usuario, matricula=f'ES{i:04d}', carrera=carrera,
+            fecha_ingreso=date(2024, 2, 1)
+        ))
+    return estudiantes
+
+
+def crear_dataset(carreras=2, materias=6, estudiantes=15):
+    """Datos de tamaño realista para medir consultas: varias páginas por endpoint"""
+    grupos = []
+    for c in range(carreras):
+        carrera = Carrera.objects.create(nombre=f'Carrera {c}', duracion=10)
+        anterior = None
+        for m in range(materias):
+            grupo = crear_grupo(sigla=f'{"ABCDEFGH"[c]}X{m:03d}', carrera=carrera)
+            Grupo.objects.create(
+                materia=grupo.materia, docente=grupo.docente, paralelo='B',
+                gestion=grupo.gestion, modalidad='virtual'
+            )
+            if anterior:
+                MateriaRequisito.objects.create(materia=grupo.materia, requisito=anterior.materia)
+            anterior = grupo
+            grupos.append(grupo)
+        for estudiante in crear_estudiantes(carrera, estudiantes, inicio=c * estudiantes):
+            for grupo in grupos[-materias:][:3]:
+                Inscripcion.objects.create(estudiante=estudiante, grupo=grupo)
+                Calificacion.objects.create(estudiante=estudiante, grupo=grupo, nota=Decimal('70'))
+    return grupos
+
+
+class InscripcionCupoTests(TestCase):
+    def setUp(self):
+        self.grupo = crear_grupo(cupo=1)
+        self.estudiantes = crear_estudiantes(self.grupo.materia.carrera, 2)
+
+    def test_grupo_lleno_pasa_a_lista_espera(self):
+        inscribir(self.estudiantes[0], self.grupo)
+        client = APIClient()
+        client.force_authenticate(self.estudiantes[1].usuario)
+        response = client.post('/api/inscripciones/', {'grupo': self.grupo.id}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['posicion'], 1)
+        self.assertFalse(Inscripcion.objects.filter(estudiante=self.estudiantes[1]).exists())
+
+    def test_inscripcion_duplicada(self):
+        self.grupo.cupo = 5
+        self.grupo.save()
+        inscribir(self.estudiantes[0], self.grupo)
+        client = APIClient()
+        client.force_authenticate(self.estudiantes[0].usuario)
+        response = client.post('/api/inscripciones/', {'grupo': self.grupo.id}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class ContadorInscritosTests(TestCase):
+    def setUp(self):
+        self.grupo = crear_grupo(cupo=10)
+        self.estudiantes = crear_estudiantes(self.grupo.materia.carrera, 3)
+
+    def test_contador_sigue_altas_y_bajas(self):
+        inscripciones = [inscribir(e, self.grupo) for e in self.estudiantes]
+        self.grupo.refresh_from_db()
+        self.assertEqual(self.grupo.inscritos, 3)
+        inscripciones[0].delete()
+        self.grupo.refresh_from_db()
+        self.assertEqual(self.grupo.cupo_disponible, 8)
+
+    def test_recalcular_inscritos(self):
+        inscribir(self.estudiantes[0], self.grupo)
+        Grupo.objects.filter(pk=self.grupo.pk).update(inscritos=7)
+        with self.assertRaises(CommandError):
+            call_command('recalcular_inscritos', verificar=True, stdout=StringIO())
+        call_command('recalcular_inscritos', stdout=StringIO())
+        self.grupo.refresh_from_db()
+        self.assertEqual(self.grupo.inscritos, 1)
+
+    def test_listado_de_grupos_consultas_constantes(self):
+        client = APIClient()
+        client.force_authenticate(self.estudiantes[0].usuario)
+        # Versiones del catálogo, total y página
+        with self.assertNumQueries(3):
+            client.get('/api/grupos/')
+        for i in range(15):
+            crear_grupo(sigla=f'MAT{i:03d}')
+        with self.assertNumQueries(3):
+            response = client.get('/api/grupos/')
+        self.assertEqual(response.data['count'], 16)
+
+
+class ListaEsperaTests(TestCase):
+    def setUp(self):
+        self.grupo = crear_grupo(cupo=1)
+        self.estudiantes = crear_estudiantes(self.grupo.materia.carrera, 5)
+        self.inscripcion = inscribir(self.estudiantes[0], self.grupo)
+        self.esperas = [encolar(e, self.grupo) for e in self.estudiantes[1:]]
+
+    def posiciones(self):
+        return dict(
+            ListaEspera.objects.con_posicion().filter(grupo=self.grupo)
+            .values_list('estudiante_id', 'posicion')
+        )
+
+    def test_posicion_con_una_busqueda(self):
+        self.assertEqual([e.posicion for e in self.esperas], [1, 2, 3, 4])
+        client = APIClient()
+        client.force_authenticate(self.estudiantes[3].usuario)
+        with self.assertNumQueries(1):
+            response = client.get(f'/api/lista-espera/{self.esperas[2].pk}/')
+        self.assertEqual(response.data['posicion'], 3)
+        # Cada estudiante solo ve sus propias entradas
+        self.assertEqual(client.get(f'/api/lista-espera/{self.esperas[0].pk}/').status_code, 404)
+
+    def test_salir_de_la_cola_corre_los_turnos(self):
+        client = APIClient()
+        client.force_authenticate(self.estudiantes[2].usuario)
+        response = client.delete(f'/api/lista-espera/{self.esperas[1].pk}/')
+        self.assertEqual(response.status_code, 204)
+        e = self.estudiantes
+        self.assertEqual(self.posiciones(), {e[1].pk: 1, e[3].pk: 2, e[4].pk: 3})
+        self.assertEqual(encolar(e[2], self.grupo).posicion, 4)
+
+    def test_baja_promueve_al_primero(self):
+        self.inscripcion.delete()
+        # Hasta que pase el worker la plaza libre es de la cola
+        client = APIClient()
+        client.force_authenticate(self.estudiantes[0].usuario)
+        response = client.post('/api/inscripciones/', {'grupo': self.grupo.id}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['posicion'], 5)
+
+        salida = StringIO()
+        call_command('procesar_lista_espera', una_vez=True, stdout=salida)
+        self.assertIn('1 estudiantes promovidos', salida.getvalue())
+        self.assertTrue(Inscripcion.objects.filter(estudiante=self.estudiantes[1], grupo=self.grupo).exists())
+        e = self.estudiantes
+        self.assertEqual(self.posiciones(), {e[2].pk: 1, e[3].pk: 2, e[4].pk: 3, e[0].pk: 4})
+
+    def test_inscripcion_directa_no_se_adelanta_a_la_cola(self):
+        self.inscripcion.delete()
+        # Plaza libre y cola con cuatro estudiantes; self.grupo no ve la cola
+        otro = crear_estudiantes(self.grupo.materia.carrera, 1, inicio=10)[0]
+        self.assertRaises(CupoLleno, inscribir, otro, self.grupo)
+        client = APIClient()
+        client.force_authenticate(otro.usuario)
+        response = client.post('/api/inscripciones/', {'grupo': self.grupo.id}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['posicion'], 5)
+        self.grupo.refresh_from_db()
+        self.assertEqual(self.grupo.inscritos, 0)
+
+    def test_cambio_de_grupo_no_se_adelanta_a_la_cola(self):
+        self.inscripcion.delete()
+        otro = crear_grupo(sigla='INF120', carrera=self.grupo.materia.carrera)
+        inscripcion = inscribir(self.estudiantes[0], otro)
+        # self.grupo no ve la cola: la frena el UPDATE condicional
+        with self.assertRaises(CupoLleno):
+            cambiar_grupo(inscripcion, self.grupo)
+        self.grupo.refresh_from_db()
+        with self.assertRaises(CupoLleno):
+            cambiar_grupo(inscripcion, self.grupo)
+        self.grupo.refresh_from_db()
+        self.assertEqual(self.grupo.inscritos, 0)
+        inscripcion.refresh_from_db()
+        self.assertEqual(inscripcion.grupo_id, otro.pk)
+
+    def test_aumento_de_cupo_salta_a_quien_ya_no_puede_inscribirse(self):
+        # Se inscribió por otra vía mientras esperaba: pierde el turno
+        Inscripcion.objects.create(estudiante=self.estudiantes[1], grupo=self.grupo)
+        Grupo.objects.filter(pk=self.grupo.pk).update(inscritos=2)
+        # self.grupo tiene los contadores de antes de encolar: save() no los pisa
+        self.grupo.cupo = 4
+        self.grupo.save()
+        promovidas = promover_pendientes()
+        self.assertEqual([i.estudiante_id for i in promovidas], [e.pk for e in self.estudiantes[2:4]])
+        self.grupo.refresh_from_db()
+        self.assertEqual((self.grupo.inscritos, self.grupo.espera_emitidos, self.grupo.espera_atendidos), (4, 4, 3))
+        self.assertEqual(self.posiciones(), {self.estudiantes[4].pk: 1})
+
+
+class CarritoInscripcionTests(TestCase):
+    def setUp(self):
+        invalidar()
+        self.carrera = Carrera.objects.create(nombre='Sistemas', duracion=10)
+        self.grupos = [crear_grupo(sigla=f'INF10{i}', carrera=self.carrera) for i in range(7)]
+        self.estudiante = crear_estudiantes(self.carrera, 1)[0]
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.estudiante.usuario)}')
+
+    def carrito(self, grupos):
+        return self.client.post('/api/inscripciones/carrito/', {'grupos': grupos}, format='json')
+
+    def test_consultas_no_dependen_del_tamano(self):
+        otro = crear_estudiantes(self.carrera, 1, inicio=1)[0]
+        inscribir(otro, self.grupos[0])
+        self.carrito([self.grupos[0].pk])
+        Inscripcion.objects.filter(estudiante=self.estudiante).delete()
+
+        chico = self.carrito([g.pk for g in self.grupos[:2]])
+        self.assertEqual(chico.status_code, 201)
+        Inscripcion.objects.filter(estudiante=self.estudiante).delete()
+        grande = self.carrito([g.pk for g in self.grupos])
+        self.assertEqual(grande.status_code, 201)
+        self.assertEqual(len(grande.data), 7)
+        self.assertEqual(grande['X-Consultas-DB'], chico['X-Consultas-DB'])
+        self.assertNotIn('X-Presupuesto-Consultas', grande)
+        self.assertEqual(
+            list(Grupo.objects.filter(pk__in=[g.pk for g in self.grupos]).order_by('pk').values_list('inscritos', flat=True)),
+            [2, 1, 1, 1, 1, 1, 1]
+        )
+
+    def test_todo_o_nada_con_motivos(self):
+        g = self.grupos
+        MateriaRequisito.objects.create(materia=g[3].materia, requisito=g[2].materia)
+        Grupo.objects.filter(pk=g[4].pk).update(cupo=0)
+        otro_paralelo = Grupo.objects.create(
+            materia=g[0].materia, docente=g[0].docente, paralelo='B', gestion=g[0].gestion,
+            modalidad='virtual'
+        )
+        Calificacion.objects.create(estudiante=self.estudiante, grupo=g[5], nota=Decimal('80'))
+
+        response = self.carrito([g[0].pk, g[1].pk, g[1].pk, otro_paralelo.pk, g[3].pk, g[4].pk, g[5].pk, 9999])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([e[0] if e else None for e in response.data['grupos']], [
+            None,
+            None,
+            'El grupo está repetido en el carrito.',
+            'Otro grupo del carrito es de la misma materia.',
+            'No cumple con los requisitos para inscribirse en esta materia.',
+            CupoLleno.default_detail,
+            'Ya aprobaste esta materia.',
+            'El grupo no existe.',
+        ])
+        self.assertFalse(Inscripcion.objects.filter(estudiante=self.estudiante).exists())
+        self.assertEqual(Grupo.objects.filter(inscritos__gt=0).count(), 0)
+
+        inscribir(self.estudiante, g[0])
+        response = self.carrito([otro_paralelo.pk, g[1].pk])
+        self.assertEqual(response.data['grupos'][0], ['Ya estás inscrito en esta materia en la gestión.'])
+
+
+class RecordAcademicoTests(TestCase):
+    def setUp(self):
+        self.grupo = crear_grupo()
+        self.otro = crear_grupo(sigla='MAT101', carrera=self.grupo.materia.carrera)
+        Materia.objects.filter(pk=self.otro.materia_id).update(creditos=3)
+        self.estudiante = crear_estudiantes(self.grupo.materia.carrera, 1)[0]
+
+    def assertRecord(self, aprobadas, reprobadas, creditos, promedio):
+        record = RecordAcademico.objects.get(estudiante=self.estudiante)
+        self.assertEqual(
+            (record.materias_aprobadas, record.materias_reprobadas,
+             record.total_creditos, record.promedio_general),
+            (aprobadas, reprobadas, creditos, Decimal(promedio))
+        )
+        return record
+
+    def test_cambios_incrementales(self):
+        with self.assertNumQueries(6):
+            calificacion = Calificacion.objects.create(
+                estudiante=self.estudiante, grupo=self.grupo, nota=Decimal('80')
+            )
+        Calificacion.objects.create(estudiante=self.estudiante, grupo=self.otro, nota=Decimal('40'))
+        self.assertRecord(1, 1, 5, '80.00')
+
+        otra = Calificacion.objects.get(grupo=self.otro)
+        otra.nota = Decimal('70')
+        bloqueos = []
+        select_for_update = QuerySet.select_for_update
+
+        def bloquear(queryset, *args, **kwargs):
+            bloqueos.append((queryset.model, len(connection.savepoint_ids)))
+            return select_for_update(queryset, *args, **kwargs)
+
+        fuera = len(connection.savepoint_ids)
+        with mock.patch.object(QuerySet, 'select_for_update', bloquear):
+            otra.save()
+        # La nota anterior se lee bloqueada y dentro de la transacción que aplica el cambio
+        self.assertIn((Calificacion, fuera + 1), bloqueos)
+        # Promedio ponderado por créditos: (80 × 5 + 70 × 3) / 8
+        record = self.assertRecord(2, 0, 8, '76.25')
+
+        calificacion.delete()
+        self.assertRecord(1, 0, 3, '70.00')
+
+        record.actualizar()
+        self.assertRecord(1, 0, 3, '70.00')
+
+    def test_migracion_redondea_como_el_modelo(self):
+        migracion = importlib.import_module('inscripciones.migrations.0004_recordacademico_suma_ponderada')
+        Materia.objects.filter(pk=self.otro.materia_id).update(creditos=5)
+        # (60.01 × 5 + 60.00 × 5) / 10 = 60.005
+        Calificacion.objects.create(estudiante=self.estudiante, grupo=self.grupo, nota=Decimal('60.01'))
+        Calificacion.objects.create(estudiante=self.estudiante, grupo=self.otro, nota=Decimal('60.00'))
+        esperado = self.assertRecord(2, 0, 10, '60.01')
+        RecordAcademico.objects.update(materias_aprobadas=0, total_creditos=0, promedio_general=0)
+        migracion.recalcular_records(django_apps, None)
+        self.assertRecord(2, 0, 10, esperado.promedio_general)
+
+
+class ArchivoGestionTests(TestCase):
+    def setUp(self):
+        invalidar()
+        cache.delete(DASHBOARD_CACHE_KEY)
+        self.anterior = crear_grupo(sigla='INF110', gestion='2024-2025')
+        carrera = self.anterior.materia.carrera
+        self.reprobada = crear_grupo(sigla='MAT101', gestion='2024-2025', carrera=carrera)
+        self.actual = crear_grupo(sigla='INF120', carrera=carrera)
+        MateriaRequisito.objects.create(materia=self.actual.materia, requisito=self.anterior.materia)
+        self.estudiante = crear_estudiantes(carrera, 1)[0]
+        for grupo, nota in ((self.anterior, '80'), (self.reprobada, '40')):
+            inscribir(self.estudiante, grupo)
+            Calificacion.objects.create(estudiante=self.estudiante, grupo=grupo, nota=Decimal(nota))
+
+    def record(self):
+        record = RecordAcademico.objects.get(estudiante=self.estudiante)
+        return (record.materias_aprobadas, record.materias_reprobadas, record.total_creditos, record.promedio_general)
+
+    def test_archivar_conserva_record_requisitos_e_historial(self):
+        antes = self.record()
+        salida = StringIO()
+        call_command('archivar_gestion', '2024-2025', stdout=salida)
+        self.assertIn('2 inscripciones y 2 calificaciones', salida.getvalue())
+        self.assertFalse(Inscripcion.objects.exists())
+        self.assertFalse(Calificacion.objects.exists())
+        self.assertEqual(InscripcionHistorica.objects.filter(gestion='2024-2025').count(), 2)
+
+        # El record no cambia y recalcularlo desde cero da lo mismo
+        self.assertEqual(self.record(), antes)
+        RecordAcademico.objects.filter(estudiante=self.estudiante).recalcular()
+        self.assertEqual(self.record(), antes)
+        self.estudiante.actualizar_record()
+        self.assertEqual(self.record(), antes)
+        call_command('recalcular_inscritos', verificar=True, stdout=StringIO())
+
+        # La materia aprobada en la gestión archivada sigue cumpliendo el requisito
+        inscribir(self.estudiante, self.actual)
+
+        client = APIClient()
+        client.force_authenticate(self.estudiante.usuario)
+        inscripciones = client.get('/api/estudiantes/mi-seguimiento/').data['inscripciones']
+        self.assertEqual([(i['grupo_gestion'], i['nota']) for i in inscripciones], [('2025-2026', None)])
+        # El historial se pide por gestión
+        inscripciones = client.get('/api/estudiantes/mi-seguimiento/?gestion=2024-2025').data['inscripciones']
+        self.assertEqual(
+            sorted((i['grupo_gestion'], i['nota']) for i in inscripciones),
+            [('2024-2025', '40.00'), ('2024-2025', '80.00')]
+        )
+        self.assertIn({'gestion': '2024-2025', 'total': 2}, datos_dashboard()['inscripciones_por_gestion'])
+        _, filas = filas_exportacion('calificaciones', '2024-2025')
+        self.assertEqual(sorted(fila[-2] for fila in filas), [Decimal('40.00'), Decimal('80.00')])
+
+    def test_no_archiva_la_gestion_en_curso(self):
+        with self.assertRaises(CommandError):
+            call_command('archivar_gestion', '2025-2026', stdout=StringIO())
+        self.assertEqual(Inscripcion.objects.count(), 2)
+
+
+class PlanillaCalificacionesTests(TestCase):
+    def setUp(self):
+        self.grupo = crear_grupo()
+        self.estudiantes = crear_estudiantes(self.grupo.materia.carrera, 4)
+        for estudiante in self.estudiantes[:3]:
+            inscribir(estudiante, self.grupo)
+        Calificacion.objects.create(estudiante=self.estudiantes[0], grupo=self.grupo, nota=Decimal('50'))
+        self.client = APIClient()
+        self.client.force_authenticate(self.grupo.docente.usuario)
+        self.url = f'/api/grupos/{self.grupo.id}/calificaciones/'
+
+    def test_planilla_completa(self):
+        planilla = [
+            {'estudiante': self.estudiantes[0].id, 'nota': '90'},
+            {'estudiante': self.estudiantes[1].id, 'nota': '75.5'},
+            {'estudiante': self.estudiantes[2].id, 'nota': '20'},
+        ]
+        response = self.client.post(self.url, planilla, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'creadas': 2, 'actualizadas': 1})
+
+        record = RecordAcademico.objects.get(estudiante=self.estudiantes[0])
+        self.assertEqual((record.materias_aprobadas, record.materias_reprobadas), (1, 0))
+        self.assertEqual(record.promedio_general, Decimal('90.00'))
+        record = RecordAcademico.objects.get(estudiante=self.estudiantes[1])
+        self.assertEqual((record.total_creditos, record.promedio_general), (5, Decimal('75.50')))
+        record = RecordAcademico.objects.get(estudiante=self.estudiantes[2])
+        self.assertEqual((record.materias_reprobadas, record.promedio_general), (1, Decimal('0.00')))
+
+    def test_errores_por_fila_sin_guardar_nada(self):
+        planilla = [
+            {'estudiante': self.estudiantes[1].id, 'nota': '80'},
+            {'estudiante': self.estudiantes[3].id, 'nota': '80'},
+            {'estudiante': self.estudiantes[1].id, 'nota': '70'},
+        ]
+        response = self.client.post(self.url, planilla, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('estudiante', response.data[1])
+        self.assertIn('estudiante', response.data[2])
+        self.assertEqual(Calificacion.objects.count(), 1)
+
+    def test_solo_el_docente_del_grupo(self):
+        otro = crear_grupo(sigla='MAT101')
+        self.client.force_authenticate(otro.docente.usuario)
+        response = self.client.post(self.url, [], format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class IndiceRequisitosTests(TestCase):
+    def setUp(self):
+        self.grupo = crear_grupo(sigla='INF310')
+        carrera = self.grupo.materia.carrera
+        self.materias = [
+            Materia.objects.create(
+                nombre=f'Materia {i}', sigla=f'INF{i}00', creditos=4,
+                horas_academicas=60, nivel=i, carrera=carrera
+            )
+            for i in (1, 2)
+        ]
+        # INF100 -> INF200 -> INF310
+        MateriaRequisito.objects.create(materia=self.materias[1], requisito=self.materias[0])
+        MateriaRequisito.objects.create(materia=self.grupo.materia, requisito=self.materias[1])
+        self.estudiante = crear_estudiantes(carrera, 1)[0]
+
+    def tearDown(self):
+        # Las filas revertidas por TestCase no disparan señales
+        invalidar()
+
+    def test_cierre_transitivo(self):
+        indice = indice_para(self.grupo.materia.carrera_id)
+        self.assertEqual(indice.requisitos(self.grupo.materia_id), {self.materias[1].id})
+        self.assertEqual(
+            indice.todos_los_requisitos(self.grupo.materia_id),
+            {self.materias[0].id, self.materias[1].id}
+        )
+
+    def test_rechaza_ciclos(self):
+        self.assertRaises(CicloRequisitos, IndiceRequisitos, [(1, 2), (2, 3), (3, 1)])
+        client = APIClient()
+        admin = crear_usuario('admin@test.com', Usuario.Rol.ADMIN, 'A-1')
+        admin.is_staff = True
+        client.force_authenticate(admin)
+        response = client.post('/api/materia-requisitos/', {
+            'materia': self.materias[0].id, 'requisito': self.grupo.materia_id
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_inscripcion_sin_consultar_requisitos(self):
+        grupo = Grupo.objects.select_related('materia').get(pk=self.grupo.pk)
+        indice_para(grupo.materia.carrera_id)
+        # Versión de los requisitos y materias aprobadas; MateriaRequisito no se lee
+        with CaptureQueriesContext(connection) as consultas:
+            with self.assertRaises(ValidationError):
+                inscribir(self.estudiante, grupo)
+        self.assertEqual(len(consultas), 2)
+        self.assertFalse(any('materiarequisito"' in c['sql'] for c in consultas))
+
+    def test_cambio_de_grupo_verifica_requisitos(self):
+        basica = Grupo.objects.create(
+            materia=self.materias[0], docente=self.grupo.docente, paralelo='A',
+            gestion=self.grupo.gestion, modalidad='presencial', cupo=30
+        )
+        inscripcion = inscribir(self.estudiante, basica)
+        with self.assertRaises(ValidationError):
+            cambiar_grupo(inscripcion, Grupo.objects.select_related('materia').get(pk=self.grupo.pk))
+        self.assertEqual(Grupo.objects.get(pk=self.grupo.pk).inscritos, 0)
+
+    def test_ciclo_guardado_no_termina_en_500(self):
+        # Un ciclo que entró sin pasar por clean(), por ejemplo con una carga masiva
+        MateriaRequisito.objects.bulk_create([MateriaRequisito(materia=self.materias[0], requisito=self.grupo.materia)])
+        incrementar(MateriaRequisito)
+        client = APIClient()
+        client.force_authenticate(self.estudiante.usuario)
+        with self.assertLogs('inscripciones.services', 'ERROR'):
+            response = client.post('/api/inscripciones/', {'grupo': self.grupo.id}, format='json')
+        self.assertEqual(response.status_code, 503)
+        with self.assertLogs('inscripciones.services', 'ERROR'):
+            self.assertEqual(client.get('/api/grupos/disponibles/').status_code, 503)
+        with self.assertLogs('inscripciones.services', 'ERROR'):
+            response = client.post('/api/inscripciones/carrito/', {'grupos': [self.grupo.id]}, format='json')
+        self.assertEqual(response.status_code, 503)
+        self.assertRaises(
+            DjangoValidationError,
+            MateriaRequisito(materia=self.materias[1], requisito=self.grupo.materia).clean
+        )
+
+    def test_cambio_en_otro_proceso(self):
+        carrera_id = self.grupo.materia.carrera_id
+        previa = Materia.objects.create(
+            nombre='Materia 0', sigla='INF050', creditos=4, horas_academicas=60, nivel=1,
+            carrera_id=carrera_id
+        )
+        self.assertEqual(indice_para(carrera_id).requisitos(self.materias[0].id), frozenset())
+        # Otro proceso agrega un requisito: a este no le llega la señal, solo la versión en la base
+        MateriaRequisito.objects.bulk_create([MateriaRequisito(materia=self.materias[0], requisito=previa)])
+        self.assertEqual(indice_para(carrera_id).requisitos(self.materias[0].id), frozenset())
+        incrementar(MateriaRequisito)
+        self.assertEqual(indice_para(carrera_id).requisitos(self.materias[0].id), {previa.id})
+
+
+class GruposDisponiblesTests(TestCase):
+    def setUp(self):
+        self.basica = crear_grupo(sigla='INF100')
+        carrera = self.basica.materia.carrera
+        self.avanzada = crear_grupo(sigla='INF200', carrera=carrera)
+        self.lleno = crear_grupo(sigla='INF300', carrera=carrera, cupo=0)
+        self.aprobada = crear_grupo(sigla='INF400', carrera=carrera)
+        self.anterior = crear_grupo(sigla='INF500', carrera=carrera, gestion='2024-2025')
+        self.otra_carrera = crear_grupo(sigla='MAT100')
+        MateriaRequisito.objects.create(materia=self.avanzada.materia, requisito=self.basica.materia)
+        self.estudiante = crear_estudiantes(carrera, 1)[0]
+        Calificacion.objects.create(estudiante=self.estudiante, grupo=self.aprobada, nota=Decimal('90'))
+
+    def tearDown(self):
+        invalidar()
+
+    def test_solo_grupos_elegibles(self):
+        client = APIClient()
+        client.force_authenticate(self.estudiante.usuario)
+        indice_para(self.estudiante.carrera_id)
+        with self.assertNumQueries(6):
+            response = client.get('/api/grupos/disponibles/', {'gestion': '2025-2026'})
+        self.assertEqual([g['id'] for g in response.data['results']], [self.basica.id])
+        # Los llenos, para entrar a la lista de espera
+        response = client.get('/api/grupos/disponibles/', {'incluir_llenos': '1'})
+        self.assertEqual(
+            [(g['id'], g['cupo_disponible']) for g in response.data['results']],
+            [(self.basica.id, 30), (self.lleno.id, 0)]
+        )
+
+        inscribir(self.estudiante, self.basica)
+        response = client.get('/api/grupos/disponibles/')
+        self.assertEqual(response.data['results'], [])
+
+
+class DashboardTests(TestCase):
+    def setUp(self):
+        cache.delete(DASHBOARD_CACHE_KEY)
+        self.grupo = crear_grupo()
+        self.estudiantes = crear_estudiantes(self.grupo.materia.carrera, 2)
+
+    def test_cache_e_invalidacion(self):
+        client = APIClient()
+        response = client.get('/api/dashboard/')
+        self.assertEqual(response.data['total_estudiantes'], 2)
+        with self.assertNumQueries(0):
+            client.get('/api/dashboard/')
+
+        # Las inscripciones no invalidan: aparecen al vencer el TTL
+        inscribir(self.estudiantes[0], self.grupo)
+        with self.assertNumQueries(0):
+            response = client.get('/api/dashboard/')
+        self.assertEqual(response.data['inscripciones_por_gestion'], [])
+
+        # Otros cambios invalidan al confirmar, no antes
+        with self.captureOnCommitCallbacks() as callbacks:
+            crear_estudiantes(self.grupo.materia.carrera, 1, inicio=2)
+            with self.assertNumQueries(0):
+                client.get('/api/dashboard/')
+        for callback in callbacks:
+            callback()
+        response = client.get('/api/dashboard/')
+        self.assertEqual(response.data['total_estudiantes'], 3)
+        self.assertEqual(
+            response.data['inscripciones_por_gestion'], [{'gestion': '2025-2026', 'total': 1}]
+        )
+        self.assertEqual(response.data['por_carrera'][0]['total_inscripciones'], 1)
+
+    def test_un_solo_recalculo_a_la_vez(self):
+        anteriores = datos_dashboard()
+        with self.captureOnCommitCallbacks(execute=True):
+            crear_estudiantes(self.grupo.materia.carrera, 1, inicio=2)
+        # Mientras otra petición recalcula se sirven los datos anteriores sin consultar
+        cache.add('dashboard:calculando', True)
+        try:
+            with self.assertNumQueries(0):
+                self.assertEqual(datos_dashboard(), anteriores)
+        finally:
+            cache.delete('dashboard:calculando')
+        self.assertEqual(datos_dashboard()['total_estudiantes'], 3)
+
+    def test_estudiantes_por_materia_cuenta_el_historial(self):
+        anterior = Grupo.objects.create(
+            materia=self.grupo.materia, docente=self.grupo.docente, paralelo='A',
+            gestion='2024-2025', modalidad='presencial', cupo=30
+        )
+        for estudiante in self.estudiantes:
+            inscribir(estudiante, anterior)
+        call_command('archivar_gestion', '2024-2025', stdout=StringIO())
+        # Quien repite la materia cuenta una sola vez
+        inscribir(self.estudiantes[0], self.grupo)
+        cache.delete(DASHBOARD_CACHE_KEY)
+        self.assertIn(
+            {'nombre': self.grupo.materia.nombre, 'total': 2}, datos_dashboard()['estudiantes_por_materia']
+        )
+
+
+class MiSeguimientoTests(TestCase):
+    def setUp(self):
+        self.grupos = [crear_grupo(sigla='INF100')]
+        carrera = self.grupos[0].materia.carrera
+        self.grupos += [crear_grupo(sigla=f'INF{i}00', carrera=carrera) for i in (2, 3)]
+        self.estudiante = crear_estudiantes(carrera, 1)[0]
+        for grupo in self.grupos:
+            inscribir(self.estudiante, grupo)
+        Calificacion.objects.create(estudiante=self.estudiante, grupo=self.grupos[0], nota=Decimal('75'))
+
+    def test_una_respuesta_en_consultas_fijas(self):
+        client = APIClient()
+        client.force_authenticate(self.estudiante.usuario)
+        # Una gestión anterior: no aparece sin pedirla
+        anterior = crear_grupo(sigla='INF050', gestion='2024-2025', carrera=self.grupos[0].materia.carrera)
+        inscribir(self.estudiante, anterior)
+        # Perfil con record e inscripciones de la gestión en curso
+        with self.assertNumQueries(2):
+            response = client.get('/api/estudiantes/mi-seguimiento/')
+        self.assertEqual(response.data['estudiante']['matricula'], self.estudiante.matricula)
+        self.assertEqual(len(response.data['inscripciones']), 3)
+        notas = {i['grupo']: i['nota'] for i in response.data['inscripciones']}
+        self.assertEqual(notas[self.grupos[0].id], '75.00')
+        self.assertIsNone(notas[self.grupos[1].id])
+        self.assertEqual(response.data['record']['promedio_general'], '75.00')
+
+        with self.assertNumQueries(3):
+            response = client.get('/api/estudiantes/mi-seguimiento/?gestion=2024-2025')
+        self.assertEqual([i['grupo'] for i in response.data['inscripciones']], [anterior.id])
+
+
+class PaginacionCursorTests(TestCase):
+    def setUp(self):
+        for i in range(25):
+            crear_usuario(f'usuario{i}@test.com', Usuario.Rol.ESTUDIANTE, f'U-{i}')
+        self.client = APIClient()
+        self.client.force_authenticate(Usuario.objects.first())
+
+    def test_recorre_paginas_sin_count_ni_offset(self):
+        vistos = []
+        url = '/api/usuarios/?paginacion=cursor&page_size=10'
+        while url:
+            with CaptureQueriesContext(connection) as consultas:
+                response = self.client.get(url)
+            self.assertEqual(len(consultas), 1)
+            self.assertNotIn('COUNT', consultas[0]['sql'])
+            self.assertNotIn('OFFSET', consultas[0]['sql'])
+            vistos += [u['id'] for u in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(vistos, sorted(Usuario.objects.values_list('id', flat=True), reverse=True))
+
+    def test_total_aproximado_opcional(self):
+        response = self.client.get('/api/usuarios/', {'paginacion': 'cursor', 'total': 'aproximado'})
+        self.assertEqual(response.data['total_aproximado'], 25)
+        self.assertIn('count', self.client.get('/api/usuarios/').data)
+
+
+class PresupuestoConsultasTests(TestCase):
+    """Cada acción con presupuesto se mide en su peor caso: perfil sin cachear,
+    índice de requisitos sin compilar y, en los listados, todos los filtros"""
+
+    @classmethod
+    def setUpTestData(cls):
+        crear_dataset()
+        cls.usuario = crear_usuario('medicion@test.com', Usuario.Rol.ESTUDIANTE, 'M-1')
+        cls.usuario.is_staff = True
+        cls.usuario.set_password('clave-medicion-1')
+        cls.usuario.save()
+        cls.estudiante = Estudiante.objects.create(
+            usuario=cls.usuario, matricula='ME0001', carrera=Carrera.objects.first(),
+            fecha_ingreso=date(2024, 2, 1)
+        )
+        cls.espera = encolar(cls.estudiante, Grupo.objects.first())
+        anterior = crear_grupo(sigla='MED001', gestion='2023-2024')
+        InscripcionHistorica.objects.create(
+            id=1, estudiante=cls.estudiante, grupo=anterior, gestion=anterior.gestion,
+            fecha_inscripcion=datetime(2023, 2, 1, tzinfo=dt_timezone.utc)
+        )
+        CalificacionHistorica.objects.create(
+            id=1, estudiante=cls.estudiante, grupo=anterior, gestion=anterior.gestion,
+            nota=Decimal('75'), resultado=Calificacion.Resultado.APROBADO
+        )
+
+    def setUp(self):
+        invalidar()
+        cache.delete(DASHBOARD_CACHE_KEY)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.usuario)}')
+        self.medidas = set()
+
+    def assertDentroDelPresupuesto(self, url, vista, accion, metodo='get', datos=None, estado=200, formato='json'):
+        self.assertIn(accion, vista.presupuesto_consultas, f'{vista.__name__} no declara presupuesto para {accion}')
+        perfiles.invalidar()
+        response = getattr(self.client, metodo)(url, datos, format=formato)
+        self.assertEqual(response.status_code, estado, url)
+        if response.streaming:
+            # Se mide mientras se envía: el modo estricto falla al terminar si se excede
+            with override_settings(PRESUPUESTO_CONSULTAS_ESTRICTO=True):
+                b''.join(response.streaming_content)
+        else:
+            consultas = int(response['X-Consultas-DB'])
+            self.assertLessEqual(
+                consultas, vista.presupuesto_consultas[accion],
+                f'{url} hizo {consultas} consultas (presupuesto {vista.presupuesto_consultas[accion]})'
+            )
+        self.medidas.add((vista, metodo, accion))
+        return response
+
+    def test_todas_las_acciones_declaradas(self):
+        for prefijo, vista, _ in router.registry:
+            with self.subTest(prefijo=prefijo):
+                self.assertDentroDelPresupuesto(f'/api/{prefijo}/', vista, 'list')
+                self.assertDentroDelPresupuesto(f'/api/{prefijo}/?paginacion=cursor', vista, 'list')
+                campos = getattr(vista, 'filterset_fields', None)
+                if campos:
+                    # Los filtros por FK validan el id con una consulta más
+                    filtros = {
+                        campo: valor
+                        for campo, valor in vista.queryset.model.objects.values(*campos).first().items()
+                        if valor is not None
+                    }
+                    self.assertDentroDelPresupuesto(f'/api/{prefijo}/', vista, 'list', datos=filtros)
+                pk = vista.queryset.model.objects.values_list('pk', flat=True).first()
+                self.assertDentroDelPresupuesto(f'/api/{prefijo}/{pk}/', vista, 'retrieve')
+
+        estudiante = Estudiante.objects.first()
+        self.assertDentroDelPresupuesto(
+            f'/api/estudiantes/{estudiante.pk}/record_academico/', EstudianteViewSet, 'record_academico'
+        )
+        self.assertDentroDelPresupuesto('/api/estudiantes/mi-seguimiento/', EstudianteViewSet, 'mi_seguimiento')
+        self.assertDentroDelPresupuesto(
+            '/api/estudiantes/mi-seguimiento/?gestion=2023-2024', EstudianteViewSet, 'mi_seguimiento'
+        )
+        self.assertDentroDelPresupuesto('/api/auth/me/', UsuarioViewSet, 'current_user')
+        self.assertDentroDelPresupuesto('/api/grupos/disponibles/', GrupoViewSet, 'disponibles')
+        self.assertDentroDelPresupuesto('/api/dashboard/', DashboardAPIView, 'get')
+        self.assertDentroDelPresupuesto('/api/chatbot/estadisticas/', ChatbotEstadisticasAPIView, 'get')
+        self.assertDentroDelPresupuesto(
+            '/api/auth/login/', CustomTokenObtainPairView, 'post', 'post',
+            {'email': self.usuario.email, 'password': 'clave-medicion-1'}
+        )
+        self.assertDentroDelPresupuesto(
+            f'/api/lista-espera/{self.espera.pk}/', ListaEsperaViewSet, 'destroy', 'delete', estado=204
+        )
+        # Índice de requisitos sin compilar: se mide también su compilación
+        invalidar()
+        grupo = grupos_disponibles(self.estudiante).filter(espera_emitidos=F('espera_atendidos')).first()
+        self.assertDentroDelPresupuesto(
+            '/api/inscripciones/carrito/', InscripcionViewSet, 'carrito', 'post', {'grupos': [grupo.pk]}, 201
+        )
+        self.medir_escrituras()
+        self.assertDentroDelPresupuesto(
+            '/api/exportar/calificaciones/?gestion=2025-2026', ExportacionAPIView, 'get'
+        )
+        self.assertDentroDelPresupuesto(
+            '/api/exportar/inscripciones/?gestion=2023-2024&formato=xlsx', ExportacionAPIView, 'get'
+        )
+
+        # Cada método de cada ruta del router tiene presupuesto y se midió arriba
+        rutas = set()
+        for patron in router.urls:
+            # La raíz de la API no es un viewset; HEAD usa la acción de GET
+            for metodo, accion in getattr(patron.callback, 'actions', {}).items():
+                if metodo != 'head':
+                    rutas.add((patron.callback.cls, metodo, accion))
+        for vista, metodo, accion in rutas:
+            self.assertIn(
+                accion, vista.presupuesto_consultas, f'{vista.__name__} no declara presupuesto para {accion}'
+            )
+        self.assertEqual(rutas - self.medidas, set())
+
+        vistas = set()
+
+        def recorrer(patrones):
+            for patron in patrones:
+                if hasattr(patron, 'url_patterns'):
+                    recorrer(patron.url_patterns)
+                elif issubclass(getattr(patron.callback, 'cls', object), PresupuestoConsultasMixin):
+                    vistas.add(patron.callback.cls)
+
+        # Vistas publicadas que miden sus consultas: todas declaran presupuesto
+        recorrer(get_resolver().url_patterns)
+        self.assertEqual([v.__name__ for v in vistas if not v.presupuesto_consultas], [])
+        declaradas = {(vista, accion) for vista in vistas for accion in vista.presupuesto_consultas}
+        self.assertEqual(declaradas - {(vista, accion) for vista, _, accion in self.medidas}, set())
+
+    def medir_escrituras(self):
+        """Altas, modificaciones y bajas de cada viewset publicado, con datos válidos"""
+        carrera = Carrera.objects.first()
+        # Encadenadas por requisitos en orden: el último puede pedir cualquiera de los primeros
+        materias = list(Materia.objects.filter(carrera=carrera).order_by('pk'))
+        docente = Docente.objects.first()
+        for prefijo, vista, datos, cambio in [
+            ('carreras', CarreraViewSet, {'nombre': 'Medición', 'duracion': 8}, {'duracion': 9}),
+            ('materias', MateriaViewSet, {
+                'nombre': 'Medición', 'sigla': 'MED100', 'creditos': 4, 'horas_academicas': 60,
+                'nivel': 1, 'carrera': carrera.pk
+            }, {'nivel': 2}),
+            ('materia-requisitos', MateriaRequisitoViewSet, {
+                'materia': materias[-1].pk, 'requisito': materias[0].pk
+            }, {'requisito': materias[1].pk}),
+            ('grupos', GrupoViewSet, {
+                'materia': materias[0].pk, 'docente': docente.pk, 'paralelo': 'M',
+                'gestion': '2025-2026', 'modalidad': 'presencial', 'cupo': 20
+            }, {'cupo': 25}),
+            ('usuarios', UsuarioViewSet, {
+                'email': 'alta@test.com', 'password': 'clave-alta-123', 'first_name': 'Alta',
+                'last_name': 'Medición', 'ci': 'ALTA-1', 'rol': Usuario.Rol.ADMIN
+            }, {'telefono': '70000000'}),
+            ('docentes', DocenteViewSet, {
+                'usuario_id': crear_usuario('docente.alta@test.com', Usuario.Rol.DOCENTE, 'ALTA-2').pk,
+                'titulo': 'Lic.', 'especialidad': 'Redes', 'fecha_contratacion': '2024-01-15'
+            }, {'titulo': 'Msc.'}),
+            ('estudiantes', EstudianteViewSet, {
+                'usuario_id': crear_usuario('estudiante.alta@test.com', Usuario.Rol.ESTUDIANTE, 'ALTA-3').pk,
+                'matricula': 'AL0001', 'carrera': carrera.pk, 'fecha_ingreso': '2025-02-01'
+            }, {'fecha_ingreso': '2025-03-01'}),
+        ]:
+            with self.subTest(prefijo=prefijo):
+                pk = self.assertDentroDelPresupuesto(
+                    f'/api/{prefijo}/', vista, 'create', 'post', datos, 201
+                ).json()['id']
+                self.assertDentroDelPresupuesto(
+                    f'/api/{prefijo}/{pk}/', vista, 'update', 'put', {**datos, **cambio}
+                )
+                self.assertDentroDelPresupuesto(f'/api/{prefijo}/{pk}/', vista, 'partial_update', 'patch', cambio)
+                self.assertDentroDelPresupuesto(f'/api/{prefijo}/{pk}/', vista, 'destroy', 'delete', estado=204)
+
+        # Inscripción, cambio de paralelo ida y vuelta y baja
+        grupo = crear_grupo(sigla='MED200', carrera=self.estudiante.carrera)
+        otro = Grupo.objects.create(
+            materia=grupo.materia, docente=grupo.docente, paralelo='B',
+            gestion=grupo.gestion, modalidad='virtual'
+        )
+        pk = self.assertDentroDelPresupuesto(
+            '/api/inscripciones/', InscripcionViewSet, 'create', 'post', {'grupo': grupo.pk}, 201
+        ).json()['id']
+        self.assertDentroDelPresupuesto(
+            f'/api/inscripciones/{pk}/', InscripcionViewSet, 'update', 'put', {'grupo': otro.pk}
+        )
+        self.assertDentroDelPresupuesto(
+            f'/api/inscripciones/{pk}/', InscripcionViewSet, 'partial_update', 'patch', {'grupo': grupo.pk}
+        )
+        self.assertDentroDelPresupuesto(
+            f'/api/inscripciones/{pk}/', InscripcionViewSet, 'destroy', 'delete', estado=204
+        )
+        # Grupo lleno: la misma acción deja al estudiante en la lista de espera
+        Grupo.objects.filter(pk=grupo.pk).update(cupo=0)
+        self.assertDentroDelPresupuesto(
+            '/api/inscripciones/', InscripcionViewSet, 'create', 'post', {'grupo': grupo.pk}, 202
+        )
+
+        # Planilla completa de un grupo: notas nuevas y modificadas
+        grupo = Grupo.objects.filter(inscripciones__isnull=False).distinct().first()
+        planilla = [
+            {'estudiante': estudiante_id, 'nota': '65.50'}
+            for estudiante_id in grupo.inscripciones.values_list('estudiante_id', flat=True)
+        ]
+        Calificacion.objects.filter(grupo=grupo, estudiante_id=planilla[0]['estudiante']).delete()
+        self.assertDentroDelPresupuesto(
+            f'/api/grupos/{grupo.pk}/calificaciones/', GrupoViewSet, 'calificaciones', 'post', planilla
+        )
+
+        # Importación con el máximo de filas admitido por HTTP y dos carreras
+        otra = Carrera.objects.exclude(pk=carrera.pk).first()
+        filas = ''.join(
+            f'imp{i}@test.com,clave{i},Imp{i},Apellido,IMP-{i},,,IP{i:04d},{(carrera, otra)[i % 2].pk},2025-02-01\n'
+            for i in range(settings.IMPORTACION_MAX_FILAS)
+        )
+        archivo = SimpleUploadedFile('alumnos.csv', (ImportacionEstudiantesTests.encabezado + filas).encode())
+        response = self.assertDentroDelPresupuesto(
+            '/api/estudiantes/importar/', EstudianteViewSet, 'importar', 'post', {'archivo': archivo},
+            formato='multipart'
+        )
+        self.assertEqual(response.json()['creados'], settings.IMPORTACION_MAX_FILAS)
+
+        # CalificacionViewSet no está en el router: se mide llamando a la vista
+        fabrica = APIRequestFactory()
+        inscripcion = Inscripcion.objects.filter(estudiante=self.estudiante).first()
+        Calificacion.objects.filter(estudiante=self.estudiante, grupo=inscripcion.grupo).delete()
+        datos = {'estudiante': inscripcion.estudiante_id, 'grupo': inscripcion.grupo_id, 'nota': '55.00'}
+        pk = None
+        for metodo, accion, estado in [
+            ('post', 'create', 201), ('put', 'update', 200), ('patch', 'partial_update', 200),
+            ('delete', 'destroy', 204),
+        ]:
+            with self.subTest(accion=accion):
+                perfiles.invalidar()
+                request = getattr(fabrica, metodo)('/', datos if metodo != 'delete' else None, format='json')
+                force_authenticate(request, self.usuario)
+                vista = CalificacionViewSet.as_view({metodo: accion})
+                response = vista(request, pk=pk) if pk else vista(request)
+                self.assertEqual(response.status_code, estado)
+                self.assertLessEqual(
+                    int(response['X-Consultas-DB']), CalificacionViewSet.presupuesto_consultas[accion]
+                )
+                pk = pk or response.data['id']
+
+    @override_settings(PRESUPUESTO_CONSULTAS_ESTRICTO=True)
+    def test_exceder_el_presupuesto_falla_en_las_pruebas(self):
+        with mock.patch.dict(DashboardAPIView.presupuesto_consultas, {'get': 0}):
+            with self.assertRaises(PresupuestoExcedido):
+                self.client.get('/api/dashboard/')
+
+
+class DatosSinteticosTests(TestCase):
+    opciones = dict(
+        carreras=2, niveles=3, materias_por_nivel=2, docentes=3, gestiones=3,
+        estudiantes=40, semilla=7, stdout=StringIO()
+    )
+
+    def setUp(self):
+        invalidar()
+
+    def test_generacion_consistente(self):
+        call_command('generar_datos', **self.opciones)
+        self.assertEqual(Estudiante.objects.count(), 40)
+        self.assertEqual(RecordAcademico.objects.count(), 40)
+        self.assertEqual(Grupo.objects.count(), 2 * 6 * 2 * 3)
+        self.assertTrue(MateriaRequisito.objects.exists())
+        call_command('recalcular_inscritos', verificar=True, stdout=StringIO())
+
+        # Los records calculados en bloque coinciden con la reconstrucción completa
+        for record in RecordAcademico.objects.filter(materias_aprobadas__gt=0)[:10]:
+            antes = (record.materias_aprobadas, record.total_creditos, record.promedio_general)
+            record.actualizar()
+            self.assertEqual(antes, (record.materias_aprobadas, record.total_creditos, record.promedio_general))
+
+        with self.assertRaises(CommandError):
+            call_command('generar_datos', **self.opciones)
+
+    def test_generacion_determinista(self):
+        call_command('generar_datos', **self.opciones)
+        campos = ('estudiante__matricula', 'grupo__materia__sigla', 'grupo__paralelo', 'nota')
+        primera = list(Calificacion.objects.order_by('id').values_list(*campos))
+        Grupo.objects.all().delete()
+        Usuario.objects.all().delete()
+        Carrera.objects.all().delete()
+        call_command('generar_datos', **self.opciones)
+        segunda = list(Calificacion.objects.order_by('id').values_list(*campos))
+        self.assertEqual(primera, segunda)
+
+    def test_benchmark(self):
+        call_command('generar_datos', **self.opciones)
+        inscripciones = Inscripcion.objects.count()
+        with tempfile.NamedTemporaryFile(suffix='.json') as salida:
+            call_command(
+                'benchmark', repeticiones=2, calentamiento=0, logins=3, hilos=1,
+                salida=salida.name, stdout=StringIO()
+            )
+            reporte = json.load(salida)
+        self.assertEqual(
+            set(reporte['escenarios']),
+            {'grupos_lista', 'grupos_disponibles', 'inscripcion', 'calificacion',
+             'planilla_completa', 'dashboard_frio', 'dashboard', 'login'}
+        )
+        self.assertEqual(reporte['escenarios']['inscripcion']['n'], 2)
+        self.assertEqual(set(reporte['serializacion']), {'materias', 'grupos', 'inscripciones', 'estudiantes'})
+        self.assertEqual(set(reporte['renderizado']), {'estudiantes', 'docentes', 'calificaciones', 'dashboard'})
+        self.assertEqual([(l['hilos'], l['logins']) for l in reporte['login']], [(1, 3)])
+        # El benchmark no deja rastro en la base de datos
+        self.assertEqual(Inscripcion.objects.count(), inscripciones)
+        self.assertFalse(Usuario.objects.filter(email='benchmark@sintetico.edu').exists())
+
+    def test_auditoria_de_consultas(self):
+        call_command('generar_datos', **self.opciones)
+        with tempfile.NamedTemporaryFile(suffix='.json') as salida:
+            call_command('auditar_consultas', repeticiones=1, min_filas=10, salida=salida.name, stdout=StringIO())
+            resultados = json.load(salida)
+        escenarios = {r['escenario'] for r in resultados}
+        self.assertIn('dashboard', escenarios)
+        self.assertIn('GET /api/grupos/disponibles/ (estudiante)', escenarios)
+        self.assertTrue(any(e.startswith('exportar inscripciones') for e in escenarios))
+        self.assertTrue(all(r['plan'] and r['tiempo_ms'] is not None for r in resultados))
+        self.assertFalse(Usuario.objects.filter(email='auditoria@sintetico.edu').exists())
+
+
+class ListadosProyectadosTests(TestCase):
+    """Los listados servidos con .values() deben ser idénticos byte a byte a los del serializer"""
+
+    @classmethod
+    def setUpTestData(cls):
+        crear_dataset(estudiantes=25)
+        cls.usuario = crear_usuario('proyeccion@test.com', Usuario.Rol.ESTUDIANTE, 'P-1')
+        cls.usuario.is_staff = True
+        cls.usuario.first_name = 'José Ñandú'
+        cls.usuario.save()
+        cls.estudiante = Estudiante.objects.create(
+            usuario=cls.usuario, matricula='PR0001', carrera=Carrera.objects.first(),
+            fecha_ingreso=date(2024, 2, 1)
+        )
+        Grupo.objects.filter(pk=Grupo.objects.first().pk).update(inscritos=7)
+
+    def setUp(self):
+        invalidar()
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def assertIdentico(self, vista, url):
+        rapido = self.client.get(url)
+        with mock.patch.object(vista, 'proyeccion', None):
+            completo = self.client.get(url)
+        self.assertEqual(rapido.status_code, 200, url)
+        self.assertEqual(rapido.content, completo.content, url)
+
+    def test_listados(self):
+        carrera = Carrera.objects.first().pk
+        casos = [
+            (MateriaViewSet, '/api/materias/'),
+            (MateriaViewSet, f'/api/materias/?carrera={carrera}&nivel=1'),
+            (GrupoViewSet, '/api/grupos/?gestion=2025-2026'),
+            (GrupoViewSet, '/api/grupos/?page=2'),
+            (InscripcionViewSet, '/api/inscripciones/'),
+            (InscripcionViewSet, '/api/inscripciones/?paginacion=cursor&page_size=7'),
+            (EstudianteViewSet, '/api/estudiantes/'),
+            (EstudianteViewSet, f'/api/estudiantes/?carrera={carrera}&paginacion=cursor'),
+        ]
+        for vista, url in casos:
+            with self.subTest(url=url):
+                self.assertIdentico(vista, url)
+
+    def test_grupos_disponibles(self):
+        rapido = self.client.get('/api/grupos/disponibles/')
+        grupos = grupos_disponibles(self.estudiante)
+        esperado = GrupoCupoSerializer(grupos, many=True).data
+        self.assertEqual(rapido.status_code, 200)
+        self.assertEqual(
+            JSONRenderer().render(rapido.json()['results']), JSONRenderer().render(esperado)
+        )
+
+
+class RenderizadoJSONTests(TestCase):
+    def test_misma_salida_que_el_renderer_de_drf(self):
+        datos = ReturnDict({
+            'nota': Decimal('87.50'),
+            'promedio_general': '71.25',
+            'fecha': datetime(2025, 3, 1, 14, 5, 9, 123456, tzinfo=dt_timezone.utc),
+            'fecha_ingreso': date(2024, 2, 1),
+            'nombre': 'José Ñandú\u2028',
+            'lista': (1, 2.5, None, True),
+            1: 'clave numérica',
+        }, serializer=None)
+        for media in (None, 'application/json; indent=4'):
+            with self.subTest(media=media):
+                self.assertEqual(
+                    ORJSONRenderer().render(datos, media), JSONRenderer().render(datos, media)
+                )
+
+    def test_parser(self):
+        self.assertEqual(ORJSONParser().parse(BytesIO(b'{"nota": 87.5, "a": [1]}')), {'nota': 87.5, 'a': [1]})
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(BytesIO(b'{"nota": NaN'))
+
+    def test_compresion_de_respuestas_grandes(self):
+        crear_dataset(estudiantes=10)
+        usuario = crear_usuario('gzip@test.com', Usuario.Rol.ADMIN, 'G-1')
+        client = APIClient()
+        client.force_authenticate(usuario)
+
+        plano = client.get('/api/estudiantes/')
+        comprimido = client.get('/api/estudiantes/', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertNotIn('Content-Encoding', plano)
+        self.assertEqual(comprimido['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(comprimido.content), plano.content)
+
+        pequeno = client.get('/api/auth/me/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', pequeno)
+
+    def test_sin_compresion_para_eventos(self):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = StreamingHttpResponse(iter([b'data: x\n\n'] * 500), content_type='text/event-stream')
+        response = CompresionMiddleware(lambda r: response)(request)
+        self.assertNotIn('Content-Encoding', response)
+
+
+class CatalogoCondicionalTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.grupo = crear_grupo()
+        cls.usuario = crear_usuario('catalogo@test.com', Usuario.Rol.ESTUDIANTE, 'C-1')
+        cls.estudiante = Estudiante.objects.create(
+            usuario=cls.usuario, matricula='CA0001', carrera=cls.grupo.materia.carrera,
+            fecha_ingreso=date(2024, 2, 1)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_304_con_solo_la_consulta_de_versiones(self):
+        for url in ('/api/carreras/', '/api/materias/', '/api/materia-requisitos/',
+                    '/api/grupos/', f'/api/grupos/{self.grupo.pk}/'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response['ETag'].startswith('"'))
+                self.assertIn('Last-Modified', response)
+
+                with CaptureQueriesContext(connection) as consultas:
+                    condicional = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(condicional.status_code, 304)
+                self.assertEqual(condicional['ETag'], response['ETag'])
+                # Solo la tabla de versiones
+                self.assertEqual(len(consultas), 1)
+                self.assertIn('versioncatalogo', consultas[0]['sql'])
+
+                debil = self.client.get(url, HTTP_IF_NONE_MATCH=f'"otra", W/{response["ETag"]}')
+                self.assertEqual(debil.status_code, 304)
+                desde = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+                self.assertEqual(desde.status_code, 304)
+
+    def test_la_version_cambia_con_los_datos(self):
+        materias = self.client.get('/api/materias/')['ETag']
+        grupos = self.client.get('/api/grupos/')['ETag']
+        self.assertNotEqual(self.client.get('/api/grupos/?gestion=2025-2026')['ETag'], grupos)
+
+        carrera = self.grupo.materia.carrera
+        carrera.nombre = 'Renombrada'
+        # Las versiones suben al confirmar la transacción
+        with self.captureOnCommitCallbacks(execute=True):
+            carrera.save()
+        response = self.client.get('/api/materias/', HTTP_IF_NONE_MATCH=materias)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['carrera_nombre'], 'Renombrada')
+        self.assertEqual(self.client.get('/api/grupos/')['ETag'], grupos)
+
+        # Los contadores no forman parte del catálogo: inscribirse no lo invalida
+        with self.captureOnCommitCallbacks(execute=True):
+            inscribir(self.estudiante, self.grupo)
+        self.assertEqual(self.client.get('/api/grupos/', HTTP_IF_NONE_MATCH=grupos).status_code, 304)
+        self.assertNotIn('cupo_disponible', self.client.get(f'/api/grupos/{self.grupo.id}/').json())
+
+        # Iniciar sesión actualiza last_login pero no el catálogo; renombrar al docente sí
+        docente = self.grupo.docente.usuario
+        docente.set_password('clave-segura-123')
+        docente.save(update_fields=['password'])
+        login = self.client.post(
+            '/api/auth/login/', {'email': docente.email, 'password': 'clave-segura-123'}, format='json'
+        )
+        self.assertEqual(login.status_code, 200)
+        self.assertEqual(self.client.get('/api/grupos/', HTTP_IF_NONE_MATCH=grupos).status_code, 304)
+        docente.first_name = 'Otro'
+        with self.captureOnCommitCallbacks(execute=True):
+            docente.save(update_fields=['first_name'])
+        self.assertEqual(self.client.get('/api/grupos/', HTTP_IF_NONE_MATCH=grupos).status_code, 200)
+
+    @override_settings(COMPRESION_MIN_BYTES=0)
+    def test_etag_debil_al_comprimir(self):
+        response = self.client.get('/api/grupos/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        # El cliente devuelve el ETag débil y se le responde 304
+        condicional = self.client.get(
+            '/api/grupos/', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(condicional.status_code, 304)
+        self.assertEqual(condicional['ETag'].removeprefix('W/'), response['ETag'].removeprefix('W/'))
+
+    def test_workers_con_cachés_separadas_comparten_la_version(self):
+        def worker(numero):
+            # Cada proceso con la LocMemCache por defecto tiene su propia caché
+            return override_settings(CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'worker-{numero}'
+            }})
+
+        with worker(1):
+            etag = self.client.get('/api/grupos/')['ETag']
+        with worker(2):
+            self.assertEqual(self.client.get('/api/grupos/')['ETag'], etag)
+
+        with worker(1), self.captureOnCommitCallbacks(execute=True):
+            self.grupo.materia.save()
+        with worker(2):
+            response = self.client.get('/api/grupos/', HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            nueva = response['ETag']
+        with worker(1):
+            self.assertEqual(self.client.get('/api/grupos/', HTTP_IF_NONE_MATCH=nueva).status_code, 304)
+
+
+class LoginTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.estudiante = crear_estudiantes(Carrera.objects.create(nombre='Sistemas', duracion=10), 1)[0]
+        cls.estudiante.usuario.set_password('clave-segura-123')
+        cls.estudiante.usuario.save()
+        cls.admin = Usuario.objects.create_superuser(
+            email='admin@test.com', password='clave-admin-123', ci='ADM', rol=Usuario.Rol.ADMIN
+        )
+
+    def setUp(self):
+        # Descarta accesos pendientes de otras pruebas
+        guardar_accesos()
+
+    def login(self, email, password):
+        return self.client.post('/api/auth/login/', {'email': email, 'password': password},
+                                content_type='application/json')
+
+    def test_un_solo_par_de_tokens_con_claims(self):
+        with mock.patch.object(RefreshToken, 'for_user', wraps=RefreshToken.for_user) as firmar, \
+                self.assertNumQueries(1):
+            response = self.login(self.estudiante.usuario.email, 'clave-segura-123')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(firmar.call_count, 1)
+        self.assertEqual(response.json()['user']['rol'], Usuario.Rol.ESTUDIANTE)
+
+        access = AccessToken(response.json()['access'])
+        self.assertEqual(access['rol'], Usuario.Rol.ESTUDIANTE)
+        self.assertEqual(access['estudiante_id'], self.estudiante.pk)
+        self.assertIsNone(access['docente_id'])
+        self.assertEqual(RefreshToken(response.json()['refresh'])['estudiante_id'], self.estudiante.pk)
+
+        admin = AccessToken(self.login('admin@test.com', 'clave-admin-123').json()['access'])
+        self.assertEqual((admin['rol'], admin['estudiante_id'], admin['docente_id']), (Usuario.Rol.ADMIN, None, None))
+
+    def test_credenciales_invalidas(self):
+        self.assertEqual(self.login(self.estudiante.usuario.email, 'otra').status_code, 401)
+        self.assertEqual(self.login('nadie@test.com', 'otra').status_code, 401)
+        self.assertEqual(guardar_accesos(), 0)
+
+    def test_last_login_por_lotes(self):
+        usuario = self.estudiante.usuario
+        self.login(usuario.email, 'clave-segura-123')
+        self.login('admin@test.com', 'clave-admin-123')
+        usuario.refresh_from_db()
+        self.assertIsNone(usuario.last_login)
+        with self.assertNumQueries(1):
+            self.assertEqual(guardar_accesos(), 2)
+        usuario.refresh_from_db()
+        self.assertIsNotNone(usuario.last_login)
+        self.assertIsNotNone(Usuario.objects.get(email='admin@test.com').last_login)
+
+    @override_settings(ULTIMO_ACCESO_INTERVALO=0)
+    def test_last_login_inmediato(self):
+        response = self.login(self.estudiante.usuario.email, 'clave-segura-123')
+        # El UPDATE se hace al terminar la petición, fuera de su presupuesto
+        self.assertEqual(response['X-Consultas-DB'], '1')
+        self.assertIsNotNone(Usuario.objects.get(pk=self.estudiante.usuario.pk).last_login)
+        self.assertEqual(guardar_accesos(), 0)
+
+
+class PerfilTokenTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.grupo = crear_grupo()
+        cls.estudiante = crear_estudiantes(cls.grupo.materia.carrera, 1)[0]
+
+    def setUp(self):
+        perfiles.invalidar()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.estudiante.usuario)}')
+
+    def test_sin_consultas_de_usuario_con_el_perfil_en_cache(self):
+        frio = int(self.client.get('/api/grupos/disponibles/')['X-Consultas-DB'])
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get('/api/grupos/disponibles/')
+        self.assertEqual(int(response['X-Consultas-DB']), frio - 1)
+        self.assertFalse([q for q in consultas if 'FROM "inscripciones_usuario"' in q['sql']])
+
+        # La inscripción arma el Estudiante desde el perfil: ni el usuario ni el estudiante se consultan
+        # (la respuesta sí lee el nombre del docente)
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.post('/api/inscripciones/', {'grupo': self.grupo.pk}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Inscripcion.objects.get().estudiante, self.estudiante)
+        self.assertFalse([
+            q for q in consultas
+            if f'"inscripciones_usuario"."id" = {self.estudiante.usuario_id}' in q['sql']
+            or 'FROM "inscripciones_estudiante"' in q['sql']
+        ])
+
+    def test_invalidacion_al_guardar(self):
+        self.assertEqual(self.client.get('/api/grupos/disponibles/').status_code, 200)
+        usuario = self.estudiante.usuario
+        usuario.is_active = False
+        usuario.save()
+        self.assertEqual(self.client.get('/api/grupos/disponibles/').status_code, 401)
+        usuario.is_active = True
+        usuario.rol = Usuario.Rol.DOCENTE
+        usuario.save()
+        self.assertEqual(self.client.get('/api/grupos/disponibles/').status_code, 403)
+
+        # Crear el perfil de docente habilita ver calificaciones ajenas
+        calificacion = Calificacion.objects.create(
+            estudiante=crear_estudiantes(self.grupo.materia.carrera, 1, inicio=1)[0], grupo=self.grupo, nota=80
+        )
+        permiso = IsAdminOrDocenteOrSelf()
+        request = mock.Mock(user=UsuarioToken(AccessToken.for_user(usuario), perfil_de(usuario.pk)))
+        self.assertFalse(permiso.has_object_permission(request, None, calificacion))
+        Docente.objects.create(usuario=usuario, titulo='Ing.', especialidad='Redes', fecha_contratacion=date(2020, 1, 1))
+        request.user = UsuarioToken(AccessToken.for_user(usuario), perfil_de(usuario.pk))
+        with self.assertNumQueries(0):
+            self.assertTrue(permiso.has_object_permission(request, None, calificacion))
+
+    def test_usuario_token(self):
+        self.client.get('/api/auth/me/')
+        usuario = self.estudiante.usuario
+        token = UsuarioToken(AccessToken.for_user(usuario), perfiles.get(usuario.pk))
+        with self.assertNumQueries(0):
+            self.assertEqual(token, usuario)
+            self.assertEqual(usuario, token)
+            self.assertEqual((token.rol, token.estudiante_id, token.docente_id), ('estudiante', self.estudiante.pk, None))
+            self.assertEqual(token.get_full_name(), usuario.get_full_name())
+        # Lo que no está en el perfil se lee del Usuario completo una vez
+        with self.assertNumQueries(1):
+            self.assertEqual((token.ci, token.telefono), (usuario.ci, usuario.telefono))
+        self.assertEqual(self.client.get('/api/auth/me/').json()['ci'], usuario.ci)
+
+    def test_perfil_cache_lru_y_vencimiento(self):
+        cache_perfiles = PerfilCache(maximo=2, ttl=10)
+        with mock.patch('inscripciones.autenticacion.time.monotonic', return_value=100):
+            cache_perfiles.set(1, 'a')
+            cache_perfiles.set(2, 'b')
+            cache_perfiles.get(1)
+            cache_perfiles.set(3, 'c')
+            self.assertEqual((cache_perfiles.get(1), cache_perfiles.get(2), cache_perfiles.get(3)), ('a', None, 'c'))
+        with mock.patch('inscripciones.autenticacion.time.monotonic', return_value=110):
+            self.assertIsNone(cache_perfiles.get(1))
+        self.assertEqual(len(cache_perfiles), 1)
+
+
+class ExportacionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.grupo = crear_grupo(gestion='2025-1')
+        otro = crear_grupo(sigla='INF120', gestion='2024-2', carrera=cls.grupo.materia.carrera)
+        estudiantes = crear_estudiantes(cls.grupo.materia.carrera, 3)
+        for estudiante, nota in zip(estudiantes, ['85.50', '40.00', '70.00']):
+            inscribir(estudiante, cls.grupo)
+            Calificacion.objects.create(estudiante=estudiante, grupo=cls.grupo, nota=Decimal(nota))
+        Calificacion.objects.create(estudiante=estudiantes[0], grupo=otro, nota=Decimal('90.00'))
+        cls.estudiantes = estudiantes
+        cls.admin = Usuario.objects.create_superuser(
+            email='registro@test.com', password='x', ci='REG', rol=Usuario.Rol.ADMIN
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_csv_de_calificaciones(self):
+        # La consulta se hace al enviar el cuerpo, no al armar la respuesta
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/exportar/calificaciones/', {'gestion': '2025-1'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="calificaciones_2025-1.csv"')
+        filas = list(csv.reader(b''.join(response.streaming_content).decode('utf-8-sig').splitlines()))
+        self.assertEqual(filas[0], [
+            'gestion', 'sigla', 'materia', 'paralelo', 'docente', 'matricula', 'estudiante', 'ci', 'nota', 'resultado'
+        ])
+        self.assertEqual(filas[1], [
+            '2025-1', 'INF110', 'Materia INF110', 'A', 'Nombre Apellido', 'ES0000', 'Nombre Apellido', 'E-0',
+            '85.50', 'Aprobado'
+        ])
+        self.assertEqual([f[5] for f in filas[1:]], ['ES0000', 'ES0001', 'ES0002'])
+
+    def test_xlsx_de_inscripciones(self):
+        response = self.client.get('/api/exportar/inscripciones/', {'gestion': '2025-1', 'formato': 'xlsx'})
+        self.assertEqual(response.status_code, 200)
+        libro = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(libro.testzip())
+        ns = {'x': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+        hoja = ElementTree.fromstring(libro.read('xl/worksheets/sheet1.xml'))
+        filas = [[''.join(c.itertext()) for c in fila] for fila in hoja.iterfind('.//x:row', ns)]
+        self.assertEqual(len(filas), 4)
+        self.assertEqual(filas[0][-3:], ['carrera', 'modalidad', 'fecha_inscripcion'])
+        self.assertEqual(filas[1][:2] + filas[1][-3:-1], ['2025-1', 'INF110', 'Carrera INF110', 'presencial'])
+
+    def test_validaciones(self):
+        self.assertEqual(self.client.get('/api/exportar/calificaciones/').status_code, 400)
+        self.assertEqual(self.client.get('/api/exportar/notas/', {'gestion': '2025-1'}).status_code, 404)
+        self.assertEqual(
+            self.client.get('/api/exportar/calificaciones/', {'gestion': '2025-1', 'formato': 'pdf'}).status_code, 400
+        )
+        self.client.force_authenticate(self.estudiantes[0].usuario)
+        self.assertEqual(self.client.get('/api/exportar/calificaciones/', {'gestion': '2025-1'}).status_code, 403)
+
+    def test_comando(self):
+        with tempfile.TemporaryDirectory() as carpeta:
+            salida = os.path.join(carpeta, 'notas.csv')
+            call_command('exportar', 'calificaciones', '2024-2', salida=salida, lote=1, stdout=StringIO())
+            with open(salida, encoding='utf-8-sig', newline='') as archivo:
+                filas = list(csv.reader(archivo))
+        self.assertEqual(len(filas), 2)
+        self.assertEqual(filas[1][1], 'INF120')
+
+
+class ImportacionEstudiantesTests(TestCase):
+    encabezado = 'email,password,first_name,last_name,ci,telefono,direccion,matricula,carrera,fecha_ingreso\n'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.carrera = Carrera.objects.create(nombre='Sistemas', duracion=10)
+        crear_usuario('existente@test.com', Usuario.Rol.ESTUDIANTE, 'CI-EXISTE')
+
+    def csv(self, validas, extra=''):
+        filas = ''.join(
+            f'nuevo{i}@test.com,clave{i},Nombre{i},Apellido,CI-{i},700{i},Calle {i},IM{i:04d},{self.carrera.pk},2025-02-01\n'
+            for i in range(validas)
+        )
+        return self.encabezado + filas + extra
+
+    def test_comando(self):
+        errores = (
+            'nuevo0@test.com,x,A,B,CI-R1,,,IM9000,Sistemas,2025-02-01\n'      # email repetido en el archivo
+            'otro@test.com,x,A,B,CI-EXISTE,,,IM9001,sistemas,2025-02-01\n'    # CI ya registrado
+            'malo@test.com,x,A,B,CI-M,,,123,Sistemas,2025-02-01\n'            # matrícula inválida
+            'sin@test.com,x,A,B,CI-S,,,IM9003,Medicina,2025-31-01\n'          # carrera y fecha
+            'vacia@test.com,,A,B,CI-V,,,IM9004,Sistemas,2025-02-01\n'         # sin contraseña
+            'ok@TEST.COM,clave,A,B,CI-OK,,,IM9005,Sistemas,2025-02-01\n'
+        )
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as archivo:
+            archivo.write(self.csv(25, errores))
+        reporte = tempfile.NamedTemporaryFile(suffix='.csv', delete=False).name
+        self.addCleanup(os.remove, archivo.name)
+        self.addCleanup(os.remove, reporte)
+
+        with CaptureQueriesContext(connection) as consultas:
+            call_command(
+                'importar_estudiantes', archivo.name, lote=10, procesos=2,
+                errores=reporte, stdout=StringIO()
+            )
+        # Por lote: 3 consultas de unicidad y 3 inserciones, más la carga de carreras
+        self.assertLessEqual(len(consultas), 1 + 4 * 8)
+
+        self.assertEqual(Estudiante.objects.count(), 26)
+        self.assertEqual(RecordAcademico.objects.count(), 26)
+        usuario = Usuario.objects.get(email='nuevo3@test.com')
+        self.assertTrue(usuario.check_password('clave3'))
+        self.assertEqual(usuario.rol, Usuario.Rol.ESTUDIANTE)
+        self.assertEqual(usuario.estudiante.carrera, self.carrera)
+        self.assertTrue(Usuario.objects.filter(email='ok@test.com').exists())
+
+        with open(reporte, encoding='utf-8') as f:
+            filas = list(csv.DictReader(f))
+        rechazos = {(int(f['linea']), f['campo']) for f in filas}
+        self.assertEqual(rechazos, {
+            (27, 'email'), (28, 'ci'), (29, 'matricula'), (30, 'carrera'),
+            (30, 'fecha_ingreso'), (31, 'password'),
+        })
+
+    def test_endpoint(self):
+        admin = crear_usuario('admin.import@test.com', Usuario.Rol.ADMIN, 'A-IMP')
+        admin.is_staff = True
+        client = APIClient()
+        client.force_authenticate(admin)
+
+        archivo = SimpleUploadedFile('alumnos.csv', ('\ufeff' + self.csv(5)).encode('utf-8'))
+        response = client.post('/api/estudiantes/importar/', {'archivo': archivo})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'creados': 5, 'errores': []})
+
+        archivo = SimpleUploadedFile('alumnos.csv', b'email,password\nx@test.com,1\n')
+        response = client.post('/api/estudiantes/importar/', {'archivo': archivo})
+        self.assertEqual(response.status_code, 400)
+
+        archivo = SimpleUploadedFile('alumnos.csv', self.csv(2).replace('Nombre', 'Ñandú').encode('latin-1'))
+        response = client.post('/api/estudiantes/importar/', {'archivo': archivo})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('UTF-8', response.json()['archivo'][0])
+
+        with override_settings(IMPORTACION_MAX_FILAS=3):
+            archivo = SimpleUploadedFile('alumnos.csv', self.csv(4).encode('utf-8'))
+            response = client.post('/api/estudiantes/importar/', {'archivo': archivo})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('importar_estudiantes', response.json()['archivo'][0])
+        self.assertEqual(Estudiante.objects.count(), 5)
+
+        client.force_authenticate(Usuario.objects.get(email='nuevo0@test.com'))
+        response = client.post('/api/estudiantes/importar/', {'archivo': SimpleUploadedFile('a.csv', b'')})
+        self.assertEqual(response.status_code, 403)
+
+
+class _LLMFalso(BaseHTTPRequestHandler):
+    """Imita el endpoint de chat completions en streaming de OpenAI/OpenRouter"""
+    tokens = ['Inicia sesión ', 'y ve a ', 'Inscripciones.']
+
+    def do_POST(self):
+        cuerpo = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        if 'lento' in cuerpo['messages'][-1]['content']:
+            time.sleep(1)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        try:
+            for token in self.tokens:
+                chunk = {
+                    'id': 'falso', 'object': 'chat.completion.chunk', 'created': 0, 'model': 'falso',
+                    'choices': [{'index': 0, 'delta': {'content': token}, 'finish_reason': None}],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+        except BrokenPipeError:
+            pass  # El cliente cortó por timeout
+
+    def log_message(self, *args):
+        pass
+
+
+class ChatbotTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.servidor = ThreadingHTTPServer(('127.0.0.1', 0), _LLMFalso)
+        threading.Thread(target=cls.servidor.serve_forever, daemon=True).start()
+        cls.ajustes = override_settings(
+            CHATBOT_BASE_URL=f'http://127.0.0.1:{cls.servidor.server_port}/v1',
+            CHATBOT_API_KEY='falsa',
+            CHATBOT_TIMEOUT_CONEXION=0.5,
+        )
+        cls.ajustes.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.ajustes.disable()
+        cls.servidor.shutdown()
+        cls.servidor.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        respuestas.limpiar()
+
+    async def test_respuesta_completa(self):
+        response = await self.async_client.post(
+            '/api/chatbot/', {'pregunta': '¿Qué horario tiene la biblioteca?'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['respuesta'], ''.join(_LLMFalso.tokens))
+
+    async def test_stream_sse(self):
+        response = await self.async_client.post(
+            '/api/chatbot/stream/', {'pregunta': '¿Qué horario tiene la biblioteca?'}, content_type='application/json'
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        eventos = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertEqual(eventos.count('data: {"token"'), len(_LLMFalso.tokens))
+        self.assertTrue(eventos.endswith('event: fin\ndata: {}\n\n'))
+
+    async def test_timeout(self):
+        response = await self.async_client.post(
+            '/api/chatbot/', {'pregunta': 'algo lento'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 504)
+
+    async def test_cache_por_pregunta_normalizada(self):
+        for pregunta in ['¿Qué horario tiene la BIBLIOTECA?', 'que horario  tiene la biblioteca']:
+            response = await self.async_client.post(
+                '/api/chatbot/', {'pregunta': pregunta}, content_type='application/json'
+            )
+            self.assertEqual(response.json()['respuesta'], ''.join(_LLMFalso.tokens))
+        self.assertEqual(respuestas.estadisticas()['aciertos'], 1)
+        self.assertEqual(respuestas.estadisticas()['fallos'], 1)
+        with override_settings(CHATBOT_MAX_CONCURRENCIA=0):
+            response = await self.async_client.post(
+                '/api/chatbot/stream/', {'pregunta': 'Qué horario tiene la biblioteca'}, content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 200)
+
+    async def test_intencion_conocida_sin_modelo(self):
+        with override_settings(CHATBOT_BASE_URL='http://127.0.0.1:9/v1'):
+            response = await self.async_client.post(
+                '/api/chatbot/', {'pregunta': '¿Cómo me inscribo?'}, content_type='application/json'
+            )
+        self.assertEqual(response.json()['respuesta'], RESPUESTAS['inscripciones'])
+
+    def test_clasificar(self):
+        self.assertEqual(clasificar('quiero ver mis notas')[0], 'seguimiento')
+        self.assertEqual(clasificar('¿Dónde me matriculo?')[0], 'inscripciones')
+        self.assertEqual(clasificar('cuéntame un chiste'), (None, 0))
+
+    def test_normalizar(self):
+        self.assertEqual(normalizar('  ¿Dónde veo mi SEGUIMIENTO?! '), 'donde veo mi seguimiento')
+
+    async def test_limite_de_concurrencia(self):
+        with override_settings(CHATBOT_MAX_CONCURRENCIA=0):
+            response = await self.async_client.post(
+                '/api/chatbot/stream/', {'pregunta': 'hola'}, content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 503)
+
+    @override_settings(CHATBOT_MAX_CONCURRENCIA=5)
+    def test_limite_entre_hilos(self):
+        limite = _Limite()
+        barrera = threading.Barrier(20)
+
+        def entrar(_):
+            barrera.wait()
+            try:
+                with limite:
+                    time.sleep(0.05)
+                    return True
+            except ChatbotOcupado:
+                return False
+
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            admitidos = sum(pool.map(entrar, range(20)))
+        self.assertEqual(admitidos, 5)
+        self.assertEqual(limite.activos, 0)
+
+
+class InscripcionConcurrenteTests(TransactionTestCase):
+    CUPO = 25
+    ESTUDIANTES = 200
+    HILOS = 32
+
+    def test_grupo_nunca_sobrevendido(self):
+        grupo = crear_grupo(cupo=self.CUPO)
+        estudiantes = crear_estudiantes(grupo.materia.carrera, self.ESTUDIANTES)
+
+        def intentar(estudiante):
+            try:
+                inscribir(estudiante, grupo)
+                return 'ok'
+            except CupoLleno:
+                return 'lleno'
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.HILOS) as pool:
+            resultados = list(pool.map(intentar, estudiantes))
+
+        self.assertEqual(resultados.count('ok'), self.CUPO)
+        self.assertEqual(resultados.count('lleno'), self.ESTUDIANTES - self.CUPO)
+        self.assertEqual(grupo.inscripciones.count(), self.CUPO)
@@ -1,10 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import InscripcionViewSet, MateriaViewSet,EstudianteViewSet, UsuarioViewSet,GrupoViewSet,DocenteViewSet,CarreraViewSet,MateriaRequisitoViewSet
+from .views import InscripcionViewSet, MateriaViewSet,EstudianteViewSet, UsuarioViewSet,GrupoViewSet,DocenteViewSet,CarreraViewSet,MateriaRequisitoViewSet,ListaEsperaViewSet
+from .views import CalificacionHistoricaViewSet, InscripcionHistoricaViewSet
 from .views_auth import CustomTokenObtainPairView
 from rest_framework_simplejwt.views import TokenRefreshView
 from .views_auth import CustomTokenObtainPairView, CurrentUserView
-from .views import ChatbotAPIView, DashboardAPIView
+from .views import ChatbotEstadisticasAPIView, DashboardAPIView, ExportacionAPIView
+from .views_chatbot import chatbot, chatbot_stream
 
 router = DefaultRouter()
 router.register(r'inscripciones', InscripcionViewSet, basename='inscripcion')
@@ -15,11 +17,17 @@ router.register(r'carreras', CarreraViewSet, basename='carrera')
 router.register(r'docentes', DocenteViewSet, basename='docente')
 router.register(r'estudiantes', EstudianteViewSet, basename='estudiantes')
 router.register(r'materia-requisitos', MateriaRequisitoViewSet, basename='materia-requisitos')
+router.register(r'lista-espera', ListaEsperaViewSet, basename='lista-espera')
+router.register(r'inscripciones-historicas', InscripcionHistoricaViewSet, basename='inscripcion-historica')
+router.register(r'calificaciones-historicas', CalificacionHistoricaViewSet, basename='calificacion-historica')
 urlpatterns = [
     path('', include(router.urls)),
     path('auth/login/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('auth/me/', UsuarioViewSet.as_view({'get': 'current_user'}), name='current_user'),
-    path('chatbot/', ChatbotAPIView.as_view(), name='chatbot'),
+    path('chatbot/', chatbot, name='chatbot'),
+    path('chatbot/stream/', chatbot_stream, name='chatbot_stream'),
+    path('chatbot/estadisticas/', ChatbotEstadisticasAPIView.as_view(), name='chatbot_estadisticas'),
     path('dashboard/', DashboardAPIView.as_view(), name='dashboard'),
+    path('exportar/<str:tipo>/', ExportacionAPIView.as_view(), name='exportar'),
 ]
\ No newline at end of file
@@ -0,0 +1,121 @@
+import hashlib
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import Carrera, Docente, Grupo, Materia, MateriaRequisito, Usuario, VersionCatalogo
+
+# Versión por modelo en la tabla VersionCatalogo y no en la caché de Django:
+# con la caché local de cada proceso un worker no vería los cambios hechos
+# en otro y respondería 304 con datos viejos.
+
+
+def _nombres(modelos):
+    return [modelo._meta.model_name for modelo in modelos]
+
+
+def incrementar(*modelos):
+    """Sube la versión de cada modelo con un UPDATE atómico; la fila se crea en el primer cambio"""
+    ahora = timezone.now()
+    for nombre in _nombres(modelos):
+        if VersionCatalogo.objects.filter(pk=nombre).update(version=F('version') + 1, fecha=ahora):
+            continue
+        try:
+            with transaction.atomic():
+                VersionCatalogo.objects.create(modelo=nombre, version=1, fecha=ahora)
+        except IntegrityError:
+            # Otro proceso la creó entre tanto
+            VersionCatalogo.objects.filter(pk=nombre).update(version=F('version') + 1, fecha=ahora)
+
+
+def marcar_cambio(*modelos):
+    # Al confirmar: así la fila de versión no queda bloqueada durante la
+    # transacción que hizo el cambio
+    transaction.on_commit(lambda: incrementar(*modelos))
+
+
+def versiones(modelos):
+    """(versiones, fecha del último cambio) de los modelos en una sola consulta"""
+    guardadas = {
+        modelo: (version, fecha)
+        for modelo, version, fecha in VersionCatalogo.objects.filter(
+            pk__in=_nombres(modelos)
+        ).values_list('modelo', 'version', 'fecha')
+    }
+    numeros = [guardadas.get(nombre, (0, None))[0] for nombre in _nombres(modelos)]
+    fecha = max((fecha for _, fecha in guardadas.values()), default=None)
+    return numeros, fecha.timestamp() if fecha else 0
+
+
+class CatalogoCondicionalMixin:
+    """ETag y Last-Modified para list/retrieve a partir de las versiones de `modelos_catalogo`.
+
+    Se declaran el modelo de la vista y los que aportan campos a su respuesta
+    (nombres de carrera, materia, docente...). Si el cliente ya tiene la
+    versión vigente se responde 304 con una sola consulta, la de las versiones.
+    """
+
+    modelos_catalogo = ()
+
+    def list(self, request, *args, **kwargs):
+        return self._condicional(request) or self._con_validadores(super().list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._condicional(request) or self._con_validadores(super().retrieve(request, *args, **kwargs))
+
+    def _validadores(self, request):
+        if getattr(request, '_validadores_catalogo', None) is None:
+            numeros, fecha = versiones(self.modelos_catalogo)
+            # La fecha distingue versiones repetidas si se restaura una copia de la base
+            firma = '|'.join(map(str, numeros + [fecha, request.get_full_path(), request.accepted_media_type]))
+            request._validadores_catalogo = (
+                f'"{hashlib.sha1(firma.encode()).hexdigest()}"', int(fecha)
+            )
+        return request._validadores_catalogo
+
+    def _condicional(self, request):
+        etag, fecha = self._validadores(request)
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match is not None:
+            etiquetas = [e.strip().removeprefix('W/') for e in if_none_match.split(',')]
+            vigente = etag in etiquetas or '*' in etiquetas
+        else:
+            desde = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+            vigente = desde is not None and fecha <= desde
+        if vigente:
+            return self._con_validadores(Response(status=status.HTTP_304_NOT_MODIFIED))
+
+    def _con_validadores(self, response):
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            etag, fecha = self._validadores(self.request)
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(fecha)
+        return response
+
+
+@receiver(post_save, sender=Carrera)
+@receiver(post_delete, sender=Carrera)
+@receiver(post_save, sender=Materia)
+@receiver(post_delete, sender=Materia)
+@receiver(post_save, sender=MateriaRequisito)
+@receiver(post_delete, sender=MateriaRequisito)
+@receiver(post_save, sender=Grupo)
+@receiver(post_delete, sender=Grupo)
+@receiver(post_save, sender=Docente)
+@receiver(post_delete, sender=Docente)
+def cambio_en_catalogo(sender, **kwargs):
+    marcar_cambio(sender)
+
+
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+def cambio_en_usuario(sender, update_fields=None, **kwargs):
+    # El login actualiza last_login en cada acceso; solo el nombre aparece en el catálogo
+    if update_fields is None or {'first_name', 'last_name'} & set(update_fields):
+        marcar_cambio(Usuario)
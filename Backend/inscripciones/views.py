@@ -1,23 +1,45 @@
-from rest_framework import viewsets, permissions, status
+from rest_framework import mixins, viewsets, permissions, status
 from rest_framework.response import Response
-from rest_framework.decorators import action, api_view
+from rest_framework.decorators import action
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import models
-from django.db.models import Count
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.text import get_valid_filename
 
 from .models import *
 from .serializers import *
 from .permissions import *
-from .chatbot import preguntar
+from .autenticacion import estudiante_de, perfil_id
+from .chatbot import respuestas
+from .dashboard import datos_dashboard
+from .exportacion import EXPORTACIONES, FORMATOS, exportar
+from .importacion import importar_estudiantes
+from .medicion import PresupuestoConsultasMixin
+from .pagination import PaginacionCursorOpcional
+from .proyecciones import ESTUDIANTES, GRUPOS, GRUPOS_CON_CUPO, INSCRIPCIONES, MATERIAS, ListaProyectadaMixin
+from .services import (
+    cambiar_grupo, grupos_disponibles, inscribir_carrito, inscribir_o_esperar,
+    registrar_calificaciones, salir_de_espera
+)
+from .versiones import CatalogoCondicionalMixin
 
-class UsuarioViewSet(viewsets.ModelViewSet):
+class UsuarioViewSet(PresupuestoConsultasMixin, viewsets.ModelViewSet):
     queryset = Usuario.objects.all()
     serializer_class = UsuarioSerializer
     permission_classes = [IsAdminOrReadOnly]
+    presupuesto_consultas = {
+        'list': 3, 'retrieve': 2, 'current_user': 2,
+        'create': 4, 'update': 5, 'partial_update': 5, 'destroy': 8,
+    }
+    pagination_class = PaginacionCursorOpcional
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['rol', 'is_active']
 
@@ -26,34 +48,92 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(request.user)
         return Response(serializer.data)
 
-class CarreraViewSet(viewsets.ModelViewSet):
+class CarreraViewSet(PresupuestoConsultasMixin, CatalogoCondicionalMixin, viewsets.ModelViewSet):
     queryset = Carrera.objects.all()
     serializer_class = CarreraSerializer
     permission_classes = [IsAdminOrReadOnly]
+    presupuesto_consultas = {
+        'list': 4, 'retrieve': 3,
+        'create': 3, 'update': 4, 'partial_update': 4, 'destroy': 5,
+    }
+    modelos_catalogo = [Carrera]
 
-class MateriaViewSet(viewsets.ModelViewSet):
+class MateriaViewSet(PresupuestoConsultasMixin, CatalogoCondicionalMixin, ListaProyectadaMixin, viewsets.ModelViewSet):
     queryset = Materia.objects.select_related('carrera')
     serializer_class = MateriaSerializer
     permission_classes = [IsAuthenticated]
+    presupuesto_consultas = {
+        'list': 5, 'retrieve': 3,
+        'create': 4, 'update': 5, 'partial_update': 5, 'destroy': 6,
+    }
+    modelos_catalogo = [Materia, Carrera]
+    proyeccion = MATERIAS
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['carrera', 'nivel']
 
-class MateriaRequisitoViewSet(viewsets.ModelViewSet):
+class MateriaRequisitoViewSet(PresupuestoConsultasMixin, CatalogoCondicionalMixin, viewsets.ModelViewSet):
     queryset = MateriaRequisito.objects.select_related('materia', 'requisito')
     serializer_class = MateriaRequisitoSerializer
     permission_classes = [IsAdminOrReadOnly]
+    presupuesto_consultas = {
+        'list': 4, 'retrieve': 3,
+        'create': 7, 'update': 8, 'partial_update': 8, 'destroy': 3,
+    }
+    modelos_catalogo = [MateriaRequisito, Materia]
 
-class DocenteViewSet(viewsets.ModelViewSet):
+class DocenteViewSet(PresupuestoConsultasMixin, viewsets.ModelViewSet):
     queryset = Docente.objects.select_related('usuario')
     serializer_class = DocenteSerializer
     permission_classes = [IsAdminOrReadOnly]
+    presupuesto_consultas = {
+        'list': 3, 'retrieve': 2,
+        'create': 3, 'update': 4, 'partial_update': 4, 'destroy': 4,
+    }
 
-class EstudianteViewSet(viewsets.ModelViewSet):
+class EstudianteViewSet(PresupuestoConsultasMixin, ListaProyectadaMixin, viewsets.ModelViewSet):
     queryset = Estudiante.objects.select_related('usuario', 'carrera')
     serializer_class = EstudianteSerializer
     permission_classes = [IsAdminOrReadOnly]
+    # importar: IMPORTACION_MAX_FILAS filas, que SQLite inserta en varios lotes
+    presupuesto_consultas = {
+        'list': 5, 'retrieve': 2, 'record_academico': 3, 'mi_seguimiento': 4, 'importar': 21,
+        'create': 6, 'update': 6, 'partial_update': 6, 'destroy': 9,
+    }
+    proyeccion = ESTUDIANTES
+    pagination_class = PaginacionCursorOpcional
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = ['carrera', 'matricula']
+    filterset_fields = ['carrera', 'matricula', 'usuario']
+
+    @action(
+        detail=False, methods=['post'], parser_classes=[MultiPartParser],
+        permission_classes=[permissions.IsAdminUser]
+    )
+    def importar(self, request):
+        """Alta masiva desde un CSV subido en el campo `archivo`; responde con el reporte por fila.
+
+        Hashear contraseñas es caro: por HTTP se aceptan hasta
+        IMPORTACION_MAX_FILAS filas y se hashean en este proceso, sin pool.
+        Los archivos grandes se importan con `manage.py importar_estudiantes`.
+        """
+        archivo = request.FILES.get('archivo')
+        if archivo is None:
+            raise ValidationError({'archivo': ['Debe adjuntar un archivo CSV.']})
+        # Se decodifica todo antes de importar: un archivo mal codificado no deja filas a medias
+        try:
+            lineas = [linea.decode('utf-8-sig') for linea in archivo]
+        except UnicodeDecodeError:
+            raise ValidationError({'archivo': ['El archivo debe estar codificado en UTF-8.']})
+        maximo = getattr(settings, 'IMPORTACION_MAX_FILAS', 500)
+        if len(lineas) - 1 > maximo:
+            raise ValidationError({'archivo': [
+                f'Se admiten como máximo {maximo} filas por esta vía; '
+                'para archivos más grandes use el comando importar_estudiantes.'
+            ]})
+        try:
+            resultado = importar_estudiantes(lineas, procesos=1)
+        except DjangoValidationError as e:
+            raise ValidationError({'archivo': e.messages})
+        return Response(resultado)
 
     @action(detail=True, methods=['get'])
     def record_academico(self, request, pk=None):
@@ -61,110 +141,216 @@ class EstudianteViewSet(viewsets.ModelViewSet):
         serializer = RecordAcademicoSerializer(estudiante.record)
         return Response(serializer.data)
 
-class GrupoViewSet(viewsets.ModelViewSet):
+    @action(
+        detail=False, methods=['get'], url_path='mi-seguimiento',
+        permission_classes=[IsAuthenticated, IsEstudiante]
+    )
+    def mi_seguimiento(self, request):
+        """Perfil, record e inscripciones con su nota de una sola gestión.
+
+        Sin ?gestion= es la gestión en curso (la más reciente de los grupos),
+        así la respuesta no crece con cada gestión cursada: perfil y record en
+        una consulta e inscripciones en otra. Con ?gestion= se puede pedir una
+        anterior, también archivada, y se lee además el historial: tres
+        consultas. El presupuesto suma la del usuario al autenticar.
+        """
+        estudiante = get_object_or_404(
+            Estudiante.objects.select_related('usuario', 'carrera', 'record'),
+            usuario_id=request.user.pk
+        )
+        gestion = request.query_params.get('gestion')
+        nota = Calificacion.objects.filter(
+            estudiante=estudiante, grupo=models.OuterRef('grupo')
+        ).values('nota')[:1]
+        inscripciones = (
+            estudiante.inscripciones
+            .select_related('grupo__materia', 'grupo__docente__usuario')
+            .annotate(nota=models.Subquery(nota))
+            .filter(grupo__gestion=gestion or models.Subquery(
+                Grupo.objects.order_by('-gestion').values('gestion')[:1]
+            ))
+            .order_by('grupo__materia__nombre')
+        )
+        historicas = []
+        if gestion:
+            nota_historica = CalificacionHistorica.objects.filter(
+                estudiante=estudiante, grupo=models.OuterRef('grupo')
+            ).values('nota')[:1]
+            historicas = (
+                estudiante.inscripciones_historicas
+                .filter(gestion=gestion)
+                .select_related('grupo__materia', 'grupo__docente__usuario')
+                .annotate(nota=models.Subquery(nota_historica))
+                .order_by('grupo__materia__nombre')
+            )
+        return Response({
+            'estudiante': EstudianteSerializer(estudiante).data,
+            'inscripciones': SeguimientoInscripcionSerializer([*inscripciones, *historicas], many=True).data,
+            'record': RecordAcademicoSerializer(estudiante.record).data,
+        })
+
+class GrupoViewSet(PresupuestoConsultasMixin, CatalogoCondicionalMixin, ListaProyectadaMixin, viewsets.ModelViewSet):
     queryset = Grupo.objects.select_related('materia', 'docente', 'docente__usuario')
     serializer_class = GrupoSerializer
     permission_classes = [IsAuthenticated]
+    presupuesto_consultas = {
+        'list': 6, 'retrieve': 3, 'disponibles': 8, 'calificaciones': 9,
+        'create': 6, 'update': 6, 'partial_update': 6, 'destroy': 8,
+    }
+    modelos_catalogo = [Grupo, Materia, Docente, Usuario]
+    proyeccion = GRUPOS
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['materia', 'docente', 'gestion', 'modalidad']
 
-class IsEstudiante(permissions.BasePermission):
-    def has_permission(self, request, view):
-        return request.user.is_authenticated and request.user.rol == 'estudiante'
+    @action(
+        detail=True, methods=['post'], url_path='calificaciones',
+        permission_classes=[IsAuthenticated, IsAdminOrDocenteDelGrupo]
+    )
+    def calificaciones(self, request, pk=None):
+        grupo = self.get_object()
+        serializer = CalificacionMasivaSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        return Response(registrar_calificaciones(grupo, serializer.validated_data))
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsEstudiante])
+    def disponibles(self, request):
+        """Grupos donde el estudiante puede inscribirse; ?incluir_llenos=1 suma los que tienen
+        cupo_disponible 0, donde la inscripción lo deja en la lista de espera"""
+        estudiante = estudiante_de(request.user)
+        return self.listar_proyeccion(grupos_disponibles(
+            estudiante, request.query_params.get('gestion'),
+            incluir_llenos=request.query_params.get('incluir_llenos') in ('1', 'true')
+        ), GRUPOS_CON_CUPO)
 
-class InscripcionViewSet(viewsets.ModelViewSet):
-    queryset = Inscripcion.objects.all()
+class InscripcionViewSet(PresupuestoConsultasMixin, ListaProyectadaMixin, viewsets.ModelViewSet):
+    queryset = Inscripcion.objects.select_related('grupo__materia', 'grupo__docente__usuario')
     serializer_class = InscripcionSerializer
     permission_classes = [IsAuthenticated, IsEstudiante]
+    # carrito, create y update: la primera petición tras cambiar los requisitos
+    # compila el índice; create incluye el paso a la lista de espera
+    presupuesto_consultas = {
+        'list': 5, 'retrieve': 2, 'carrito': 9,
+        'create': 14, 'update': 13, 'partial_update': 13, 'destroy': 4,
+    }
+    proyeccion = INSCRIPCIONES
+    filterset_fields = ['estudiante', 'grupo']
+    pagination_class = PaginacionCursorOpcional
+    cursor_ordering = '-fecha_inscripcion'
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        resultado = inscribir_o_esperar(estudiante_de(request.user), serializer.validated_data['grupo'])
+        if isinstance(resultado, ListaEspera):
+            # Grupo lleno: queda en la cola y consulta su posición en /api/lista-espera/<id>/
+            return Response(ListaEsperaSerializer(resultado).data, status=status.HTTP_202_ACCEPTED)
+        serializer.instance = resultado
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
-    def perform_create(self, serializer):
-        estudiante = Estudiante.objects.get(usuario=self.request.user)
-        grupo = serializer.validated_data['grupo']
-        materia = grupo.materia
+    @action(detail=False, methods=['post'])
+    def carrito(self, request):
+        """Inscribe en varios grupos a la vez: todos o ninguno, con el motivo de cada rechazo"""
+        carrito = InscripcionCarritoSerializer(data=request.data)
+        carrito.is_valid(raise_exception=True)
+        inscripciones = inscribir_carrito(estudiante_de(request.user), carrito.validated_data['grupos'])
+        serializer = self.get_serializer(inscripciones, many=True)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        # Obtener los requisitos de la materia
-        requisitos = materia.requisitos_para.all().values_list('requisito', flat=True)
-        # Obtener las materias aprobadas por el estudiante
-        materias_aprobadas = estudiante.calificaciones.filter(
-            resultado='Aprobado'
-        ).values_list('grupo__materia', flat=True)
+    def perform_update(self, serializer):
+        grupo = serializer.validated_data.get('grupo')
+        if grupo is not None:
+            cambiar_grupo(serializer.instance, grupo)
+
+class ListaEsperaViewSet(
+    PresupuestoConsultasMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin, viewsets.GenericViewSet
+):
+    """Listas de espera del estudiante. La posición se lee de la entrada y su
+    grupo, así que consultarla cuesta una búsqueda por clave primaria."""
+    queryset = ListaEspera.objects.con_posicion().select_related('grupo__materia').order_by('pk')
+    serializer_class = ListaEsperaSerializer
+    permission_classes = [IsAuthenticated, IsEstudiante]
+    presupuesto_consultas = {'list': 3, 'retrieve': 2, 'destroy': 9}
 
-        # Verificar si faltan requisitos
-        faltantes = set(requisitos) - set(materias_aprobadas)
-        if faltantes:
-            raise ValidationError("No cumple con los requisitos para inscribirse en esta materia.")
+    def get_queryset(self):
+        return super().get_queryset().filter(estudiante_id=perfil_id(self.request.user, 'estudiante'))
 
-        serializer.save(estudiante=estudiante)
+    def perform_destroy(self, instance):
+        salir_de_espera(instance)
 
-class CalificacionViewSet(viewsets.ModelViewSet):
+class CalificacionViewSet(PresupuestoConsultasMixin, viewsets.ModelViewSet):
     queryset = Calificacion.objects.select_related(
         'estudiante', 'estudiante__usuario', 'grupo', 'grupo__materia'
     )
     serializer_class = CalificacionSerializer
     permission_classes = [IsAdminOrDocenteOrSelf]
+    presupuesto_consultas = {
+        'list': 5, 'retrieve': 2,
+        'create': 11, 'update': 14, 'partial_update': 14, 'destroy': 5,
+    }
+    pagination_class = PaginacionCursorOpcional
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['estudiante', 'grupo', 'resultado']
 
-    def perform_create(self, serializer):
-        instance = serializer.save()
-        instance.estudiante.actualizar_record()
-
-class ChatbotAPIView(APIView):
-    permission_classes = [AllowAny]  # <-- Esto permite acceso sin autenticación
+class InscripcionHistoricaViewSet(PresupuestoConsultasMixin, viewsets.ReadOnlyModelViewSet):
+    """Inscripciones de gestiones archivadas, solo lectura"""
+    queryset = InscripcionHistorica.objects.select_related('grupo__materia')
+    serializer_class = InscripcionHistoricaSerializer
+    permission_classes = [permissions.IsAdminUser]
+    presupuesto_consultas = {'list': 5, 'retrieve': 2}
+    pagination_class = PaginacionCursorOpcional
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['estudiante', 'grupo', 'gestion']
 
-    def post(self, request):
-        pregunta = request.data.get('pregunta', '')
-        if not pregunta:
-            return Response({'error': 'No enviaste una pregunta.'}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            respuesta = preguntar(pregunta)
-            return Response({'respuesta': respuesta})
-        except Exception as e:
-            return Response({'error': str(e)}, status=500)
+class CalificacionHistoricaViewSet(PresupuestoConsultasMixin, viewsets.ReadOnlyModelViewSet):
+    """Calificaciones de gestiones archivadas, solo lectura"""
+    queryset = CalificacionHistorica.objects.select_related('estudiante__usuario', 'grupo__materia')
+    serializer_class = CalificacionHistoricaSerializer
+    permission_classes = [permissions.IsAdminUser]
+    presupuesto_consultas = {'list': 5, 'retrieve': 2}
+    pagination_class = PaginacionCursorOpcional
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['estudiante', 'grupo', 'gestion', 'resultado']
 
-class DashboardAPIView(APIView):
+class DashboardAPIView(PresupuestoConsultasMixin, APIView):
     permission_classes = [AllowAny]  # <-- Permite acceso sin autenticación
+    presupuesto_consultas = {'get': 7}
 
     def get(self, request):
-        total_estudiantes = Estudiante.objects.count()
-        total_docentes = Docente.objects.count()
-        estudiantes_por_materia = (
-            Materia.objects.annotate(total=Count('grupos__inscripciones__estudiante', distinct=True))
-            .values('nombre', 'total')
-            .order_by('nombre')
-        )
-        docentes_por_materia = (
-            Materia.objects.annotate(total=Count('grupos__docente', distinct=True))
-            .values('nombre', 'total')
-            .order_by('nombre')
-        )
-        return Response({
-            "total_estudiantes": total_estudiantes,
-            "total_docentes": total_docentes,
-            "estudiantes_por_materia": list(estudiantes_por_materia),
-            "docentes_por_materia": list(docentes_por_materia),
-        })
+        return Response(datos_dashboard())
 
-@api_view(['GET'])
-def dashboard_data(request):
-    total_estudiantes = Estudiante.objects.count()
-    total_docentes = Docente.objects.count()
 
-    estudiantes_por_materia = (
-        Materia.objects.annotate(total=Count('grupos__inscripciones__estudiante', distinct=True))
-        .values('nombre', 'total')
-        .order_by('nombre')
-    )
+class ChatbotEstadisticasAPIView(PresupuestoConsultasMixin, APIView):
+    permission_classes = [permissions.IsAdminUser]
+    # Las estadísticas están en memoria: solo el perfil del usuario
+    presupuesto_consultas = {'get': 1}
+
+    def get(self, request):
+        return Response(respuestas.estadisticas())
 
-    docentes_por_materia = (
-        Materia.objects.annotate(total=Count('grupos__docente', distinct=True))
-        .values('nombre', 'total')
-        .order_by('nombre')
-    )
 
-    return Response({
-        "total_estudiantes": total_estudiantes,
-        "total_docentes": total_docentes,
-        "estudiantes_por_materia": list(estudiantes_por_materia),
-        "docentes_por_materia": list(docentes_por_materia),
-    })
+class ExportacionAPIView(PresupuestoConsultasMixin, APIView):
+    """Calificaciones o inscripciones de una gestión como archivo CSV o XLSX.
+
+    El archivo se genera mientras se envía, sin paginar ni serializar en memoria.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    # Perfil, gestión archivada o no y la consulta de filas, leída por partes
+    presupuesto_consultas = {'get': 3}
+
+    def get(self, request, tipo):
+        if tipo not in EXPORTACIONES:
+            raise NotFound(f"Exportación desconocida: use {', '.join(EXPORTACIONES)}.")
+        gestion = request.query_params.get('gestion')
+        if not gestion:
+            raise ValidationError({'gestion': ['Este parámetro es obligatorio.']})
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in FORMATOS:
+            raise ValidationError({'formato': [f"Formato no soportado: use {', '.join(FORMATOS)}."]})
+
+        response = StreamingHttpResponse(exportar(tipo, gestion, formato), content_type=FORMATOS[formato])
+        response['Content-Disposition'] = (
+            f'attachment; filename="{get_valid_filename(f"{tipo}_{gestion}.{formato}")}"'
+        )
+        return response
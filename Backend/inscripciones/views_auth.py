@@ -2,10 +2,14 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework.response import Response
+from .medicion import PresupuestoConsultasMixin
 from .serializers import UsuarioSerializer, CustomTokenObtainPairSerializer
 
-class CustomTokenObtainPairView(TokenObtainPairView):
+class CustomTokenObtainPairView(PresupuestoConsultasMixin, TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    # Usuario y perfil en una consulta; last_login se guarda por lotes después
+    # de responder (accesos.py), así que también es el peor caso
+    presupuesto_consultas = {'post': 1}
 
 class CurrentUserView(APIView):
     permission_classes = [IsAuthenticated]
@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from .chatbot import ChatbotOcupado, limite, preguntar_stream, respuesta_inmediata
+
+# Vistas asíncronas (sin autenticación, igual que antes): bajo ASGI la espera
+# al modelo no ocupa ningún hilo, así que el chatbot no compite con la API de
+# inscripciones por los workers.
+
+MENSAJE_OCUPADO = 'El asistente está ocupado, intenta de nuevo en unos segundos.'
+MENSAJE_TIMEOUT = 'El asistente tardó demasiado en responder.'
+
+
+def _leer_pregunta(request):
+    try:
+        datos = json.loads(request.body or b'{}')
+    except ValueError:
+        return ''
+    return str(datos.get('pregunta') or '').strip()
+
+
+@csrf_exempt
+@require_POST
+async def chatbot(request):
+    pregunta = _leer_pregunta(request)
+    if not pregunta:
+        return JsonResponse({'error': 'No enviaste una pregunta.'}, status=400)
+    try:
+        respuesta = ''.join([token async for token in preguntar_stream(pregunta)])
+    except ChatbotOcupado:
+        return JsonResponse({'error': MENSAJE_OCUPADO}, status=503)
+    except asyncio.TimeoutError:
+        return JsonResponse({'error': MENSAJE_TIMEOUT}, status=504)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+    return JsonResponse({'respuesta': respuesta})
+
+
+def _evento(datos, tipo=None):
+    linea = f"data: {json.dumps(datos)}\n\n"
+    return f"event: {tipo}\n{linea}" if tipo else linea
+
+
+@csrf_exempt
+@require_POST
+async def chatbot_stream(request):
+    """Envía la respuesta por Server-Sent Events a medida que llegan los tokens"""
+    pregunta = _leer_pregunta(request)
+    if not pregunta:
+        return JsonResponse({'error': 'No enviaste una pregunta.'}, status=400)
+    if limite.lleno() and respuesta_inmediata(pregunta, contar=False) is None:
+        return JsonResponse({'error': MENSAJE_OCUPADO}, status=503)
+
+    async def eventos():
+        try:
+            async for token in preguntar_stream(pregunta):
+                yield _evento({'token': token})
+            yield _evento({}, 'fin')
+        except ChatbotOcupado:
+            yield _evento({'error': MENSAJE_OCUPADO}, 'error')
+        except asyncio.TimeoutError:
+            yield _evento({'error': MENSAJE_TIMEOUT}, 'error')
+        except Exception as e:
+            yield _evento({'error': str(e)}, 'error')
+
+    response = StreamingHttpResponse(eventos(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
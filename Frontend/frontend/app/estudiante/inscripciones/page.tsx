@@ -8,6 +8,7 @@ interface Grupo {
   paralelo: string;
   gestion: string;
   docente_nombre: string;
+  cupo_disponible: number;
 }
 
 export default function InscripcionPage() {
@@ -24,7 +25,8 @@ export default function InscripcionPage() {
       router.push("/login");
       return;
     }
-    fetch(`${API_BASE_URL}/api/grupos/`, {
+    // Los grupos llenos también se listan: inscribirse en ellos es entrar a la lista de espera
+    fetch(`${API_BASE_URL}/api/grupos/disponibles/?incluir_llenos=1`, {
       headers: { Authorization: `Bearer ${token}` },
     })
       .then((res) => res.json())
@@ -51,7 +53,13 @@ export default function InscripcionPage() {
         },
         body: JSON.stringify({ grupo: grupoId }),
       });
-      if (res.ok) {
+      if (res.status === 202) {
+        // Grupo lleno: el backend te agrega a la lista de espera
+        const data = await res.json();
+        setMensaje(
+          `El grupo está lleno. Quedaste en la lista de espera en la posición ${data.posicion}; te inscribiremos cuando se libere un cupo.`
+        );
+      } else if (res.ok) {
         setMensaje("¡Inscripción exitosa!");
       } else {
         const data = await res.json();
@@ -80,6 +88,7 @@ export default function InscripcionPage() {
           {grupos.map((g) => (
             <option key={g.id} value={g.id}>
               {g.materia_nombre} | Paralelo: {g.paralelo} | Gestión: {g.gestion} | Docente: {g.docente_nombre}
+              {g.cupo_disponible <= 0 ? " | Lleno: lista de espera" : ` | Cupos: ${g.cupo_disponible}`}
             </option>
           ))}
         </select>
@@ -1,22 +1,12 @@
 "use client";
 import { useEffect, useState } from "react";
 import { API_BASE_URL } from "@/lib/api";
-interface Materia {
-  nombre: string;
-}
-
-interface Docente {
-  usuario: {
-    first_name: string;
-    last_name: string;
-  };
-}
-
 interface Inscripcion {
   id: number;
-  materia: Materia;
-  docente: Docente;
-  nota: number;
+  materia_nombre: string;
+  docente_nombre: string;
+  grupo_gestion: string;
+  nota: string | null;
 }
 
 export default function Page() {
@@ -30,30 +20,17 @@ export default function Page() {
       setError("");
       const token = localStorage.getItem("access");
       try {
-        // 1. Obtener el usuario actual
-        const userRes = await fetch(`${API_BASE_URL}/api/auth/me/`, {
+        // Perfil, inscripciones y record del estudiante en una sola petición
+        const res = await fetch(`${API_BASE_URL}/api/estudiantes/mi-seguimiento/`, {
           headers: { Authorization: `Bearer ${token}` },
         });
-        const userData = await userRes.json();
-        // 2. Obtener el perfil estudiante
-        const estRes = await fetch(
-          `${API_BASE_URL}/api/estudiantes/?usuario=${userData.id}`,
-          { headers: { Authorization: `Bearer ${token}` } }
-        );
-        const estData = await estRes.json();
-        const estudianteId = estData.results?.[0]?.id;
-        if (!estudianteId) {
+        if (!res.ok) {
           setError("No se encontró el perfil de estudiante.");
           setLoading(false);
           return;
         }
-        // 3. Obtener inscripciones del estudiante
-        const inscRes = await fetch(
-          `${API_BASE_URL}/api/inscripciones/?estudiante=${estudianteId}`,
-          { headers: { Authorization: `Bearer ${token}` } }
-        );
-        const inscData = await inscRes.json();
-        setInscripciones(inscData.results || []);
+        const data = await res.json();
+        setInscripciones(data.inscripciones || []);
       } catch {
         setError("Error al cargar los datos.");
       }
@@ -82,12 +59,10 @@ export default function Page() {
             {inscripciones.map((insc) => (
               <tr key={insc.id}>
                 <td className="p-2 border">
-                  {insc.materia?.nombre ?? "Sin materia"}
+                  {insc.materia_nombre || "Sin materia"}
                 </td>
                 <td className="p-2 border">
-                  {insc.docente?.usuario
-                    ? `${insc.docente.usuario.first_name} ${insc.docente.usuario.last_name}`
-                    : "Sin docente"}
+                  {insc.docente_nombre || "Sin docente"}
                 </td>
                 <td className="p-2 border">
                   {insc.nota ?? "Sin nota"}
@@ -34,21 +34,52 @@ const Chatbot: React.FC<ChatbotProps> = ({ open, onClose }) => {
     setLoading(true);
 
     try {
-      const res = await fetch(`${API_BASE_URL}/api/chatbot/`, {
+      const res = await fetch(`${API_BASE_URL}/api/chatbot/stream/`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ pregunta: input }),
       });
-      const data = await res.json();
+      if (!res.ok || !res.body) {
+        const data = await res.json().catch(() => ({}));
+        throw new Error(data.error || "No se pudo obtener respuesta.");
+      }
 
-      setMessages((msgs) => [
-        ...msgs,
-        { sender: "bot", text: data.respuesta || "No se pudo obtener respuesta." },
-      ]);
+      // Respuesta por Server-Sent Events: se va completando el último mensaje del bot
+      setMessages((msgs) => [...msgs, { sender: "bot", text: "" }]);
+      const agregar = (texto: string) =>
+        setMessages((msgs) => {
+          const ultimo = msgs[msgs.length - 1];
+          return [...msgs.slice(0, -1), { ...ultimo, text: ultimo.text + texto }];
+        });
+
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const eventos = buffer.split("\n\n");
+        buffer = eventos.pop() || "";
+        for (const evento of eventos) {
+          const tipo = evento.match(/^event: (.*)$/m)?.[1];
+          const datos = evento.match(/^data: (.*)$/m)?.[1];
+          if (!datos) continue;
+          const payload = JSON.parse(datos);
+          if (tipo === "error") agregar(payload.error);
+          else if (payload.token) agregar(payload.token);
+        }
+      }
     } catch (err) {
       setMessages((msgs) => [
         ...msgs,
-        { sender: "bot", text: "Error al conectar con el chatbot." },
+        {
+          sender: "bot",
+          text:
+            err instanceof Error && !(err instanceof TypeError)
+              ? err.message
+              : "Error al conectar con el chatbot.",
+        },
       ]);
     }
     setInput("");